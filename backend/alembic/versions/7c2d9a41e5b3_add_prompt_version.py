@@ -0,0 +1,35 @@
+"""add prompt_version to horoscope_entry
+
+Revision ID: 7c2d9a41e5b3
+Revises: 391f4e10d167
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c2d9a41e5b3"
+down_revision = "391f4e10d167"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "horoscope_entry",
+        sa.Column("prompt_version", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_horoscope_entry_prompt_version"),
+        "horoscope_entry",
+        ["prompt_version"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_horoscope_entry_prompt_version"), table_name="horoscope_entry"
+    )
+    op.drop_column("horoscope_entry", "prompt_version")
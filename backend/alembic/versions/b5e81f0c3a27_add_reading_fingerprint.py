@@ -0,0 +1,34 @@
+"""add reading_fingerprint and user/created_at index to horoscope_entry
+
+Revision ID: b5e81f0c3a27
+Revises: 7c2d9a41e5b3
+Create Date: 2026-10-18 15:40:12.518302
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b5e81f0c3a27"
+down_revision = "7c2d9a41e5b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "horoscope_entry",
+        sa.Column("reading_fingerprint", sa.BigInteger(), nullable=True),
+    )
+    # Serves the "user's most recent entries" lookup behind the check.
+    op.create_index(
+        "ix_horoscope_entry_user_id_created_at",
+        "horoscope_entry",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_horoscope_entry_user_id_created_at", table_name="horoscope_entry")
+    op.drop_column("horoscope_entry", "reading_fingerprint")
@@ -0,0 +1,30 @@
+"""add (user_id, for_date, created_at, id) index to horoscope_entry
+
+Revision ID: e3f6a8d21c94
+Revises: b5e81f0c3a27
+Create Date: 2026-10-18 17:05:48.226410
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e3f6a8d21c94"
+down_revision = "b5e81f0c3a27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_horoscope_entry_user_id_for_date_created_at_id",
+        "horoscope_entry",
+        ["user_id", "for_date", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_horoscope_entry_user_id_for_date_created_at_id",
+        table_name="horoscope_entry",
+    )
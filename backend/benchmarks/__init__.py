@@ -0,0 +1 @@
+"""Offline benchmarks; run from the backend directory with `python -m`."""
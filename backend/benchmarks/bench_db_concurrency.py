@@ -0,0 +1,127 @@
+"""Concurrent-request throughput: sync CRUD in async handlers vs. AsyncSession.
+
+Simulates N concurrent requests that each run `get_user_by_id` against a
+database whose queries take `--query-ms` (emulated on SQLite with a
+`sleep_ms()` SQL function, or real latency on Postgres) and reports
+throughput plus the worst event-loop stall seen by a heartbeat task.
+
+    python -m benchmarks.bench_db_concurrency --requests 200 --query-ms 20
+    python -m benchmarks.bench_db_concurrency --url postgresql://...
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from horoscope_backend.core.database import to_async_url
+from horoscope_backend.crud import async_auth_crud, auth_crud
+from horoscope_backend.models.user import User
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def _install_sleep(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, _):
+        dbapi_conn.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+
+
+def _slow_query(url: str, query_ms: int):
+    if url.startswith("sqlite"):
+        return text(f"SELECT sleep_ms({query_ms})")
+    return text(f"SELECT pg_sleep({query_ms / 1000})")
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list) -> None:
+    interval = 0.005
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_sync(url: str, requests: int, query_ms: int):
+    engine = create_engine(url)
+    if url.startswith("sqlite"):
+        _install_sleep(engine)
+    Session = sessionmaker(bind=engine)
+    slow = _slow_query(url, query_ms)
+
+    async def handler(i: int) -> None:
+        db = Session()
+        try:
+            db.execute(slow)
+            auth_crud.get_user_by_id(db, 1 + i % 100)
+        finally:
+            db.close()
+
+    return await _measure(handler, requests, engine.dispose)
+
+
+async def run_async(url: str, requests: int, query_ms: int):
+    engine = create_async_engine(to_async_url(url))
+    if url.startswith("sqlite"):
+        _install_sleep(engine.sync_engine)
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    slow = _slow_query(url, query_ms)
+
+    async def handler(i: int) -> None:
+        async with Session() as db:
+            await db.execute(slow)
+            await async_auth_crud.get_user_by_id(db, 1 + i % 100)
+
+    async def dispose():
+        await engine.dispose()
+
+    return await _measure(handler, requests, dispose)
+
+
+async def _measure(handler, requests: int, dispose):
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    result = dispose()
+    if asyncio.iscoroutine(result):
+        await result
+    return requests / elapsed, max(lags, default=0.0)
+
+
+def seed(url: str) -> None:
+    engine = create_engine(url)
+    User.__table__.create(engine, checkfirst=True)
+    with sessionmaker(bind=engine)() as db:
+        if not db.query(User).first():
+            db.add_all(
+                User(username=f"u{i}", email=f"u{i}@x.io", hashed_password="x")
+                for i in range(100)
+            )
+            db.commit()
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="sync SQLAlchemy URL")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--query-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    seed(url)
+    for label, runner in (("sync Session", run_sync), ("AsyncSession", run_async)):
+        rps, lag = asyncio.run(runner(url, args.requests, args.query_ms))
+        print(
+            f"{label:>13}: {rps:8.1f} req/s, worst event-loop stall {lag*1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""GET /horoscopes page latency: OFFSET vs. keyset cursor at increasing depth.
+
+Seeds `--entries` horoscope entries spread over `--users` users (once; reruns
+reuse them) into a migrated Postgres database, then times fetching page N
+of the heaviest user's listing both ways with the CRUD the endpoint uses.
+`--explain` prints the plan of the deepest page for each.
+
+    alembic upgrade head
+    python -m benchmarks.bench_pagination --url postgresql://... \
+        --entries 5000000 --users 50
+"""
+
+import argparse
+import statistics
+import time
+from functools import partial
+
+from horoscope_backend.crud.horoscope_crud import list_horoscope_entries
+from horoscope_backend.models.horoscope_entry import HoroscopeEntry
+from horoscope_backend.models.user import User
+from horoscope_backend.utils.pagination import EntryCursor
+from sqlalchemy import create_engine, event, func, text
+from sqlalchemy.orm import Session, sessionmaker
+
+USER_PREFIX = "bench-pagination-"
+PAYLOAD = '{"headline": "Benchmark", "reading": "%s"}' % ("lorem ipsum " * 60)
+
+
+def seed(db: Session, entries: int, users: int) -> int:
+    """Make sure the benchmark users own `entries` rows; returns the id of
+    the first (and heaviest) one."""
+    ids = [
+        uid
+        for (uid,) in db.query(User.id)
+        .filter(User.username.like(USER_PREFIX + "%"))
+        .order_by(User.id)
+    ]
+    if len(ids) < users:
+        db.add_all(
+            User(
+                username=f"{USER_PREFIX}{i}",
+                email=f"{USER_PREFIX}{i}@example.com",
+                hashed_password="x",
+            )
+            for i in range(len(ids), users)
+        )
+        db.commit()
+        return seed(db, entries, users)
+
+    existing = (
+        db.query(func.count(HoroscopeEntry.id))
+        .filter(HoroscopeEntry.user_id.in_(ids))
+        .scalar()
+    )
+    batch = 500_000
+    for start in range(existing, entries, batch):
+        # Half of all rows go to the first user, the rest spread evenly; each
+        # user gets about three entries a day, newest last.
+        db.execute(
+            text(
+                """
+                INSERT INTO horoscope_entry (id, user_id, is_anonymous,
+                    zodiac_sign, for_date, variation, payload_json, created_at)
+                SELECT gen_random_uuid(),
+                       CASE WHEN g % 2 = 0 THEN :first
+                            ELSE (:ids)[1 + (g / 2) % :users] END,
+                       false, 'Leo', DATE '2000-01-01' + (g / (3 * :users)),
+                       g % 3, CAST(:payload AS jsonb),
+                       TIMESTAMP '2000-01-01' + g * INTERVAL '1 second'
+                FROM generate_series(:start, :stop - 1) AS g
+                """
+            ),
+            {
+                "first": ids[0],
+                "ids": ids,
+                "users": len(ids),
+                "payload": PAYLOAD,
+                "start": start,
+                "stop": min(start + batch, entries),
+            },
+        )
+        db.commit()
+        print(f"seeded {min(start + batch, entries)}/{entries} entries")
+    db.execute(text("ANALYZE horoscope_entry"))
+    db.commit()
+    return ids[0]
+
+
+def timed(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def explain(db: Session, fn) -> None:
+    """Print the plan of the last statement `fn` runs, as Postgres ran it."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = statements[-1]
+    cursor = db.connection().connection.cursor()
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+    for (line,) in cursor.fetchall():
+        print("   ", line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True, help="sync Postgres URL")
+    parser.add_argument("--entries", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000]
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    db = sessionmaker(bind=engine)()
+    user_id = seed(db, args.entries, args.users)
+    owned = (
+        db.query(func.count(HoroscopeEntry.id))
+        .filter(HoroscopeEntry.user_id == user_id)
+        .scalar()
+    )
+    print(f"user {user_id} owns {owned} entries, {args.limit} per page")
+    print(f"{'page':>7} {'offset ms':>10} {'cursor ms':>10}")
+
+    deepest = None
+    common = {
+        "user_id": user_id,
+        "from_date": None,
+        "to_date": None,
+        "limit": args.limit,
+    }
+    for page in args.pages:
+        offset = (page - 1) * args.limit
+        if offset >= owned:
+            break
+        after = None
+        if offset:
+            # The cursor a client would hold after reading the previous page.
+            (previous,) = list_horoscope_entries(
+                db, **{**common, "limit": 1}, offset=offset - 1
+            )
+            after = EntryCursor.decode(EntryCursor.after(previous).encode())
+        by_offset = partial(list_horoscope_entries, db, **common, offset=offset)
+        by_cursor = partial(list_horoscope_entries, db, **common, after=after)
+        print(
+            f"{page:7d} {timed(by_offset, args.repeats):10.2f} "
+            f"{timed(by_cursor, args.repeats):10.2f}"
+        )
+        db.expunge_all()
+        deepest = (page, by_offset, by_cursor)
+
+    if args.explain and deepest:
+        page, by_offset, by_cursor = deepest
+        print(f"offset plan, page {page}:")
+        explain(db, by_offset)
+        print(f"cursor plan, page {page}:")
+        explain(db, by_cursor)
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
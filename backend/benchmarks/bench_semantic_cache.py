@@ -0,0 +1,219 @@
+"""Semantic cache hit rate vs. similarity threshold on recorded traffic.
+
+Replays requests in order through the semantic cache's features and
+vector index, once per threshold. Exact repeats are counted separately:
+they are served by the exact cache before the semantic cache is asked.
+For each threshold it reports the share of requests the semantic cache
+would have served and how many of those hits reuse a reading from
+another date (none, as matches are scoped to the date; kept as a check). When the traffic records readings, it also reports the mean
+cosine similarity between each reused reading and the one the request
+actually got.
+
+    python -m benchmarks.bench_semantic_cache --url postgresql://... \
+        --embedding-model text-embedding-3-small
+    python -m benchmarks.bench_semantic_cache --traffic requests.jsonl
+    python -m benchmarks.bench_semantic_cache --provider fake --requests 500
+
+Traffic files hold one JSON object per line with `sign`, `for_date`, `tz`,
+`variation` and optionally `reading`.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from horoscope_backend.services.ai.factory import AIProviderFactory, ProviderType
+from horoscope_backend.services.ai.openai_client import OpenAIProviderConfig
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    ZODIAC_SIGNS,
+)
+from horoscope_backend.services.horoscope_ai_service.horoscope_cache import (
+    horoscope_cache_key,
+)
+from horoscope_backend.services.horoscope_ai_service.semantic_cache import (
+    match_group,
+    request_features,
+)
+from horoscope_backend.services.horoscope_ai_service.vector_index import (
+    NumpyVectorIndex,
+    normalize,
+)
+from sqlalchemy import create_engine, text
+
+EMBED_BATCH = 100
+
+
+@dataclass
+class Recorded:
+    sign: str
+    for_date: date
+    tz: str
+    variation: int
+    reading: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return horoscope_cache_key(
+            sign=self.sign, on_date=self.for_date, tz=self.tz, variation=self.variation
+        )
+
+
+def load_file(path: str) -> List[Recorded]:
+    with open(path, encoding="utf-8") as f:
+        return [
+            Recorded(
+                sign=row["sign"],
+                for_date=date.fromisoformat(row["for_date"]),
+                tz=row["tz"],
+                variation=int(row.get("variation", 0)),
+                reading=row.get("reading"),
+            )
+            for row in map(json.loads, filter(str.strip, f))
+        ]
+
+
+def load_db(url: str, limit: int) -> List[Recorded]:
+    engine = create_engine(url)
+    query = text(
+        """
+        SELECT e.zodiac_sign, e.for_date, COALESCE(c.timezone, 'Europe/Amsterdam'),
+               e.variation, e.payload_json
+        FROM horoscope_entry e LEFT JOIN user_config c ON c.user_id = e.user_id
+        ORDER BY e.created_at LIMIT :limit
+        """
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(query, {"limit": limit}).all()
+    engine.dispose()
+    return [
+        Recorded(sign, for_date, tz, variation or 0, (payload or {}).get("reading"))
+        for sign, for_date, tz, variation, payload in rows
+    ]
+
+
+def synthetic(n: int, seed: int = 0) -> List[Recorded]:
+    """Traffic skewed towards a few popular timezones over three days."""
+    rng = random.Random(seed)
+    zones = ["Europe/Amsterdam", "Europe/Berlin", "Europe/London", "America/New_York"]
+    zones += ["Asia/Tokyo", "Australia/Sydney", "America/Sao_Paulo", "Africa/Lagos"]
+    weights = [1 / (i + 1) for i in range(len(zones))]
+    start = date(2030, 1, 1)
+    return [
+        Recorded(
+            sign=rng.choice(ZODIAC_SIGNS),
+            for_date=start + timedelta(days=rng.randrange(3)),
+            tz=rng.choices(zones, weights)[0],
+            variation=rng.choices([0, 1, 2], [8, 2, 1])[0],
+        )
+        for _ in range(n)
+    ]
+
+
+async def embed_all(provider, texts: List[str]) -> np.ndarray:
+    vectors = []
+    for i in range(0, len(texts), EMBED_BATCH):
+        out = await provider.embed({"texts": texts[i : i + EMBED_BATCH]})
+        vectors.extend(normalize(v) for v in out["vectors"])
+    return np.stack(vectors)
+
+
+def replay(traffic: List[Recorded], vectors: np.ndarray, threshold: float):
+    index = NumpyVectorIndex(max_entries=len(traffic))
+    seen = set()
+    exact, hits = 0, []  # hits: (request, matched request)
+    for i, request in enumerate(traffic):
+        if request.key in seen:
+            exact += 1
+            continue
+        group = match_group(
+            sign=request.sign, on_date=request.for_date, variation=request.variation
+        )
+        match = index.search(vectors[i], group=group, k=1)
+        seen.add(request.key)  # a hit is cached under its own key as well
+        if match and match[0][1] >= threshold:
+            hits.append((i, int(match[0][0])))
+        else:
+            index.add(str(i), vectors[i], group)
+    return exact, hits
+
+
+async def run(args) -> None:
+    if args.traffic:
+        traffic = load_file(args.traffic)
+    elif args.url:
+        traffic = load_db(args.url, args.requests)
+    else:
+        traffic = synthetic(args.requests)
+    provider_type = ProviderType(args.provider)
+    config = None
+    if provider_type == ProviderType.OPENAI and args.embedding_model:
+        config = dataclasses.replace(
+            OpenAIProviderConfig.from_settings(), embedding_model=args.embedding_model
+        )
+    provider = AIProviderFactory.create_provider(provider_type, config=config)
+    try:
+        features = await embed_all(
+            provider,
+            [
+                request_features(
+                    sign=r.sign, on_date=r.for_date, tz=r.tz, variation=r.variation
+                )
+                for r in traffic
+            ],
+        )
+        with_reading = [i for i, r in enumerate(traffic) if r.reading]
+        readings = {}
+        if with_reading:
+            embedded = await embed_all(
+                provider, [traffic[i].reading for i in with_reading]
+            )
+            readings = dict(zip(with_reading, embedded))
+    finally:
+        await provider.aclose()
+
+    print(f"{len(traffic)} requests, provider {args.provider}")
+    print(
+        f"{'threshold':>9} {'exact':>7} {'semantic':>9} {'cross-day':>9} {'quality':>8}"
+    )
+    for threshold in args.thresholds:
+        exact, hits = replay(traffic, features, threshold)
+        cross_day = sum(traffic[i].for_date != traffic[j].for_date for i, j in hits)
+        scored = [
+            float(readings[i] @ readings[j])
+            for i, j in hits
+            if i in readings and j in readings
+        ]
+        quality = f"{np.mean(scored):8.3f}" if scored else f"{'n/a':>8}"
+        print(
+            f"{threshold:9.3f} {exact / len(traffic):7.1%} "
+            f"{len(hits) / len(traffic):9.1%} "
+            f"{cross_day / max(1, len(hits)):9.1%} {quality}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traffic", default=None, help="recorded requests (JSONL)")
+    parser.add_argument("--url", default=None, help="sync SQLAlchemy URL")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--provider", default="openai", choices=["openai", "fake"])
+    parser.add_argument(
+        "--embedding-model", default=None, help="defaults to OPENAI_EMBEDDING_MODEL"
+    )
+    parser.add_argument(
+        "--thresholds",
+        type=float,
+        nargs="+",
+        default=[0.85, 0.9, 0.93, 0.95, 0.97, 0.99],
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from .endpoints import auth, health, horoscopes, profile, usage
+from .endpoints import auth, health, horoscopes, metrics, profile, usage
 
 api_router = APIRouter()
 
@@ -12,3 +12,4 @@ api_router.include_router(profile.router, tags=["profile"])
 api_router.include_router(horoscopes.router, tags=["horoscopes"])
 api_router.include_router(usage.router, tags=["usage"])
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
+api_router.include_router(metrics.router, tags=["metrics"])
@@ -4,18 +4,18 @@ from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.config import settings
-from ....core.database import get_db
-from ....crud.auth_crud import (
+from ....core.database import get_async_db
+from ....crud.async_auth_crud import (
     authenticate_user,
     create_user,
     get_user_by_email,
+    get_user_by_id,
     get_user_by_username,
 )
-from ....crud.horoscope_crud import create_user_config
-from ....models.user import User
+from ....crud.async_horoscope_crud import create_user_config
 from ....services.auth.auth_deps import CurrentUser, get_current_user
 from ....services.auth.auth_service import create_access_token
 
@@ -52,21 +52,23 @@ class UserResponse(BaseModel):
 
 
 @router.post("/signup", response_model=UserResponse)
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new user account."""
-    if get_user_by_username(db, user_data.username):
+    if await get_user_by_username(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered",
         )
 
-    if get_user_by_email(db, user_data.email):
+    if await get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
 
-    user = create_user(db, user_data.username, user_data.email, user_data.password)
-    create_user_config(
+    user = await create_user(
+        db, user_data.username, user_data.email, user_data.password
+    )
+    await create_user_config(
         db,
         user_id=user.id,
         name=user_data.name or user.username,
@@ -83,8 +85,10 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.username, user_credentials.password)
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(
+        db, user_credentials.username, user_credentials.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,13 +110,20 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
-    if not current_user.is_authenticated:
+async def get_current_user_info(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user = (
+        await get_user_by_id(db, current_user.user_id)
+        if current_user.is_authenticated
+        else None
+    )
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication required"
         )
 
-    user = current_user.user
     return UserResponse(
         id=user.id, username=user.username, email=user.email, is_active=user.is_active
     )
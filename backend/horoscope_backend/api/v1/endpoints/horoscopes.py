@@ -1,6 +1,9 @@
-from dataclasses import asdict
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass, replace
 from datetime import date
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 from fastapi import (
     APIRouter,
@@ -10,29 +13,56 @@ from fastapi import (
     Path,
     Query,
     Request,
+    Response,
     status,
 )
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from zodiac_sign import get_zodiac_sign
 
-from ....core.database import get_db
-from ....crud.auth_crud import get_user_by_id
-from ....crud.horoscope_crud import (
+from ....core.config import settings
+from ....core.database import AsyncSessionLocal, get_async_db
+from ....core.metrics import metrics
+from ....crud.async_auth_crud import get_user_by_id
+from ....crud.async_horoscope_crud import (
     create_horoscope_entry,
     get_horoscope_entry_by_id,
     get_user_config_by_user_id,
     list_horoscope_entries,
+    list_horoscope_summaries,
+    list_recent_fingerprints,
 )
-from ....crud.usage_crud import get_usage_for_date, track_user_attempt
-from ....services.ai.openai_client import OpenAIProvider, OpenAIProviderConfig
+from ....crud.async_usage_crud import refund_credit, reserve_credit
+from ....services.ai.ai_provider_base import AIProvider, AIProviderOverloadedError
+from ....services.ai.registry import get_ai_provider
 from ....services.auth.auth_deps import (
     AuthResult,
     auth_with_separate_schemes,
     require_auth_separate_schemes,
 )
-from ....services.horoscope_ai_service.horoscope_ai_service import HoroscopeAIService
+from ....services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+    HoroscopeResult,
+)
+from ....services.horoscope_ai_service.horoscope_cache import (
+    HoroscopeCache,
+    get_horoscope_cache,
+)
+from ....services.horoscope_ai_service.semantic_cache import (
+    SemanticCache,
+    get_semantic_cache,
+)
 from ....utils.common import today_in_tz
+from ....utils.pagination import EntryCursor
+from ....utils.simhash import FingerprintSet, reading_fingerprint
+
+logger = logging.getLogger(__name__)
+
+variety_resamples = metrics.counter(
+    "horoscope_variety_resamples_total",
+    "Regenerations resampled because they nearly repeated a recent reading.",
+)
 
 router = APIRouter()
 
@@ -55,153 +85,367 @@ class HoroscopeDataOut(BaseModel):
     for_date: date
     variation: int | None = 0
     payload_json: Dict[str, Any]
+    prompt_version: Optional[str] = None
+
+
+class HoroscopeSummaryOut(BaseModel):
+    id: str
+    zodiac_sign: str
+    for_date: date
+    variation: int | None = 0
+    headline: Optional[str] = None
+
+
+# "overloaded": shed before reaching the model; the credit is refunded and
+# the request can be retried shortly.
+EntryStatus = Literal["success", "insufficient_credits", "error", "overloaded"]
 
 
 class HoroscopeEntryOut(BaseModel):
     horoscope_data: Optional[HoroscopeDataOut] = None
-    status: Literal["success", "insufficient_credits", "error"] = "success"
+    status: EntryStatus = "success"
 
 
-@router.post("/horoscopes", response_model=HoroscopeEntryOut)
-async def create_horoscope(
-    request: Request,
-    payload: HoroscopeCreate = Body(...),
-    auth: AuthResult = Depends(auth_with_separate_schemes),
-    db: Session = Depends(get_db),
-):
+@dataclass
+class GenerationContext:
+    name: Optional[str]
+    dob: date
+    tz: str
+    for_date: date
+    variation: int
+    user_id: Optional[int]
+    is_anonymous: bool
+    ip: Optional[str]
+
+
+async def _resolve_generation_context(
+    request: Request, payload: HoroscopeCreate, auth: AuthResult, db: AsyncSession
+) -> GenerationContext:
     if auth.auth_type == "user":
-        cfg = get_user_config_by_user_id(db, auth.user_id)
+        cfg = await get_user_config_by_user_id(db, auth.user_id)
         if not cfg:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User configuration required",
             )
-        name = payload.name or cfg.name
-        dob = payload.dob or cfg.dob
         tz = payload.timezone or cfg.timezone
+        return GenerationContext(
+            name=payload.name or cfg.name,
+            dob=payload.dob or cfg.dob,
+            tz=tz,
+            for_date=payload.for_date or today_in_tz(tz),
+            variation=payload.variation or 0,
+            user_id=auth.user_id,
+            is_anonymous=False,
+            ip=None,
+        )
+
+    if not payload.dob or not payload.timezone or not payload.name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All fields are required for anonymous user",
+        )
+    return GenerationContext(
+        name=payload.name,
+        dob=payload.dob,
+        tz=payload.timezone,
+        for_date=payload.for_date or today_in_tz(payload.timezone),
+        variation=payload.variation or 0,
+        user_id=None,
+        is_anonymous=True,
+        ip=request.client.host,
+    )
 
-        is_anonymous = False
-        user_id = auth.user_id
 
-        for_d = payload.for_date or today_in_tz(tz)
-        ip = None
+async def _generate(
+    service: HoroscopeAIService, ctx: GenerationContext
+) -> HoroscopeResult:
+    return await service.generate_horoscope(
+        name=ctx.name,
+        dob=ctx.dob,
+        tz=ctx.tz,
+        on_date=ctx.for_date,
+        variation=ctx.variation,
+        strict=False,
+    )
 
-        usage = get_usage_for_date(db, ip=ip, for_date=today_in_tz(tz), user_id=user_id)
-        if usage and usage.attempts >= usage.credits_remaining:
-            return HoroscopeEntryOut(
-                status="insufficient_credits",
-            )
-    else:
-        is_anonymous = True
-        user_id = None
-        ip = request.client.host
-        name = payload.name
-        dob = payload.dob
-        tz = payload.timezone
-        for_d = payload.for_date or today_in_tz(tz)
-
-        if not dob or not tz or not name:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="All fields are required for anonymous user",
-            )
 
-        usage = get_usage_for_date(db, ip=ip, for_date=today_in_tz(tz), user_id=user_id)
-        if usage and usage.attempts >= usage.credits_remaining:
-            return HoroscopeEntryOut(
-                status="insufficient_credits",
-            )
+async def _generate_distinct(
+    db: AsyncSession, service: HoroscopeAIService, ctx: GenerationContext
+) -> Tuple[HoroscopeResult, GenerationContext]:
+    """Generate a reading; a regeneration that nearly repeats one of the
+    user's recent readings is resampled with the next variation."""
+    result = await _generate(service, ctx)
+    return await _resample_if_repeated(db, service, ctx, result)
 
-        provider = OpenAIProvider()
 
-    provider = OpenAIProvider()
-    service = HoroscopeAIService(provider=provider, default_tz=tz)
-    result = await service.generate_horoscope(
-        name=name,
-        dob=dob,
-        tz=tz,
-        on_date=for_d,
-        variation=payload.variation or 0,
-        strict=False,
+async def _resample_if_repeated(
+    db: AsyncSession,
+    service: HoroscopeAIService,
+    ctx: GenerationContext,
+    result: HoroscopeResult,
+) -> Tuple[HoroscopeResult, GenerationContext]:
+    """Regenerate `result` with the next variation, up to
+    horoscope_variety_max_resamples times, while it nearly repeats one of
+    the user's recent readings. Only regenerations are checked."""
+    if not ctx.user_id or not ctx.variation:
+        return result, ctx
+    recent = FingerprintSet(
+        await list_recent_fingerprints(
+            db, user_id=ctx.user_id, limit=settings.horoscope_variety_window
+        ),
+        max_distance=settings.horoscope_variety_max_distance,
     )
-    sign = get_zodiac_sign(dob.month, dob.day)
-    entry = create_horoscope_entry(
+    for _ in range(settings.horoscope_variety_max_resamples):
+        if reading_fingerprint(asdict(result)) not in recent:
+            break
+        variety_resamples.inc()
+        ctx = replace(ctx, variation=ctx.variation + 1)
+        result = await _generate(service, ctx)
+    return result, ctx
+
+
+async def _save_entry(db: AsyncSession, ctx: GenerationContext, result):
+    return await create_horoscope_entry(
         db,
-        user_id=user_id,
-        is_anonymous=is_anonymous,
-        name=name if is_anonymous else None,
-        dob=dob if is_anonymous else None,
-        zodiac_sign=sign,
-        for_date=for_d,
-        variation=payload.variation or 0,
+        user_id=ctx.user_id,
+        is_anonymous=ctx.is_anonymous,
+        name=ctx.name if ctx.is_anonymous else None,
+        dob=ctx.dob if ctx.is_anonymous else None,
+        zodiac_sign=get_zodiac_sign(ctx.dob),
+        for_date=ctx.for_date,
+        variation=ctx.variation,
         payload_json=asdict(result),
+        prompt_version=result.prompt_version,
     )
 
-    track_user_attempt(
-        db, user_id=user_id, for_date=payload.for_date or today_in_tz(tz), ip=ip
+
+def _to_data_out(row) -> HoroscopeDataOut:
+    return HoroscopeDataOut(
+        id=str(row.id),
+        user_id=row.user_id,
+        is_anonymous=row.is_anonymous,
+        name=row.name,
+        dob=row.dob,
+        zodiac_sign=row.zodiac_sign,
+        for_date=row.for_date,
+        variation=row.variation,
+        payload_json=row.payload_json,
+        prompt_version=row.prompt_version,
     )
 
-    return HoroscopeEntryOut(
-        status="success",
-        horoscope_data=HoroscopeDataOut(
-            id=str(entry.id),
-            user_id=entry.user_id,
-            is_anonymous=entry.is_anonymous,
-            name=entry.name,
-            dob=entry.dob,
-            zodiac_sign=entry.zodiac_sign,
-            for_date=entry.for_date,
-            variation=entry.variation,
-            payload_json=entry.payload_json,
-        ),
+
+def _to_summary_out(row) -> HoroscopeSummaryOut:
+    return HoroscopeSummaryOut(
+        id=str(row.id),
+        zodiac_sign=row.zodiac_sign,
+        for_date=row.for_date,
+        variation=row.variation,
+        headline=row.headline,
+    )
+
+
+@router.post("/horoscopes", response_model=HoroscopeEntryOut)
+async def create_horoscope(
+    request: Request,
+    payload: HoroscopeCreate = Body(...),
+    auth: AuthResult = Depends(auth_with_separate_schemes),
+    db: AsyncSession = Depends(get_async_db),
+    provider: AIProvider = Depends(get_ai_provider),
+    cache: Optional[HoroscopeCache] = Depends(get_horoscope_cache),
+    semantic_cache: Optional[SemanticCache] = Depends(get_semantic_cache),
+):
+    ctx = await _resolve_generation_context(request, payload, auth, db)
+
+    reservation = await reserve_credit(
+        db, for_date=today_in_tz(ctx.tz), user_id=ctx.user_id, ip=ctx.ip
+    )
+    if reservation is None:
+        return HoroscopeEntryOut(
+            status="insufficient_credits",
+        )
+
+    try:
+        service = HoroscopeAIService(
+            provider=provider,
+            default_tz=ctx.tz,
+            cache=cache,
+            semantic_cache=semantic_cache,
+        )
+        result, ctx = await _generate_distinct(db, service, ctx)
+        entry = await _save_entry(db, ctx, result)
+    except AIProviderOverloadedError:
+        logger.warning("Horoscope generation shed under load; refunding credit")
+        await db.rollback()
+        await refund_credit(db, reservation)
+        return HoroscopeEntryOut(status="overloaded")
+    except Exception:
+        logger.exception("Horoscope generation failed; refunding credit")
+        await db.rollback()
+        await refund_credit(db, reservation)
+        return HoroscopeEntryOut(status="error")
+
+    return HoroscopeEntryOut(status="success", horoscope_data=_to_data_out(entry))
+
+
+async def _refund_detached(reservation) -> None:
+    async with AsyncSessionLocal() as db:
+        await refund_credit(db, reservation)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/horoscopes/stream")
+async def create_horoscope_stream(
+    request: Request,
+    payload: HoroscopeCreate = Body(...),
+    auth: AuthResult = Depends(auth_with_separate_schemes),
+    db: AsyncSession = Depends(get_async_db),
+    provider: AIProvider = Depends(get_ai_provider),
+    cache: Optional[HoroscopeCache] = Depends(get_horoscope_cache),
+    semantic_cache: Optional[SemanticCache] = Depends(get_semantic_cache),
+):
+    """Server-sent events version of POST /horoscopes.
+
+    Emits `delta` events with model output as it is generated, a `field`
+    event as each reading field completes, and ends with one `result`
+    event shaped like the POST /horoscopes response. A regeneration that
+    repeats a recent reading is resampled as in POST /horoscopes, so its
+    `result` may differ from the streamed text.
+    """
+    ctx = await _resolve_generation_context(request, payload, auth, db)
+    reservation = await reserve_credit(
+        db, for_date=today_in_tz(ctx.tz), user_id=ctx.user_id, ip=ctx.ip
+    )
+    service = HoroscopeAIService(
+        provider=provider,
+        default_tz=ctx.tz,
+        cache=cache,
+        semantic_cache=semantic_cache,
+    )
+
+    async def events():
+        if reservation is None:
+            out = HoroscopeEntryOut(status="insufficient_credits")
+            yield _sse("result", out.model_dump(mode="json"))
+            return
+
+        # The request's session is closed once the response starts, so the
+        # stream persists through a session of its own.
+        entry = None
+        try:
+            async with AsyncSessionLocal() as stream_db:
+                async for event in service.generate_horoscope_stream(
+                    name=ctx.name,
+                    dob=ctx.dob,
+                    tz=ctx.tz,
+                    on_date=ctx.for_date,
+                    variation=ctx.variation,
+                ):
+                    if event.type == "delta":
+                        yield _sse("delta", {"text": event.data})
+                    elif event.type == "field":
+                        field, value = event.data
+                        yield _sse("field", {"key": field, "value": value})
+                    else:
+                        # A repeat is regenerated whole (not streamed); the
+                        # result event then carries the resampled reading.
+                        result, saved_ctx = await _resample_if_repeated(
+                            stream_db, service, ctx, event.data
+                        )
+                        entry = await _save_entry(stream_db, saved_ctx, result)
+        except AIProviderOverloadedError:
+            logger.warning("Horoscope streaming shed under load; refunding credit")
+            out = HoroscopeEntryOut(status="overloaded")
+        except Exception:
+            logger.exception("Horoscope streaming failed; refunding credit")
+            out = HoroscopeEntryOut(status="error")
+        else:
+            out = HoroscopeEntryOut(
+                status="success", horoscope_data=_to_data_out(entry)
+            )
+        finally:
+            # Also runs when the client disconnects (CancelledError or
+            # GeneratorExit); shielded so a second cancellation can't skip it.
+            if entry is None:
+                await asyncio.shield(_refund_detached(reservation))
+        yield _sse("result", out.model_dump(mode="json"))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@router.get("/horoscopes", response_model=List[HoroscopeDataOut])
+@router.get(
+    "/horoscopes",
+    response_model=Union[List[HoroscopeDataOut], List[HoroscopeSummaryOut]],
+)
 async def list_horoscopes(
+    response: Response,
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    fields: Literal["full", "summary"] = Query("full"),
     auth: AuthResult = Depends(require_auth_separate_schemes),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    """Entries newest first. A full page sets an `X-Next-Cursor` header; pass
+    it back as `cursor` to fetch the next page, which stays fast at any
+    depth, unlike `offset`.
+
+    `fields=summary` lists only id, sign, date, variation and headline;
+    fetch a reading's full payload from GET /horoscopes/{id}.
+    """
     if not auth.user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only available for authenticated users",
         )
-    rows = list_horoscope_entries(
+    after = None
+    if cursor:
+        if offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or offset, not both",
+            )
+        try:
+            after = EntryCursor.decode(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+    list_rows = (
+        list_horoscope_summaries if fields == "summary" else list_horoscope_entries
+    )
+    rows = await list_rows(
         db,
         user_id=auth.user_id,
         from_date=from_date,
         to_date=to_date,
         limit=limit,
         offset=offset,
+        after=after,
     )
-    return [
-        HoroscopeDataOut(
-            id=str(r.id),
-            user_id=r.user_id,
-            is_anonymous=r.is_anonymous,
-            name=r.name,
-            dob=r.dob,
-            zodiac_sign=r.zodiac_sign,
-            for_date=r.for_date,
-            variation=r.variation,
-            payload_json=r.payload_json,
-        )
-        for r in rows
-    ]
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = EntryCursor.after(rows[-1]).encode()
+    if fields == "summary":
+        return [_to_summary_out(r) for r in rows]
+    return [_to_data_out(r) for r in rows]
 
 
 @router.get("/horoscopes/{id}", response_model=HoroscopeDataOut)
 async def get_horoscope(
     id: str = Path(...),
     auth: AuthResult = Depends(require_auth_separate_schemes),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    row = get_horoscope_entry_by_id(db, id)
+    row = await get_horoscope_entry_by_id(db, id)
     if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Horoscope entry not found"
@@ -211,14 +455,4 @@ async def get_horoscope(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access to this entry is forbidden",
         )
-    return HoroscopeDataOut(
-        id=str(row.id),
-        user_id=row.user_id,
-        is_anonymous=row.is_anonymous,
-        name=row.name,
-        dob=row.dob,
-        zodiac_sign=row.zodiac_sign,
-        for_date=row.for_date,
-        variation=row.variation,
-        payload_json=row.payload_json,
-    )
+    return _to_data_out(row)
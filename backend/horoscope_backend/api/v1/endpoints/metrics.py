@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from ....core.metrics import metrics
+from ....services.auth.auth_deps import AuthResult, require_auth_separate_schemes
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(auth: AuthResult = Depends(require_auth_separate_schemes)):
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
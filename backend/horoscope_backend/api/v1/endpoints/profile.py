@@ -3,10 +3,10 @@ from typing import Optional
 
 from fastapi import APIRouter, Body, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.database import get_db
-from ....crud.horoscope_crud import get_user_config_by_user_id, update_user_config
+from ....core.database import get_async_db
+from ....crud.async_horoscope_crud import get_user_config_by_user_id, update_user_config
 from ....services.auth.auth_deps import AuthResult, require_auth_separate_schemes
 
 router = APIRouter()
@@ -29,9 +29,9 @@ class ProfileUpdate(BaseModel):
 @router.get("/profile", response_model=ProfileOut)
 async def get_profile(
     auth: AuthResult = Depends(require_auth_separate_schemes),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    cfg = get_user_config_by_user_id(db, auth.user_id)
+    cfg = await get_user_config_by_user_id(db, auth.user_id)
     if not cfg:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found"
@@ -48,9 +48,9 @@ async def get_profile(
 async def update_profile(
     payload: ProfileUpdate = Body(...),
     auth: AuthResult = Depends(require_auth_separate_schemes),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    cfg = update_user_config(
+    cfg = await update_user_config(
         db,
         user_id=auth.user_id,
         name=payload.name,
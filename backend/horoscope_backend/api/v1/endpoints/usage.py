@@ -3,11 +3,11 @@ from typing import Union
 
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ....core.database import get_db
-from ....crud.horoscope_crud import get_user_config_by_user_id
-from ....crud.usage_crud import get_usage_for_date
+from ....core.database import get_async_db
+from ....crud.async_horoscope_crud import get_user_config_by_user_id
+from ....crud.async_usage_crud import get_usage_for_date
 from ....models.usage import Usage
 from ....services.auth.auth_deps import AuthResult, require_auth_separate_schemes
 from ....utils.common import today_in_tz
@@ -28,10 +28,10 @@ class UsageOut(BaseModel):
 async def get_usage(
     request: Request,
     auth: AuthResult = Depends(require_auth_separate_schemes),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if auth.user_id:
-        cfg = get_user_config_by_user_id(db, auth.user_id)
+        cfg = await get_user_config_by_user_id(db, auth.user_id)
         tz = cfg.timezone if cfg else "UTC"
         user_id = auth.user_id
         ip = None
@@ -40,7 +40,7 @@ async def get_usage(
         user_id = None
         ip = request.client.host
 
-    usage = get_usage_for_date(
+    usage = await get_usage_for_date(
         db, ip=ip or "", for_date=today_in_tz(tz), user_id=user_id
     )
 
@@ -1,17 +1,150 @@
 """Database configuration and session management."""
 
-from sqlalchemy import create_engine
+import time
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from .config import settings
+from .metrics import metrics
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection.",
+)
+checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that gave up after pool_timeout.",
+)
+checked_out = metrics.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool."
+)
+overflow = metrics.gauge(
+    "db_pool_overflow", "Connections open beyond pool_size (negative when idle)."
+)
+pool_size = metrics.gauge("db_pool_size", "Configured number of pooled connections.")
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching asyncio driver."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+class _InstrumentedPoolMixin:
+    metrics_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            checkout_timeouts.inc(engine=self.metrics_label)
+            raise
+        finally:
+            checkout_wait.observe(
+                time.perf_counter() - start, engine=self.metrics_label
+            )
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _engine_options(url: str, *, is_async: bool) -> Dict[str, Any]:
+    if not url.startswith("postgresql"):
+        return {}
+
+    connect_args: Dict[str, Any] = {}
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+
+    if settings.db_pgbouncer_mode:
+        # PgBouncer (transaction pooling) owns the pool and may hand each
+        # transaction to a different server connection, so keep no client
+        # pool and no server-side prepared statements.
+        options["poolclass"] = NullPool
+        if is_async:
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+        if settings.db_statement_timeout_ms:
+            timeout = str(settings.db_statement_timeout_ms)
+            if is_async:
+                connect_args["server_settings"] = {"statement_timeout": timeout}
+            else:
+                connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def _apply_transaction_statement_timeout(engine) -> None:
+    """PgBouncer rejects startup options, so set the timeout per transaction."""
+
+    @event.listens_for(engine, "begin")
+    def _set_timeout(conn):
+        conn.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {int(settings.db_statement_timeout_ms)}"
+        )
+
+
+def _register_pool_gauges(engine, label: str) -> None:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+    checked_out.set_function(pool.checkedout, engine=label)
+    overflow.set_function(pool.overflow, engine=label)
+    pool_size.set_function(pool.size, engine=label)
+
 
 # Create database engine
-engine = create_engine(settings.database_url)
+engine = create_engine(
+    settings.database_url, **_engine_options(settings.database_url, is_async=False)
+)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API; the sync engine is kept for scripts and Alembic
+async_database_url = settings.async_database_url or to_async_url(settings.database_url)
+async_engine = create_async_engine(
+    async_database_url, **_engine_options(async_database_url, is_async=True)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if settings.db_pgbouncer_mode and settings.db_statement_timeout_ms:
+    _apply_transaction_statement_timeout(engine)
+    _apply_transaction_statement_timeout(async_engine.sync_engine)
+
+_register_pool_gauges(engine, "sync")
+_register_pool_gauges(async_engine.sync_engine, "async")
+
 # Create base class for models
 Base = declarative_base()
 
@@ -23,3 +156,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Get async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
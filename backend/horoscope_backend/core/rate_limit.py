@@ -0,0 +1,253 @@
+"""Token-bucket rate limiting as a pure ASGI middleware.
+
+Requests are keyed by API key, authenticated user id or client IP and are
+rejected with 429 before routing, so floods never reach the database or
+the AI provider.
+"""
+
+import hashlib
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from .config import settings
+from .metrics import metrics
+
+rejections = metrics.counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter."
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float  # tokens refilled per second
+    burst: int  # bucket capacity
+    name: Optional[str] = None  # routes with the same name share a bucket
+
+    @classmethod
+    def per_minute(
+        cls, requests: int, burst: Optional[int] = None, name: Optional[str] = None
+    ) -> "RateLimit":
+        return cls(rate=requests / 60.0, burst=burst or max(1, requests), name=name)
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit) -> Decision:
+        ...
+
+    async def aclose(self) -> None:
+        return None
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets; the least recently used are evicted past
+    `max_keys` (an evicted bucket simply starts full again)."""
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> Decision:
+        now = self._clock()
+        tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+        tokens = min(float(limit.burst), tokens + (now - updated) * limit.rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            decision = Decision(True, tokens, 0.0)
+        else:
+            decision = Decision(False, tokens, (1.0 - tokens) / limit.rate)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return decision
+
+
+# Bucket state lives in a hash; the server clock is used so app servers
+# with skewed clocks still share one consistent bucket.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared buckets for any client exposing redis-py's async `eval`."""
+
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimitBackend":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "A shared rate limiter requires the `redis` package."
+            ) from e
+        return cls(redis_asyncio.from_url(url))
+
+    async def acquire(self, key: str, limit: RateLimit) -> Decision:
+        allowed, remaining, retry = await self.client.eval(
+            TOKEN_BUCKET_LUA, 1, self.prefix + key, limit.rate, limit.burst
+        )
+        return Decision(bool(int(allowed)), float(remaining), float(retry))
+
+    async def aclose(self) -> None:
+        close = getattr(self.client, "aclose", None) or getattr(
+            self.client, "close", None
+        )
+        if close is not None:
+            await close()
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16]
+
+
+def default_identity(scope: Dict[str, Any]) -> str:
+    """API key, then verified user id, then client IP."""
+    from ..services.auth.auth_deps import verify_api_key, verify_token_cached
+
+    # Unverified keys would let a client mint a fresh bucket per request.
+    api_key = _header(scope, b"x-api-key")
+    if api_key and verify_api_key(api_key):
+        return f"key:{_hash(api_key)}"
+
+    authorization = _header(scope, b"authorization")
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization[7:]
+        claims = verify_token_cached(token)
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+        if verify_api_key(token):
+            return f"key:{_hash(token)}"
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app,
+        *,
+        backend: RateLimitBackend,
+        default_limit: RateLimit,
+        route_limits: Optional[Dict[Tuple[str, str], RateLimit]] = None,
+        identity=default_identity,
+    ):
+        self.app = app
+        self.backend = backend
+        self.default_limit = default_limit
+        self.route_limits = route_limits or {}
+        self.identity = identity
+
+    def _limit_for(self, method: str, path: str) -> Tuple[str, RateLimit]:
+        route = (method, path.rstrip("/") or "/")
+        limit = self.route_limits.get(route)
+        if limit is None:
+            return "default", self.default_limit
+        return limit.name or f"{route[0]} {route[1]}", limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        route, limit = self._limit_for(scope["method"], scope["path"])
+        decision = await self.backend.acquire(f"{self.identity(scope)}|{route}", limit)
+        limit_headers = [
+            (b"x-ratelimit-limit", str(limit.burst).encode()),
+            (b"x-ratelimit-remaining", str(int(decision.remaining)).encode()),
+        ]
+
+        if not decision.allowed:
+            rejections.inc(route=route)
+            body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (
+                            b"retry-after",
+                            str(max(1, math.ceil(decision.retry_after))).encode(),
+                        ),
+                    ]
+                    + limit_headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def rate_limit_options() -> Dict[str, Any]:
+    """Middleware options from settings."""
+    prefix = settings.api_v1_prefix
+    auth_limit = RateLimit.per_minute(settings.rate_limit_auth_per_minute)
+    horoscope_limit = RateLimit.per_minute(
+        settings.rate_limit_horoscopes_per_minute, name="horoscopes"
+    )
+    if settings.rate_limit_redis_url:
+        backend = RedisRateLimitBackend.from_url(settings.rate_limit_redis_url)
+    else:
+        backend = InMemoryRateLimitBackend()
+    return {
+        "backend": backend,
+        "default_limit": RateLimit.per_minute(settings.rate_limit_default_per_minute),
+        "route_limits": {
+            ("POST", f"{prefix}/horoscopes"): horoscope_limit,
+            ("POST", f"{prefix}/horoscopes/stream"): horoscope_limit,
+            ("POST", f"{prefix}/auth/login"): auth_limit,
+            ("POST", f"{prefix}/auth/signup"): auth_limit,
+        },
+    }
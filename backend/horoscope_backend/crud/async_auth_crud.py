@@ -0,0 +1,50 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.user import User
+from ..services.auth.password_hasher import password_hasher
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+
+async def create_user(
+    db: AsyncSession, username: str, email: str, password: str
+) -> User:
+    hashed_password = await password_hasher.hash(password)
+    user = User(username=username, email=email, hashed_password=hashed_password)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def authenticate_user(
+    db: AsyncSession, username: str, password: str
+) -> Optional[User]:
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    valid, new_hash = await password_hasher.verify_and_update(
+        password, user.hashed_password
+    )
+    if not valid:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
@@ -0,0 +1,207 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Row, Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.horoscope_entry import HoroscopeEntry
+from ..models.user_config import UserConfig
+from ..utils.pagination import EntryCursor
+from ..utils.simhash import reading_fingerprint
+
+
+async def get_user_config_by_user_id(
+    db: AsyncSession, user_id: int
+) -> Optional[UserConfig]:
+    result = await db.execute(select(UserConfig).where(UserConfig.user_id == user_id))
+    return result.scalars().first()
+
+
+async def create_user_config(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    name: str,
+    dob: date,
+    timezone: str = "Europe/Amsterdam",
+    daily_email_enabled: bool = False,
+) -> UserConfig:
+    cfg = UserConfig(
+        user_id=user_id,
+        name=name,
+        dob=dob,
+        timezone=timezone,
+        daily_email_enabled=daily_email_enabled,
+    )
+    db.add(cfg)
+    await db.commit()
+    await db.refresh(cfg)
+    return cfg
+
+
+async def create_horoscope_entry(
+    db: AsyncSession,
+    *,
+    user_id: Optional[int],
+    is_anonymous: bool,
+    name: Optional[str],
+    dob: Optional[date],
+    zodiac_sign: str,
+    for_date: date,
+    variation: int,
+    payload_json: dict,
+    prompt_version: Optional[str] = None,
+) -> HoroscopeEntry:
+    entry = HoroscopeEntry(
+        user_id=user_id,
+        is_anonymous=is_anonymous,
+        name=name,
+        dob=dob,
+        zodiac_sign=zodiac_sign,
+        for_date=for_date,
+        variation=variation,
+        payload_json=payload_json,
+        prompt_version=prompt_version,
+        reading_fingerprint=reading_fingerprint(payload_json),
+    )
+    db.add(entry)
+    await db.commit()
+    await db.refresh(entry)
+    return entry
+
+
+def _listing_query(
+    q: Select,
+    *,
+    user_id: int,
+    from_date: Optional[date],
+    to_date: Optional[date],
+    limit: int,
+    offset: int,
+    after: Optional[EntryCursor],
+) -> Select:
+    q = q.where(HoroscopeEntry.user_id == user_id)
+    if from_date:
+        q = q.where(HoroscopeEntry.for_date >= from_date)
+    if to_date:
+        q = q.where(HoroscopeEntry.for_date <= to_date)
+    if after:
+        q = q.where(
+            tuple_(
+                HoroscopeEntry.for_date, HoroscopeEntry.created_at, HoroscopeEntry.id
+            )
+            < (after.for_date, after.created_at, after.id)
+        )
+    q = q.order_by(
+        HoroscopeEntry.for_date.desc(),
+        HoroscopeEntry.created_at.desc(),
+        HoroscopeEntry.id.desc(),
+    )
+    return q.offset(offset).limit(limit)
+
+
+async def list_horoscope_entries(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    from_date: Optional[date],
+    to_date: Optional[date],
+    limit: int,
+    offset: int = 0,
+    after: Optional[EntryCursor] = None,
+) -> List[HoroscopeEntry]:
+    q = _listing_query(
+        select(HoroscopeEntry),
+        user_id=user_id,
+        from_date=from_date,
+        to_date=to_date,
+        limit=limit,
+        offset=offset,
+        after=after,
+    )
+    result = await db.execute(q)
+    return list(result.scalars().all())
+
+
+async def list_horoscope_summaries(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    from_date: Optional[date],
+    to_date: Optional[date],
+    limit: int,
+    offset: int = 0,
+    after: Optional[EntryCursor] = None,
+) -> List[Row]:
+    """Like list_horoscope_entries, as plain rows of the listing columns.
+
+    The headline is extracted by the database, so the rest of the payload
+    is never sent over the wire or decoded.
+    """
+    q = _listing_query(
+        select(
+            HoroscopeEntry.id,
+            HoroscopeEntry.for_date,
+            HoroscopeEntry.created_at,
+            HoroscopeEntry.zodiac_sign,
+            HoroscopeEntry.variation,
+            HoroscopeEntry.payload_json["headline"].astext.label("headline"),
+        ),
+        user_id=user_id,
+        from_date=from_date,
+        to_date=to_date,
+        limit=limit,
+        offset=offset,
+        after=after,
+    )
+    result = await db.execute(q)
+    return list(result.all())
+
+
+async def get_horoscope_entry_by_id(
+    db: AsyncSession, entry_id
+) -> Optional[HoroscopeEntry]:
+    result = await db.execute(
+        select(HoroscopeEntry).where(HoroscopeEntry.id == entry_id)
+    )
+    return result.scalars().first()
+
+
+async def update_user_config(
+    db: AsyncSession,
+    *,
+    user_id: int,
+    name: Optional[str] = None,
+    dob: Optional[date] = None,
+    timezone: Optional[str] = None,
+    daily_email_enabled: Optional[bool] = None,
+) -> Optional[UserConfig]:
+    cfg = await get_user_config_by_user_id(db, user_id)
+    if not cfg:
+        return None
+    if name is not None:
+        cfg.name = name
+    if dob is not None:
+        cfg.dob = dob
+    if timezone is not None:
+        cfg.timezone = timezone
+    if daily_email_enabled is not None:
+        cfg.daily_email_enabled = daily_email_enabled
+    await db.commit()
+    await db.refresh(cfg)
+    return cfg
+
+
+async def list_recent_fingerprints(
+    db: AsyncSession, *, user_id: int, limit: int
+) -> List[int]:
+    result = await db.execute(
+        select(HoroscopeEntry.reading_fingerprint)
+        .where(
+            HoroscopeEntry.user_id == user_id,
+            HoroscopeEntry.reading_fingerprint.is_not(None),
+        )
+        .order_by(HoroscopeEntry.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
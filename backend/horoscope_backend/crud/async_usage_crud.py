@@ -0,0 +1,100 @@
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.usage import Usage, UsageKindEnum
+
+
+@dataclass(frozen=True)
+class CreditReservation:
+    usage_id: uuid.UUID
+    attempts: int
+    credits_remaining: int
+
+
+async def reserve_credit(
+    db: AsyncSession,
+    *,
+    for_date: date,
+    user_id: int | None = None,
+    ip: str | None = None,
+) -> Optional[CreditReservation]:
+    """Atomically take one credit in a single round trip.
+
+    Creates the usage row on first use, otherwise bumps `attempts` only
+    while it is below `credits_remaining`. Returns None when no credit is
+    left. The reservation is committed immediately so no transaction stays
+    open while the horoscope is generated; undo it with `refund_credit`.
+    """
+    if user_id:
+        usage_kind = UsageKindEnum.REGEN_CREDITS
+        initial_credits = settings.registered_user_init_credits
+        constraint = "uq_usage_tracking_user_kind"
+    else:
+        usage_kind = UsageKindEnum.ANON_ATTEMPTS
+        initial_credits = settings.anon_user_init_credit
+        constraint = "uq_usage_tracking_anon_per_day"
+    if initial_credits <= 0:
+        return None
+
+    now = datetime.utcnow()
+    stmt = (
+        insert(Usage)
+        .values(
+            id=uuid.uuid4(),
+            kind=usage_kind,
+            user_id=user_id,
+            ip=ip,
+            for_date=for_date,
+            attempts=1,
+            credits_remaining=initial_credits,
+            created_at=now,
+            updated_at=now,
+        )
+        .on_conflict_do_update(
+            constraint=constraint,
+            set_={"attempts": Usage.attempts + 1, "updated_at": now},
+            where=Usage.attempts < Usage.credits_remaining,
+        )
+        .returning(Usage.id, Usage.attempts, Usage.credits_remaining)
+    )
+    row = (await db.execute(stmt)).first()
+    await db.commit()
+    if row is None:
+        return None
+    return CreditReservation(
+        usage_id=row.id, attempts=row.attempts, credits_remaining=row.credits_remaining
+    )
+
+
+async def refund_credit(db: AsyncSession, reservation: CreditReservation) -> None:
+    await db.execute(
+        update(Usage)
+        .where(Usage.id == reservation.usage_id, Usage.attempts > 0)
+        .values(attempts=Usage.attempts - 1, updated_at=datetime.utcnow())
+    )
+    await db.commit()
+
+
+async def get_usage_for_date(
+    db: AsyncSession, *, ip: str, for_date: date, user_id
+) -> Usage | None:
+    # A registered user's credits are one lifetime row per (user_id, kind);
+    # its for_date is only the day it was created.
+    if user_id:
+        q = select(Usage).where(
+            Usage.user_id == user_id, Usage.kind == UsageKindEnum.REGEN_CREDITS
+        )
+    else:
+        q = select(Usage).where(
+            Usage.ip == ip,
+            Usage.kind == UsageKindEnum.ANON_ATTEMPTS,
+            Usage.for_date == for_date,
+        )
+    return (await db.execute(q)).scalars().first()
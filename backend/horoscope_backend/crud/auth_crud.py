@@ -3,10 +3,21 @@ from typing import Optional
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
+from ..core.config import settings
 from ..models.user import User
 
+_argon2_options = {
+    f"argon2__{name}": value
+    for name, value in (
+        ("time_cost", settings.argon2_time_cost),
+        ("memory_cost", settings.argon2_memory_cost),
+        ("parallelism", settings.argon2_parallelism),
+    )
+    if value is not None
+}
+
 # Use argon2 instead of bcrypt to avoid the 72-byte limit issue
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_options)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -1,16 +1,31 @@
 from datetime import date
 from typing import List, Optional
 
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 
 from ..models.horoscope_entry import HoroscopeEntry
+from ..models.user import User
 from ..models.user_config import UserConfig
+from ..utils.pagination import EntryCursor
+from ..utils.simhash import reading_fingerprint
 
 
 def get_user_config_by_user_id(db: Session, user_id: int) -> Optional[UserConfig]:
     return db.query(UserConfig).filter(UserConfig.user_id == user_id).first()
 
 
+def list_active_timezones(db: Session) -> List[str]:
+    rows = (
+        db.query(UserConfig.timezone)
+        .join(User, User.id == UserConfig.user_id)
+        .filter(User.is_active.is_(True))
+        .distinct()
+        .all()
+    )
+    return sorted(tz for (tz,) in rows if tz)
+
+
 def create_user_config(
     db: Session,
     *,
@@ -44,6 +59,7 @@ def create_horoscope_entry(
     for_date: date,
     variation: int,
     payload_json: dict,
+    prompt_version: Optional[str] = None,
 ) -> HoroscopeEntry:
     entry = HoroscopeEntry(
         user_id=user_id,
@@ -54,6 +70,8 @@ def create_horoscope_entry(
         for_date=for_date,
         variation=variation,
         payload_json=payload_json,
+        prompt_version=prompt_version,
+        reading_fingerprint=reading_fingerprint(payload_json),
     )
     db.add(entry)
     db.commit()
@@ -68,14 +86,27 @@ def list_horoscope_entries(
     from_date: Optional[date],
     to_date: Optional[date],
     limit: int,
-    offset: int,
+    offset: int = 0,
+    after: Optional[EntryCursor] = None,
 ) -> List[HoroscopeEntry]:
     q = db.query(HoroscopeEntry).filter(HoroscopeEntry.user_id == user_id)
     if from_date:
         q = q.filter(HoroscopeEntry.for_date >= from_date)
     if to_date:
         q = q.filter(HoroscopeEntry.for_date <= to_date)
-    return q.order_by(HoroscopeEntry.for_date.desc()).offset(offset).limit(limit).all()
+    if after:
+        q = q.filter(
+            tuple_(
+                HoroscopeEntry.for_date, HoroscopeEntry.created_at, HoroscopeEntry.id
+            )
+            < (after.for_date, after.created_at, after.id)
+        )
+    q = q.order_by(
+        HoroscopeEntry.for_date.desc(),
+        HoroscopeEntry.created_at.desc(),
+        HoroscopeEntry.id.desc(),
+    )
+    return q.offset(offset).limit(limit).all()
 
 
 def get_horoscope_entry_by_id(db: Session, entry_id) -> Optional[HoroscopeEntry]:
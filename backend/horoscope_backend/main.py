@@ -1,12 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 
 from .api.v1.api import api_router
 from .core.config import settings
+from .core.rate_limit import RateLimitMiddleware, rate_limit_options
 from .models import base, horoscope, user
+from .services.ai.registry import AIProviderRegistry
+from .services.auth.password_hasher import password_hasher
+from .services.horoscope_ai_service.horoscope_cache import HoroscopeCache
+from .services.horoscope_ai_service.semantic_cache import SemanticCache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ai_providers = AIProviderRegistry()
+    app.state.horoscope_cache = (
+        HoroscopeCache.from_settings() if settings.horoscope_cache_enabled else None
+    )
+    app.state.semantic_cache = (
+        SemanticCache.from_settings(app.state.ai_providers.limited())
+        if settings.horoscope_semantic_cache_enabled
+        else None
+    )
+    try:
+        yield
+    finally:
+        if app.state.horoscope_cache is not None:
+            await app.state.horoscope_cache.aclose()
+        await app.state.ai_providers.aclose()
+        password_hasher.shutdown()
+
+
+app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
 
-app = FastAPI(title=settings.app_name, version=settings.app_version)
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware, **rate_limit_options())
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(api_router, prefix=settings.api_v1_prefix)
@@ -1,7 +1,17 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 
 from ..core.database import Base
@@ -19,4 +29,19 @@ class HoroscopeEntry(Base):
     for_date = Column(Date, nullable=False)
     variation = Column(Integer, nullable=False, default=0)
     payload_json = Column(JSONB, nullable=False)
+    prompt_version = Column(String(64), nullable=True, index=True)
+    # SimHash of the reading's wording, for near-duplicate checks.
+    reading_fingerprint = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_horoscope_entry_user_id_created_at", "user_id", "created_at"),
+        # Keyset pagination of a user's entries (GET /horoscopes).
+        Index(
+            "ix_horoscope_entry_user_id_for_date_created_at_id",
+            "user_id",
+            "for_date",
+            "created_at",
+            "id",
+        ),
+    )
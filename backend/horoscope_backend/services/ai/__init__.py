@@ -1,16 +1,60 @@
 """AI provider module for horoscope platform."""
 
-from .ai_provider_base import AIProvider, ChatInput, ChatOutput, EmbedInput, EmbedOutput
+from .ai_provider_base import (
+    AIProvider,
+    AIProviderError,
+    AIProviderOverloadedError,
+    AIProviderRateLimitError,
+    AIProviderRetryableError,
+    AIProviderTimeoutError,
+    AIProviderUnavailableError,
+    BulkJob,
+    BulkRequest,
+    BulkResult,
+    ChatChunk,
+    ChatInput,
+    ChatOutput,
+    EmbedInput,
+    EmbedOutput,
+    ProviderCapabilities,
+    ResponseFormat,
+)
+from .concurrency import AdaptiveConcurrencyLimiter, ConcurrencyLimitedProvider
 from .factory import AIProviderFactory, ProviderType
+from .fake_provider import FakeProvider
+from .local_bulk import LocalBulkProvider
 from .openai_client import OpenAIProvider
+from .registry import AIProviderRegistry, get_ai_provider
+from .resilience import CircuitBreaker, ResilienceConfig, ResilientProvider
 
 __all__ = [
     "AIProvider",
+    "AIProviderError",
+    "AIProviderRetryableError",
+    "AIProviderRateLimitError",
+    "AIProviderTimeoutError",
+    "AIProviderUnavailableError",
+    "AIProviderOverloadedError",
     "ProviderType",
     "ChatInput",
     "ChatOutput",
+    "ChatChunk",
     "EmbedInput",
     "EmbedOutput",
+    "ProviderCapabilities",
+    "ResponseFormat",
+    "BulkRequest",
+    "BulkJob",
+    "BulkResult",
     "OpenAIProvider",
+    "LocalBulkProvider",
+    "FakeProvider",
+    "ResilientProvider",
+    "ResilienceConfig",
+    "CircuitBreaker",
+    "AdaptiveConcurrencyLimiter",
+    "ConcurrencyLimitedProvider",
     "AIProviderFactory",
+    "AIProviderRegistry",
+    "get_ai_provider",
 ]
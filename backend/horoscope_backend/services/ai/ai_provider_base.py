@@ -3,7 +3,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, List, Optional, TypedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, TypedDict
 
 
 class Role(str, Enum):
@@ -16,16 +16,42 @@ class ChatMessage(TypedDict):
     content: str
 
 
-class ChatInput(TypedDict):
+class ResponseFormat(str, Enum):
+    TEXT = "text"
+    JSON_OBJECT = "json_object"
+    JSON_SCHEMA = "json_schema"
+
+
+class JSONSchemaSpec(TypedDict):
+    name: str
+    schema: Dict[str, Any]
+
+
+class _ChatInputBase(TypedDict):
     messages: List[ChatMessage]
 
 
+class ChatInput(_ChatInputBase, total=False):
+    response_format: ResponseFormat
+    json_schema: JSONSchemaSpec
+    # Per-request sampling; providers fall back to their configured values.
+    seed: int
+    temperature: float
+    max_tokens: int
+
+
 class ChatOutput(TypedDict, total=False):
     text: str
     usage: Dict[str, int]
     finish_reason: str
 
 
+class ChatChunk(TypedDict, total=False):
+    delta: str
+    usage: Dict[str, int]
+    finish_reason: str
+
+
 class EmbedInput(TypedDict):
     texts: List[str]
 
@@ -35,6 +61,35 @@ class EmbedOutput(TypedDict):
     dim: int
 
 
+class AIProviderError(Exception):
+    """A provider call failed. `retryable` errors may succeed if repeated."""
+
+    retryable = False
+
+
+class AIProviderRetryableError(AIProviderError):
+    retryable = True
+
+
+class AIProviderRateLimitError(AIProviderRetryableError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AIProviderTimeoutError(AIProviderRetryableError):
+    pass
+
+
+class AIProviderUnavailableError(AIProviderError):
+    """No provider could be tried, e.g. every circuit breaker is open."""
+
+
+class AIProviderOverloadedError(AIProviderError):
+    """The call was shed before reaching the provider; retrying right away
+    would only add load."""
+
+
 @dataclass()
 class ProviderConfig(ABC):
     pass
@@ -45,7 +100,53 @@ class Credentials(ABC):
     pass
 
 
+@dataclass(frozen=True)
+class ProviderCapabilities:
+    """Output guarantees a provider can honour when asked in ChatInput.
+
+    `json_mode` means the completion is always a syntactically valid JSON
+    object; `json_schema` means it also conforms to the requested schema.
+    `bulk` means the submit/poll/fetch_bulk methods are implemented.
+    """
+
+    json_mode: bool = False
+    json_schema: bool = False
+    bulk: bool = False
+
+
+BULK_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+@dataclass
+class BulkRequest:
+    custom_id: str
+    input: ChatInput
+
+
+@dataclass
+class BulkJob:
+    id: str
+    status: str
+    output_ref: Optional[str] = None
+    error_ref: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in BULK_TERMINAL_STATUSES
+
+
+@dataclass
+class BulkResult:
+    custom_id: str
+    output: Optional[ChatOutput] = None
+    error: Optional[str] = None
+
+
 class AIProvider(ABC):
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return ProviderCapabilities()
+
     @abstractmethod
     def generate(self, input: ChatInput) -> ChatOutput:
         ...
@@ -53,3 +154,33 @@ class AIProvider(ABC):
     @abstractmethod
     def embed(self, input: EmbedInput) -> EmbedOutput:
         ...
+
+    async def generate_stream(self, input: ChatInput) -> AsyncIterator[ChatChunk]:
+        """Yield the completion in pieces as it is produced.
+
+        Providers without native streaming yield the whole completion as a
+        single chunk. Usage and finish reason arrive on the last chunk.
+        """
+        out = await self.generate(input)
+        yield ChatChunk(
+            delta=out.get("text") or "",
+            usage=out.get("usage", {}),
+            finish_reason=out.get("finish_reason"),
+        )
+
+    async def submit_bulk(self, requests: Sequence[BulkRequest]) -> BulkJob:
+        """Queue completions for offline processing (see capabilities.bulk).
+
+        Bulk jobs trade latency, often hours, for a lower price per token.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no bulk mode")
+
+    async def poll_bulk(self, job: BulkJob) -> BulkJob:
+        raise NotImplementedError(f"{type(self).__name__} has no bulk mode")
+
+    async def fetch_bulk(self, job: BulkJob) -> List[BulkResult]:
+        raise NotImplementedError(f"{type(self).__name__} has no bulk mode")
+
+    async def aclose(self) -> None:
+        """Release network resources held by the provider."""
+        return None
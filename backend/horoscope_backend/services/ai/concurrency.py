@@ -0,0 +1,251 @@
+"""Adaptive limit on concurrent provider calls."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, Sequence
+
+from ...core.config import settings
+from ...core.metrics import metrics
+from .ai_provider_base import (
+    AIProvider,
+    AIProviderOverloadedError,
+    AIProviderRateLimitError,
+    AIProviderTimeoutError,
+    BulkJob,
+    BulkRequest,
+    BulkResult,
+    ChatChunk,
+    ChatInput,
+    ChatOutput,
+    EmbedInput,
+    EmbedOutput,
+    ProviderCapabilities,
+)
+from .resilience import ResilientProvider
+
+concurrency_limit = metrics.gauge(
+    "ai_concurrency_limit", "Current adaptive limit on concurrent provider calls."
+)
+concurrency_in_flight = metrics.gauge(
+    "ai_concurrency_in_flight", "Provider calls holding a concurrency slot."
+)
+concurrency_queued = metrics.gauge(
+    "ai_concurrency_queued", "Provider calls waiting for a concurrency slot."
+)
+concurrency_shed = metrics.counter(
+    "ai_concurrency_shed_total", "Provider calls rejected before being sent."
+)
+
+
+@dataclass
+class ConcurrencyLimitConfig:
+    initial_limit: int = 16
+    min_limit: int = 2
+    max_limit: int = 128
+    queue_size: int = 64
+    queue_timeout_seconds: float = 2.0
+    # Latency above this multiple of the no-load latency counts as congestion.
+    latency_tolerance: float = 2.0
+    backoff_ratio: float = 0.9
+    overload_ratio: float = 0.5
+
+    @classmethod
+    def from_settings(cls) -> "ConcurrencyLimitConfig":
+        return cls(
+            initial_limit=settings.ai_concurrency_initial_limit,
+            min_limit=settings.ai_concurrency_min_limit,
+            max_limit=settings.ai_concurrency_max_limit,
+            queue_size=settings.ai_concurrency_queue_size,
+            queue_timeout_seconds=settings.ai_concurrency_queue_timeout_seconds,
+            latency_tolerance=settings.ai_concurrency_latency_tolerance,
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight calls.
+
+    Each fast success raises the limit by 1/limit (about one slot per full
+    window of calls). A success slower than `latency_tolerance` times the
+    no-load latency, or a timeout, multiplies it by `backoff_ratio`; an
+    upstream rate limit multiplies it by `overload_ratio`. Callers beyond
+    the limit wait in a bounded FIFO queue and are shed with
+    AIProviderOverloadedError when it is full or their wait times out.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ConcurrencyLimitConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or ConcurrencyLimitConfig.from_settings()
+        self.clock = clock
+        self._limit = float(
+            min(
+                max(self.config.initial_limit, self.config.min_limit),
+                self.config.max_limit,
+            )
+        )
+        self.in_flight = 0
+        self._baseline: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        concurrency_limit.set_function(lambda: float(self.limit))
+        concurrency_in_flight.set_function(lambda: float(self.in_flight))
+        concurrency_queued.set_function(lambda: float(self.queued))
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for f in self._waiters if not f.done())
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        if self.in_flight < self.limit and not self.queued:
+            self.in_flight += 1
+            return
+        if self.queued >= self.config.queue_size:
+            concurrency_shed.inc(reason="queue_full")
+            raise AIProviderOverloadedError("Too many provider calls are queued")
+
+        timeout = self.config.queue_timeout_seconds if timeout is None else timeout
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(timeout):
+                await waiter
+        except TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return  # granted just as the wait expired
+            concurrency_shed.inc(reason="timeout")
+            raise AIProviderOverloadedError(
+                f"No provider capacity within {timeout:.2f}s"
+            )
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters and waiter.done():
+                self._waiters.remove(waiter)
+
+    def release(
+        self, latency: Optional[float] = None, error: Optional[BaseException] = None
+    ) -> None:
+        """Return a slot and adapt the limit to how the call went."""
+        if error is not None:
+            self.record_error(error)
+        elif latency is not None:
+            self._observe(latency)
+        self._release_slot()
+
+    def record_error(self, error: BaseException) -> None:
+        """Adapt the limit to an upstream error without returning a slot."""
+        if isinstance(error, AIProviderRateLimitError):
+            self._set_limit(self._limit * self.config.overload_ratio)
+        elif isinstance(error, AIProviderTimeoutError):
+            self._set_limit(self._limit * self.config.backoff_ratio)
+
+    def _observe(self, latency: float) -> None:
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            # Drift up slowly so the baseline follows a changing workload.
+            self._baseline += 0.01 * (latency - self._baseline)
+        if latency > self.config.latency_tolerance * self._baseline:
+            self._set_limit(self._limit * self.config.backoff_ratio)
+        elif 2 * self.in_flight >= self._limit:
+            # Only grow while at least half the limit is in use.
+            self._set_limit(self._limit + 1 / self._limit)
+
+    def _set_limit(self, limit: float) -> None:
+        self._limit = min(
+            max(limit, float(self.config.min_limit)), float(self.config.max_limit)
+        )
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class ConcurrencyLimitedProvider(AIProvider):
+    """Holds a limiter slot for the whole duration of each provider call.
+
+    Around a ResilientProvider the limiter learns from every failed attempt,
+    so a 429 still shrinks the limit when a retry or failover hides it from
+    the caller; the call's final error is then not counted a second time.
+    """
+
+    def __init__(
+        self, provider: AIProvider, limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    ):
+        self.provider = provider
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self._reports_attempts = isinstance(provider, ResilientProvider)
+        if self._reports_attempts:
+            provider.on_attempt_error = self.limiter.record_error
+
+    def _release(
+        self, latency: Optional[float] = None, error: Optional[BaseException] = None
+    ) -> None:
+        self.limiter.release(
+            latency=latency, error=None if self._reports_attempts else error
+        )
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return self.provider.capabilities
+
+    async def _limited(self, call: Callable[[], Awaitable]):
+        await self.limiter.acquire()
+        start = self.limiter.clock()
+        try:
+            result = await call()
+        except BaseException as e:
+            self._release(error=e)
+            raise
+        self._release(latency=self.limiter.clock() - start)
+        return result
+
+    async def generate(self, input: ChatInput) -> ChatOutput:
+        return await self._limited(lambda: self.provider.generate(input))
+
+    async def generate_stream(self, input: ChatInput) -> AsyncIterator[ChatChunk]:
+        await self.limiter.acquire()
+        start = self.limiter.clock()
+        latency: Optional[float] = None
+        error: Optional[BaseException] = None
+        try:
+            async for chunk in self.provider.generate_stream(input):
+                if latency is None:
+                    # Time to first chunk is what tracks upstream load.
+                    latency = self.limiter.clock() - start
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(latency=latency, error=error)
+
+    async def embed(self, input: EmbedInput) -> EmbedOutput:
+        return await self._limited(lambda: self.provider.embed(input))
+
+    async def submit_bulk(self, requests: Sequence[BulkRequest]) -> BulkJob:
+        return await self.provider.submit_bulk(requests)
+
+    async def poll_bulk(self, job: BulkJob) -> BulkJob:
+        return await self.provider.poll_bulk(job)
+
+    async def fetch_bulk(self, job: BulkJob) -> List[BulkResult]:
+        return await self.provider.fetch_bulk(job)
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
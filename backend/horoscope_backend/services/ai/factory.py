@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import dataclasses
 from enum import Enum
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
 
 from .ai_provider_base import AIProvider, Credentials, ProviderConfig
+from .fake_provider import FakeProvider, FakeProviderConfig
 from .openai_client import OpenAICredentials, OpenAIProvider, OpenAIProviderConfig
+from .resilience import ResilienceConfig, ResilientProvider
 
 
 class ProviderType(str, Enum):
     OPENAI = "openai"
+    FAKE = "fake"
+
+
+def parse_target(target: str) -> Tuple[ProviderType, Optional[str]]:
+    """Split a "provider" or "provider:model" target string."""
+    provider_type, _, model = target.partition(":")
+    return ProviderType(provider_type), model or None
 
 
 class AIProviderFactory:
@@ -19,10 +29,37 @@ class AIProviderFactory:
         provider_type: ProviderType,
         credentials: Optional[Credentials] = None,
         config: Optional[ProviderConfig] = None,
+        model: Optional[str] = None,
     ) -> AIProvider:
         if provider_type == ProviderType.OPENAI:
             creds = credentials or OpenAICredentials.from_settings()
-            conf = config or OpenAIProviderConfig()
+            conf = config or OpenAIProviderConfig.from_settings()
+            if model:
+                conf = dataclasses.replace(conf, model=model)
             return OpenAIProvider(credentials=creds, config=conf)
 
+        if provider_type == ProviderType.FAKE:
+            conf = config or FakeProviderConfig()
+            if model:
+                conf = dataclasses.replace(conf, model=model)
+            return FakeProvider(config=conf)
+
         raise ValueError(f"Unsupported provider type: {provider_type}")
+
+    @staticmethod
+    def create_target(target: str) -> AIProvider:
+        provider_type, model = parse_target(target)
+        return AIProviderFactory.create_provider(provider_type, model=model)
+
+    @staticmethod
+    def create_resilient_provider(
+        primary: Tuple[str, AIProvider],
+        fallback_targets: Sequence[str] = (),
+        config: Optional[ResilienceConfig] = None,
+    ) -> ResilientProvider:
+        """Wrap `primary` with failover to each of `fallback_targets` in order."""
+        targets = [primary] + [
+            (target, AIProviderFactory.create_target(target))
+            for target in fallback_targets
+        ]
+        return ResilientProvider(targets, config)
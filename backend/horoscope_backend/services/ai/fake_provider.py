@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Sequence
+
+from .ai_provider_base import (
+    AIProvider,
+    AIProviderError,
+    AIProviderRateLimitError,
+    AIProviderRetryableError,
+    AIProviderTimeoutError,
+    ChatChunk,
+    ChatInput,
+    ChatOutput,
+    EmbedInput,
+    EmbedOutput,
+    ProviderCapabilities,
+    ProviderConfig,
+)
+
+FAILURES = {
+    "retryable": lambda: AIProviderRetryableError("Fake provider error"),
+    "rate_limit": lambda: AIProviderRateLimitError("Fake rate limit", 0.0),
+    "timeout": lambda: AIProviderTimeoutError("Fake timeout"),
+    "fatal": lambda: AIProviderError("Fake fatal error"),
+}
+
+_READING = {
+    "headline": "{name}, a steady day for {sign}",
+    "reading": (
+        "{name}, {sign} energy favours small, deliberate steps today. "
+        "Finish what is already in motion before starting anything new."
+    ),
+    "lucky_color": "teal",
+    "lucky_number": 7,
+    "mood": "calm",
+    "focus": ["routine", "rest"],
+    "do": ["Plan ahead", "Take a walk", "Reach out"],
+    "dont": ["Rush decisions", "Overcommit"],
+    "best_time_window": "10:00–12:00",
+}
+
+
+@dataclass
+class FakeProviderConfig(ProviderConfig):
+    model: str = "fake"
+    latency_seconds: float = 0.0
+    latency_jitter_seconds: float = 0.0
+    failure_rate: float = 0.0
+    failure: str = "retryable"  # a key of FAILURES
+    seed: Optional[int] = None
+
+
+class FakeProvider(AIProvider):
+    """In-process provider for tests and local development.
+
+    Answers with a canned reading after `latency_seconds` (plus jitter) and
+    fails a `failure_rate` share of calls with the configured error.
+    `latencies` and `failures` script the first calls in order; a None
+    failure means the call succeeds.
+    """
+
+    def __init__(
+        self,
+        config: Optional[FakeProviderConfig] = None,
+        *,
+        text: Optional[str] = None,
+        latencies: Sequence[float] = (),
+        failures: Sequence[Optional[BaseException]] = (),
+    ):
+        self.config = config or FakeProviderConfig()
+        self.text = text
+        self.latencies = list(latencies)
+        self.failures = list(failures)
+        self.inputs: List[ChatInput] = []
+        self._rng = random.Random(self.config.seed)
+
+    @property
+    def calls(self) -> int:
+        return len(self.inputs)
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return ProviderCapabilities(json_mode=True)
+
+    async def _behave(self) -> None:
+        if self.latencies:
+            latency = self.latencies.pop(0)
+        else:
+            latency = self.config.latency_seconds + self._rng.uniform(
+                0, self.config.latency_jitter_seconds
+            )
+        if latency > 0:
+            await asyncio.sleep(latency)
+        if self.failures:
+            failure = self.failures.pop(0)
+            if failure is not None:
+                raise failure
+        elif self._rng.random() < self.config.failure_rate:
+            raise FAILURES[self.config.failure]()
+
+    def _answer(self, input: ChatInput) -> str:
+        if self.text is not None:
+            return self.text
+        prompt = input["messages"][-1]["content"]
+        name = re.search(r"^Name: (.*)$", prompt, re.M)
+        sign = re.search(r"^Zodiac sign: (.*)$", prompt, re.M)
+        fields = {
+            "name": name.group(1) if name else "Friend",
+            "sign": sign.group(1) if sign else "your sign",
+        }
+        reading = {
+            k: v.format(**fields) if isinstance(v, str) else v
+            for k, v in _READING.items()
+        }
+        return json.dumps(reading, ensure_ascii=False)
+
+    async def generate(self, input: ChatInput) -> ChatOutput:
+        self.inputs.append(input)
+        await self._behave()
+        text = self._answer(input)
+        tokens = len(text) // 4
+        return ChatOutput(
+            text=text,
+            usage={
+                "prompt_tokens": 0,
+                "completion_tokens": tokens,
+                "total_tokens": tokens,
+            },
+            finish_reason="stop",
+        )
+
+    async def generate_stream(self, input: ChatInput) -> AsyncIterator[ChatChunk]:
+        out = await self.generate(input)
+        text = out["text"]
+        for i in range(0, len(text), 16):
+            yield ChatChunk(delta=text[i : i + 16])
+        yield ChatChunk(usage=out["usage"], finish_reason=out["finish_reason"])
+
+    async def embed(self, input: EmbedInput) -> EmbedOutput:
+        await self._behave()
+        vectors = []
+        for text in input["texts"]:
+            rng = random.Random(text)
+            vectors.append([rng.uniform(-1, 1) for _ in range(8)])
+        return EmbedOutput(vectors=vectors, dim=8)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Sequence
+
+from .ai_provider_base import (
+    AIProvider,
+    BulkJob,
+    BulkRequest,
+    BulkResult,
+    ChatInput,
+    ChatOutput,
+    EmbedInput,
+    EmbedOutput,
+    ProviderCapabilities,
+    ResponseFormat,
+    Role,
+)
+
+
+class LocalBulkProvider(AIProvider):
+    """File-based stand-in for a provider's batch API.
+
+    Jobs are JSONL files in `directory`. Nothing runs on submit; the first
+    poll answers every request through `delegate.generate` and completes
+    the job, so bulk pipelines can be run end to end without network access.
+    """
+
+    def __init__(self, delegate: AIProvider, directory: str):
+        self.delegate = delegate
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        return dataclasses.replace(self.delegate.capabilities, bulk=True)
+
+    async def generate(self, input: ChatInput) -> ChatOutput:
+        return await self.delegate.generate(input)
+
+    async def embed(self, input: EmbedInput) -> EmbedOutput:
+        return await self.delegate.embed(input)
+
+    async def aclose(self) -> None:
+        await self.delegate.aclose()
+
+    def _path(self, job_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.{kind}.jsonl")
+
+    async def submit_bulk(self, requests: Sequence[BulkRequest]) -> BulkJob:
+        job_id = f"local_{uuid.uuid4().hex}"
+        with open(self._path(job_id, "input"), "w", encoding="utf-8") as f:
+            for request in requests:
+                row = {"custom_id": request.custom_id, "body": _encode(request.input)}
+                f.write(json.dumps(row) + "\n")
+        return BulkJob(id=job_id, status="in_progress")
+
+    async def poll_bulk(self, job: BulkJob) -> BulkJob:
+        output_path = self._path(job.id, "output")
+        if not os.path.exists(output_path):
+            with open(self._path(job.id, "input"), encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            results = []
+            for row in rows:
+                try:
+                    out = await self.delegate.generate(_decode(row["body"]))
+                except Exception as e:
+                    results.append({"custom_id": row["custom_id"], "error": str(e)})
+                else:
+                    results.append({"custom_id": row["custom_id"], "output": out})
+            tmp_path = output_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for result in results:
+                    f.write(json.dumps(result) + "\n")
+            os.replace(tmp_path, output_path)
+        return BulkJob(id=job.id, status="completed", output_ref=output_path)
+
+    async def fetch_bulk(self, job: BulkJob) -> List[BulkResult]:
+        with open(job.output_ref, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return [
+            BulkResult(
+                row["custom_id"], output=row.get("output"), error=row.get("error")
+            )
+            for row in rows
+        ]
+
+
+def _encode(input: ChatInput) -> Dict[str, Any]:
+    body: Dict[str, Any] = dict(input)
+    body["messages"] = [
+        {"role": m["role"].value, "content": m["content"]} for m in input["messages"]
+    ]
+    if "response_format" in body:
+        body["response_format"] = body["response_format"].value
+    return body
+
+
+def _decode(body: Dict[str, Any]) -> ChatInput:
+    input = ChatInput(**body)
+    input["messages"] = [
+        {"role": Role(m["role"]), "content": m["content"]} for m in body["messages"]
+    ]
+    if "response_format" in body:
+        input["response_format"] = ResponseFormat(body["response_format"])
+    return input
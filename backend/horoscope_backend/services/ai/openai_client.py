@@ -1,22 +1,56 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
+import httpx
 import openai
 from openai import AsyncOpenAI
 
 from ...core.config import settings
 from .ai_provider_base import (
     AIProvider,
+    AIProviderError,
+    AIProviderRateLimitError,
+    AIProviderRetryableError,
+    AIProviderTimeoutError,
+    BulkJob,
+    BulkRequest,
+    BulkResult,
+    ChatChunk,
     ChatInput,
     ChatOutput,
     Credentials,
     EmbedInput,
     EmbedOutput,
+    ProviderCapabilities,
     ProviderConfig,
+    ResponseFormat,
 )
 
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+def _provider_error(context: str, e: Exception) -> AIProviderError:
+    """Map an SDK exception onto the AIProviderError hierarchy."""
+    message = f"{context}: {str(e)}"
+    if isinstance(e, openai.APITimeoutError):
+        return AIProviderTimeoutError(message)
+    if isinstance(e, openai.RateLimitError):
+        retry_after = e.response.headers.get("retry-after")
+        try:
+            return AIProviderRateLimitError(message, float(retry_after))
+        except (TypeError, ValueError):
+            return AIProviderRateLimitError(message)
+    if isinstance(e, openai.APIConnectionError):
+        return AIProviderRetryableError(message)
+    if isinstance(e, openai.APIStatusError) and (
+        e.status_code >= 500 or e.status_code in (408, 409)
+    ):
+        return AIProviderRetryableError(message)
+    return AIProviderError(message)
+
 
 @dataclass
 class OpenAIProviderConfig(ProviderConfig):
@@ -25,6 +59,36 @@ class OpenAIProviderConfig(ProviderConfig):
     max_tokens: Optional[int] = None
     temperature: float = 0.7
 
+    timeout_seconds: float = 60.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = False
+    # Retries inside the SDK. ResilientProvider retries with backoff,
+    # deadlines and failover, so SDK retries are off by default.
+    max_retries: int = 0
+
+    # Strongest structured output the model behind base_url supports:
+    # None, "json_object" or "json_schema".
+    response_format: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls) -> "OpenAIProviderConfig":
+        """Create provider config from settings object."""
+        return cls(
+            model=settings.openai_model,
+            embedding_model=settings.openai_embedding_model,
+            max_tokens=settings.openai_max_tokens,
+            temperature=settings.openai_temperature,
+            timeout_seconds=settings.openai_timeout_seconds,
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry_seconds=settings.openai_keepalive_expiry_seconds,
+            http2=settings.openai_http2,
+            max_retries=settings.openai_max_retries,
+            response_format=settings.openai_response_format,
+        )
+
 
 @dataclass
 class OpenAICredentials(Credentials):
@@ -47,29 +111,75 @@ class OpenAIProvider(AIProvider):
     ):
         self.credentials = credentials or OpenAICredentials.from_settings()
 
-        self.config = config or OpenAIProviderConfig(
-            model=settings.openai_model,
-            embedding_model=settings.openai_embedding_model,
-            max_tokens=settings.openai_max_tokens,
-            temperature=settings.openai_temperature,
-        )
+        self.config = config or OpenAIProviderConfig.from_settings()
 
+        # One pooled HTTP client per provider; keep the provider long-lived
+        # (see AIProviderRegistry) so connections and TLS sessions are reused.
+        self.http_client = httpx.AsyncClient(
+            http2=self.config.http2,
+            timeout=httpx.Timeout(self.config.timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry_seconds,
+            ),
+        )
         self.client = AsyncOpenAI(
-            api_key=self.credentials.api_key, base_url=self.credentials.base_url
+            api_key=self.credentials.api_key,
+            base_url=self.credentials.base_url,
+            http_client=self.http_client,
+            max_retries=self.config.max_retries,
+        )
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        supported = self.config.response_format
+        return ProviderCapabilities(
+            json_mode=supported
+            in (ResponseFormat.JSON_OBJECT.value, ResponseFormat.JSON_SCHEMA.value),
+            json_schema=supported == ResponseFormat.JSON_SCHEMA.value,
+            bulk=True,
         )
 
+    def _request_options(self, input: ChatInput) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "model": self.config.model,
+            "messages": self._messages(input),
+            "max_tokens": input.get("max_tokens", self.config.max_tokens),
+            "temperature": input.get("temperature", self.config.temperature),
+        }
+        if "seed" in input:
+            options["seed"] = input["seed"]
+        requested = input.get("response_format")
+        capabilities = self.capabilities
+        if requested == ResponseFormat.JSON_SCHEMA and capabilities.json_schema:
+            spec = input["json_schema"]
+            options["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": spec["name"],
+                    "schema": spec["schema"],
+                    "strict": True,
+                },
+            }
+        elif requested in (ResponseFormat.JSON_OBJECT, ResponseFormat.JSON_SCHEMA):
+            if capabilities.json_mode:
+                options["response_format"] = {"type": "json_object"}
+        return options
+
+    def _messages(self, input: ChatInput) -> List[Dict[str, str]]:
+        return [
+            {"role": msg["role"].value, "content": msg["content"]}
+            for msg in input["messages"]
+        ]
+
     async def generate(self, input: ChatInput) -> ChatOutput:
         try:
-            messages = [
-                {"role": msg["role"].value, "content": msg["content"]}
-                for msg in input["messages"]
-            ]
-
             response = await self.client.chat.completions.create(
-                model=self.config.model,
-                messages=messages,
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
+                **self._request_options(input)
             )
 
             return ChatOutput(
@@ -82,7 +192,122 @@ class OpenAIProvider(AIProvider):
                 finish_reason=response.choices[0].finish_reason,
             )
         except Exception as e:
-            raise Exception(f"OpenAI chat error: {str(e)}")
+            raise _provider_error("OpenAI chat error", e) from e
+
+    async def generate_stream(self, input: ChatInput) -> AsyncIterator[ChatChunk]:
+        try:
+            stream = await self.client.chat.completions.create(
+                **self._request_options(input),
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            finish_reason = None
+            async for chunk in stream:
+                if chunk.choices:
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    if choice.delta.content:
+                        yield ChatChunk(delta=choice.delta.content)
+                if chunk.usage:
+                    # Sent on a final chunk with no choices.
+                    yield ChatChunk(
+                        usage={
+                            "prompt_tokens": chunk.usage.prompt_tokens,
+                            "completion_tokens": chunk.usage.completion_tokens,
+                            "total_tokens": chunk.usage.total_tokens,
+                        },
+                        finish_reason=finish_reason,
+                    )
+        except Exception as e:
+            raise _provider_error("OpenAI chat error", e) from e
+
+    async def submit_bulk(self, requests: Sequence[BulkRequest]) -> BulkJob:
+        lines = []
+        for request in requests:
+            body = {
+                k: v
+                for k, v in self._request_options(request.input).items()
+                if v is not None
+            }
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request.custom_id,
+                        "method": "POST",
+                        "url": BATCH_ENDPOINT,
+                        "body": body,
+                    }
+                )
+            )
+        try:
+            upload = await self.client.files.create(
+                file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = await self.client.batches.create(
+                input_file_id=upload.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window="24h",
+            )
+        except Exception as e:
+            raise _provider_error("OpenAI batch error", e) from e
+        return self._bulk_job(batch)
+
+    async def poll_bulk(self, job: BulkJob) -> BulkJob:
+        try:
+            batch = await self.client.batches.retrieve(job.id)
+        except Exception as e:
+            raise _provider_error("OpenAI batch error", e) from e
+        return self._bulk_job(batch)
+
+    async def fetch_bulk(self, job: BulkJob) -> List[BulkResult]:
+        results: List[BulkResult] = []
+        try:
+            for ref in (job.output_ref, job.error_ref):
+                if ref:
+                    content = await self.client.files.content(ref)
+                    results.extend(self._bulk_results(content.text))
+        except Exception as e:
+            raise _provider_error("OpenAI batch error", e) from e
+        return results
+
+    def _bulk_job(self, batch: Any) -> BulkJob:
+        return BulkJob(
+            id=batch.id,
+            status=batch.status,
+            output_ref=batch.output_file_id,
+            error_ref=batch.error_file_id,
+        )
+
+    def _bulk_results(self, text: str) -> List[BulkResult]:
+        results = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                error = row.get("error") or response.get("body", {}).get("error")
+                results.append(BulkResult(row["custom_id"], error=str(error)))
+                continue
+            body = response["body"]
+            usage = body.get("usage") or {}
+            results.append(
+                BulkResult(
+                    row["custom_id"],
+                    output=ChatOutput(
+                        text=body["choices"][0]["message"]["content"],
+                        usage={
+                            "prompt_tokens": usage.get("prompt_tokens", 0),
+                            "completion_tokens": usage.get("completion_tokens", 0),
+                            "total_tokens": usage.get("total_tokens", 0),
+                        },
+                        finish_reason=body["choices"][0].get("finish_reason"),
+                    ),
+                )
+            )
+        return results
 
     async def embed(self, input: EmbedInput) -> EmbedOutput:
         try:
@@ -95,4 +320,4 @@ class OpenAIProvider(AIProvider):
 
             return EmbedOutput(vectors=vectors, dim=dim)
         except Exception as e:
-            raise Exception(f"OpenAI embedding error: {str(e)}")
+            raise _provider_error("OpenAI embedding error", e) from e
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from fastapi import Request
+
+from ...core.config import settings
+from .ai_provider_base import AIProvider
+from .concurrency import ConcurrencyLimitedProvider
+from .factory import AIProviderFactory, ProviderType
+from .resilience import ResilientProvider
+
+
+class AIProviderRegistry:
+    """Holds long-lived provider instances for the lifetime of the app.
+
+    Providers own pooled HTTP clients, so they are created once per process
+    and shared by all requests instead of being rebuilt per call. Requests
+    go through `limited()`: an adaptive concurrency limit around
+    `resilient()`, which wraps the default provider with deadlines,
+    retries, hedging, circuit breaking and failover.
+    """
+
+    def __init__(self, default_provider: Optional[ProviderType] = None):
+        self.default_provider = default_provider or ProviderType(
+            settings.ai_provider or ProviderType.OPENAI.value
+        )
+        self._providers: Dict[ProviderType, AIProvider] = {}
+        self._resilient: Optional[ResilientProvider] = None
+        self._limited: Optional[ConcurrencyLimitedProvider] = None
+
+    def get(self, provider_type: Optional[ProviderType] = None) -> AIProvider:
+        provider_type = provider_type or self.default_provider
+        provider = self._providers.get(provider_type)
+        if provider is None:
+            provider = AIProviderFactory.create_provider(provider_type)
+            self._providers[provider_type] = provider
+        return provider
+
+    def register(self, provider_type: ProviderType, provider: AIProvider) -> None:
+        self._providers[provider_type] = provider
+        self._resilient = None
+        self._limited = None
+
+    def resilient(self) -> ResilientProvider:
+        if self._resilient is None:
+            self._resilient = AIProviderFactory.create_resilient_provider(
+                (self.default_provider.value, self.get()),
+                settings.ai_fallback_targets,
+            )
+        return self._resilient
+
+    def limited(self) -> ConcurrencyLimitedProvider:
+        if self._limited is None:
+            self._limited = ConcurrencyLimitedProvider(self.resilient())
+        return self._limited
+
+    async def aclose(self) -> None:
+        providers = list(self._providers.values())
+        if self._resilient is not None:
+            # Fallback targets are owned by the wrapper; the primary is
+            # closed below with the other registered providers.
+            providers.extend(t.provider for t in self._resilient.targets[1:])
+            self._resilient = None
+        self._limited = None
+        self._providers.clear()
+        for provider in providers:
+            await provider.aclose()
+
+
+def get_ai_provider(request: Request) -> AIProvider:
+    """FastAPI dependency returning the shared default provider."""
+    return request.app.state.ai_providers.limited()
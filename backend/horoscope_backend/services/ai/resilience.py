@@ -0,0 +1,381 @@
+"""Deadlines, retries, hedging, circuit breaking and failover for providers."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from ...core.config import settings
+from ...core.metrics import metrics
+from .ai_provider_base import (
+    AIProvider,
+    AIProviderError,
+    AIProviderRateLimitError,
+    AIProviderTimeoutError,
+    AIProviderUnavailableError,
+    BulkJob,
+    BulkRequest,
+    BulkResult,
+    ChatChunk,
+    ChatInput,
+    ChatOutput,
+    EmbedInput,
+    EmbedOutput,
+    ProviderCapabilities,
+)
+
+T = TypeVar("T")
+
+provider_calls = metrics.counter(
+    "ai_provider_calls_total", "Provider calls by target and outcome."
+)
+provider_latency = metrics.histogram(
+    "ai_provider_seconds", "Latency of successful provider calls."
+)
+hedged_calls = metrics.counter(
+    "ai_provider_hedges_total", "Second requests sent after the hedge delay."
+)
+circuit_open = metrics.gauge(
+    "ai_provider_circuit_open", "1 while a target's circuit breaker rejects calls."
+)
+
+
+@dataclass
+class ResilienceConfig:
+    deadline_seconds: float = 30.0
+    max_attempts: int = 3
+    backoff_seconds: float = 0.25
+    backoff_max_seconds: float = 4.0
+    hedge_quantile: Optional[float] = 0.95
+    hedge_min_samples: int = 20
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+
+    @classmethod
+    def from_settings(cls) -> "ResilienceConfig":
+        return cls(
+            deadline_seconds=settings.ai_deadline_seconds,
+            max_attempts=settings.ai_max_attempts,
+            backoff_seconds=settings.ai_retry_backoff_seconds,
+            backoff_max_seconds=settings.ai_retry_backoff_max_seconds,
+            hedge_quantile=settings.ai_hedge_quantile,
+            hedge_min_samples=settings.ai_hedge_min_samples,
+            breaker_failure_threshold=settings.ai_breaker_failure_threshold,
+            breaker_reset_seconds=settings.ai_breaker_reset_seconds,
+        )
+
+
+class CircuitBreaker:
+    """Stops calls to a target after `failure_threshold` consecutive
+    retryable failures.
+
+    Once `reset_seconds` have passed the breaker half-opens and lets a
+    single probe through: success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._changed_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.clock() - self._changed_at < self.reset_seconds:
+            return False
+        # Half-open: one probe per reset period, so a probe that never
+        # reports back (e.g. a cancelled hedge) cannot wedge the breaker.
+        self.state = self.HALF_OPEN
+        self._changed_at = self.clock()
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._changed_at = self.clock()
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls."""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class ProviderTarget:
+    name: str
+    provider: AIProvider
+    breaker: CircuitBreaker
+    latencies: LatencyWindow = field(default_factory=LatencyWindow)
+
+
+class ResilientProvider(AIProvider):
+    """Wraps one or more providers, tried in order.
+
+    Every call gets an overall deadline. Retryable errors fail over to the
+    next target whose circuit breaker is closed; after a full pass the call
+    backs off with full jitter and starts again, up to `max_attempts`
+    passes. Once a target has enough latency samples, a generate call that
+    outlives its `hedge_quantile` latency gets a second, identical request
+    and the first answer wins.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[Tuple[str, AIProvider]],
+        config: Optional[ResilienceConfig] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+        on_attempt_error: Optional[Callable[[AIProviderError], None]] = None,
+    ):
+        if not targets:
+            raise ValueError("ResilientProvider needs at least one target")
+        self.config = config or ResilienceConfig.from_settings()
+        self.targets = [
+            ProviderTarget(
+                name=name,
+                provider=provider,
+                breaker=CircuitBreaker(
+                    self.config.breaker_failure_threshold,
+                    self.config.breaker_reset_seconds,
+                    clock,
+                ),
+            )
+            for name, provider in targets
+        ]
+        self.rng = rng or random.Random()
+        # Sees every failed attempt, including ones retried or failed over
+        # before the caller would notice (e.g. a concurrency limiter's 429s).
+        self.on_attempt_error = on_attempt_error
+        for target in self.targets:
+            circuit_open.set_function(
+                lambda b=target.breaker: float(b.state == CircuitBreaker.OPEN),
+                target=target.name,
+            )
+
+    @property
+    def primary(self) -> AIProvider:
+        return self.targets[0].provider
+
+    @property
+    def capabilities(self) -> ProviderCapabilities:
+        # Any target may answer, so only guarantees all of them share hold.
+        caps = [t.provider.capabilities for t in self.targets]
+        return ProviderCapabilities(
+            json_mode=all(c.json_mode for c in caps),
+            json_schema=all(c.json_schema for c in caps),
+            bulk=caps[0].bulk,
+        )
+
+    async def generate(self, input: ChatInput) -> ChatOutput:
+        return await self._call(lambda p: p.generate(input), hedge=True)
+
+    async def generate_stream(self, input: ChatInput) -> AsyncIterator[ChatChunk]:
+        # Failover is only possible until the first chunk reaches the caller.
+        first, stream = await self._call(lambda p: _open_stream(p, input), hedge=False)
+        if first is None:
+            return
+        yield first
+        async for chunk in stream:
+            yield chunk
+
+    async def embed(self, input: EmbedInput) -> EmbedOutput:
+        return await self._call(lambda p: p.embed(input), hedge=False)
+
+    # Bulk jobs belong to the provider they were submitted to.
+    async def submit_bulk(self, requests: Sequence[BulkRequest]) -> BulkJob:
+        return await self.primary.submit_bulk(requests)
+
+    async def poll_bulk(self, job: BulkJob) -> BulkJob:
+        return await self.primary.poll_bulk(job)
+
+    async def fetch_bulk(self, job: BulkJob) -> List[BulkResult]:
+        return await self.primary.fetch_bulk(job)
+
+    async def aclose(self) -> None:
+        for target in self.targets:
+            await target.provider.aclose()
+
+    async def _call(
+        self, op: Callable[[AIProvider], Awaitable[T]], *, hedge: bool
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.deadline_seconds
+        last_error: Optional[AIProviderError] = None
+        for attempt in range(max(1, self.config.max_attempts)):
+            if attempt:
+                delay = self._backoff(attempt - 1, last_error)
+                if loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+            tried = False
+            for target in self.targets:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                if not target.breaker.allow():
+                    continue
+                tried = True
+                try:
+                    return await self._attempt(target, op, remaining, hedge)
+                except AIProviderError as e:
+                    if not e.retryable:
+                        raise
+                    last_error = e
+            if not tried and last_error is None:
+                raise AIProviderUnavailableError(
+                    "Every provider's circuit breaker is open"
+                )
+        if last_error is None or loop.time() >= deadline:
+            raise AIProviderTimeoutError(
+                f"No provider answered within {self.config.deadline_seconds}s"
+            ) from last_error
+        raise last_error
+
+    async def _attempt(
+        self,
+        target: ProviderTarget,
+        op: Callable[[AIProvider], Awaitable[T]],
+        timeout: float,
+        hedge: bool,
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        hedge_after = self._hedge_delay(target) if hedge else None
+        try:
+            async with asyncio.timeout(timeout):
+                if hedge_after is None:
+                    result = await op(target.provider)
+                else:
+                    result = await self._hedged(target, op, hedge_after)
+        except TimeoutError:
+            target.breaker.record_failure()
+            provider_calls.inc(target=target.name, outcome="timeout")
+            error = AIProviderTimeoutError(
+                f"{target.name} did not answer within {timeout:.2f}s"
+            )
+            self._report(error)
+            raise error
+        except AIProviderError as e:
+            if e.retryable:
+                target.breaker.record_failure()
+            provider_calls.inc(target=target.name, outcome="error")
+            self._report(e)
+            raise
+        elapsed = loop.time() - start
+        target.breaker.record_success()
+        provider_calls.inc(target=target.name, outcome="ok")
+        provider_latency.observe(elapsed, target=target.name)
+        if hedge:
+            target.latencies.add(elapsed)
+        return result
+
+    def _report(self, error: AIProviderError) -> None:
+        if self.on_attempt_error is not None:
+            self.on_attempt_error(error)
+
+    async def _hedged(
+        self,
+        target: ProviderTarget,
+        op: Callable[[AIProvider], Awaitable[T]],
+        hedge_after: float,
+    ) -> T:
+        tasks = [asyncio.ensure_future(op(target.provider))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if done:
+                return tasks[0].result()
+            hedged_calls.inc(target=target.name)
+            tasks.append(asyncio.ensure_future(op(target.provider)))
+            pending = set(tasks)
+            errors: List[BaseException] = []
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+            raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self, target: ProviderTarget) -> Optional[float]:
+        if self.config.hedge_quantile is None:
+            return None
+        if len(target.latencies) < self.config.hedge_min_samples:
+            return None
+        return target.latencies.quantile(self.config.hedge_quantile)
+
+    def _backoff(self, attempt: int, error: Optional[AIProviderError]) -> float:
+        cap = min(
+            self.config.backoff_max_seconds,
+            self.config.backoff_seconds * (2**attempt),
+        )
+        delay = self.rng.uniform(0, cap)
+        if isinstance(error, AIProviderRateLimitError) and error.retry_after:
+            delay = max(delay, error.retry_after)
+        return delay
+
+
+async def _open_stream(
+    provider: AIProvider, input: ChatInput
+) -> Tuple[Optional[ChatChunk], AsyncIterator[ChatChunk]]:
+    """Start a stream and wait for its first chunk."""
+    stream: Any = provider.generate_stream(input)
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        return None, stream
+    except BaseException:
+        await stream.aclose()
+        raise
+    return first, stream
@@ -0,0 +1,60 @@
+"""Short-lived caches for verified JWT claims and user status snapshots."""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from ...core.config import settings
+from ...utils.lru_cache import TTLLRUCache
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    is_active: bool
+
+
+class AuthCache:
+    """Per-process cache; `invalidate_user` only reaches the current worker,
+    so other workers may serve a stale snapshot for up to `user_ttl`."""
+
+    def __init__(
+        self,
+        claims_ttl: float = 60.0,
+        user_ttl: float = 30.0,
+        max_entries: int = 10000,
+    ):
+        self.claims_ttl = claims_ttl
+        self.user_ttl = user_ttl
+        self._claims: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(max_entries)
+        self._users: TTLLRUCache[UserSnapshot] = TTLLRUCache(max_entries)
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        return self._claims.get(token)
+
+    def set_claims(self, token: str, claims: Dict[str, Any]) -> None:
+        ttl = self.claims_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        self._claims.set(token, claims, ttl)
+
+    def get_user(self, user_id: int) -> Optional[UserSnapshot]:
+        return self._users.get(user_id)
+
+    def set_user(self, snapshot: UserSnapshot) -> None:
+        self._users.set(snapshot.id, snapshot, self.user_ttl)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._users.pop(user_id)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._users.clear()
+
+
+auth_cache = AuthCache(
+    claims_ttl=settings.auth_claims_cache_ttl_seconds,
+    user_ttl=settings.auth_user_cache_ttl_seconds,
+    max_entries=settings.auth_cache_max_entries,
+)
@@ -2,76 +2,96 @@ from typing import Optional
 
 from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...core.config import settings
-from ...core.database import get_db
-from ...crud.auth_crud import get_user_by_id
+from ...core.database import get_async_db
+from ...crud.async_auth_crud import get_user_by_id
 from ...models.user import User
+from .auth_cache import UserSnapshot, auth_cache
 from .auth_service import verify_token
 
 security = HTTPBearer(auto_error=False)
 
 
-class CurrentUser:
-    def __init__(self, user: Optional[User] = None):
-        self.user = user
-        self.is_authenticated = user is not None
-        self.user_id = user.id if user else None
+def verify_token_cached(token: str) -> Optional[dict]:
+    claims = auth_cache.get_claims(token)
+    if claims is None:
+        claims = verify_token(token)
+        if claims:
+            auth_cache.set_claims(token, claims)
+    return claims
 
 
-async def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
-) -> CurrentUser:
-    if not credentials:
-        return CurrentUser()
+async def get_user_snapshot(db: AsyncSession, user_id: int) -> Optional[UserSnapshot]:
+    snapshot = auth_cache.get_user(user_id)
+    if snapshot is None:
+        user = await get_user_by_id(db, user_id)
+        if not user:
+            return None
+        snapshot = UserSnapshot(id=user.id, is_active=user.is_active)
+        auth_cache.set_user(snapshot)
+    return snapshot
 
-    payload = verify_token(credentials.credentials)
+
+async def _active_user_id_from_token(db: AsyncSession, token: str) -> Optional[int]:
+    payload = verify_token_cached(token)
     if not payload:
-        return CurrentUser()
+        return None
 
     user_id = payload.get("sub")
     if not user_id:
-        return CurrentUser()
+        return None
+
+    snapshot = await get_user_snapshot(db, int(user_id))
+    if not snapshot or not snapshot.is_active:
+        return None
+
+    return snapshot.id
+
 
-    user = get_user_by_id(db, int(user_id))
-    if not user or not user.is_active:
+class CurrentUser:
+    def __init__(self, user_id: Optional[int] = None):
+        self.user_id = user_id
+        self.is_authenticated = user_id is not None
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> CurrentUser:
+    if not credentials:
         return CurrentUser()
 
-    return CurrentUser(user=user)
+    return CurrentUser(
+        user_id=await _active_user_id_from_token(db, credentials.credentials)
+    )
 
 
-async def require_auth(current_user: CurrentUser = Depends(get_current_user)) -> User:
+async def require_auth(
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     if not current_user.is_authenticated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication required",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return current_user.user
+    return current_user
 
 
 async def get_user_if_bearer(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Optional[User]:
     if not credentials:
         return None
 
-    payload = verify_token(credentials.credentials)
-    if not payload:
-        return None
-
-    user_id = payload.get("sub")
-    if not user_id:
-        return None
-
-    user = get_user_by_id(db, int(user_id))
-    if not user or not user.is_active:
+    user_id = await _active_user_id_from_token(db, credentials.credentials)
+    if user_id is None:
         return None
 
-    return user
+    return await get_user_by_id(db, user_id)
 
 
 def verify_api_key(api_key: str) -> bool:
@@ -79,29 +99,24 @@ def verify_api_key(api_key: str) -> bool:
 
 
 class AuthResult:
-    def __init__(self, user: Optional[User] = None, api_key: Optional[str] = None):
-        self.user = user
+    def __init__(self, user_id: Optional[int] = None, api_key: Optional[str] = None):
+        self.user_id = user_id
         self.api_key = api_key
-        self.is_authenticated = user is not None or api_key is not None
-        self.user_id = user.id if user else None
-        self.auth_type = "user" if user else "api_key" if api_key else "none"
+        self.is_authenticated = user_id is not None or api_key is not None
+        self.auth_type = "user" if user_id else "api_key" if api_key else "none"
 
 
 async def auth_with_separate_schemes(
     authorization: Optional[str] = Header(None),
     x_api_key: Optional[str] = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> AuthResult:
     if authorization and authorization.startswith("Bearer "):
         token = authorization[7:]
 
-        payload = verify_token(token)
-        if payload:
-            user_id = payload.get("sub")
-            if user_id:
-                user = get_user_by_id(db, int(user_id))
-                if user and user.is_active:
-                    return AuthResult(user=user)
+        user_id = await _active_user_id_from_token(db, token)
+        if user_id is not None:
+            return AuthResult(user_id=user_id)
 
         if verify_api_key(token):
             return AuthResult(api_key=token)
@@ -1,5 +1,6 @@
 """Authentication service."""
 
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -7,6 +8,8 @@ from jose import JWTError, jwt
 
 from ...core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -30,8 +33,7 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
-        print(f"Token verified successfully: {payload}")
         return payload
     except JWTError as e:
-        print(f"Token verification failed: {e}")
+        logger.debug("Token verification failed: %s", e)
         return None
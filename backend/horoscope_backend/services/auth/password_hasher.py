@@ -0,0 +1,107 @@
+"""Argon2 hashing on a bounded thread pool, off the event loop."""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+from ...core.config import settings
+from ...core.metrics import metrics
+from ...crud.auth_crud import pwd_context
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+queue_depth = metrics.gauge(
+    "password_hash_queue_depth", "Password operations waiting for a worker."
+)
+in_flight = metrics.gauge(
+    "password_hash_in_flight", "Password operations currently running."
+)
+duration = metrics.histogram(
+    "password_hash_seconds", "Wall time of password operations, including queueing."
+)
+rehashes = metrics.counter(
+    "password_rehash_total", "Hashes upgraded on login after a cost change."
+)
+
+
+def _normalize(password: str) -> str:
+    # Same normalisation as auth_crud.get_password_hash
+    if not isinstance(password, str):
+        password = str(password)
+    return password[:72]
+
+
+class PasswordHasher:
+    """Runs argon2 on a dedicated thread pool (argon2-cffi releases the GIL).
+
+    At most `max_workers` operations run at once; further callers wait on
+    the event loop and are counted in `password_hash_queue_depth`.
+    """
+
+    def __init__(self, context: CryptContext = pwd_context, max_workers: int = 4):
+        self.context = context
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+    async def _run(self, op: str, fn: Callable[[], T]) -> T:
+        self._ensure_started()
+        start = time.perf_counter()
+        queue_depth.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            queue_depth.dec()
+        in_flight.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn)
+        finally:
+            in_flight.dec()
+            self._slots.release()
+            duration.observe(time.perf_counter() - start, op=op)
+
+    async def hash(self, password: str) -> str:
+        secret = _normalize(password)
+        return await self._run("hash", lambda: self.context.hash(secret))
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password and return a new hash if the stored one uses
+        outdated parameters."""
+        secret = _normalize(password)
+
+        def verify() -> Tuple[bool, Optional[str]]:
+            try:
+                return self.context.verify_and_update(secret, hashed_password)
+            except ValueError:
+                logger.warning("Password verification error", exc_info=True)
+                return False, None
+
+        valid, new_hash = await self._run("verify", verify)
+        if valid and new_hash:
+            rehashes.inc()
+        return valid, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = None
+
+
+password_hasher = PasswordHasher(max_workers=settings.password_hash_workers)
@@ -1,18 +1,75 @@
 import json
-import random
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from zodiac_sign import get_zodiac_sign
 from zoneinfo import ZoneInfo
 
+from ...core.metrics import metrics
+from ...utils.json_schema import dataclass_json_schema
+from ...utils.single_flight import SingleFlight
 from ..ai.ai_provider_base import (
     AIProvider,
     ChatInput,
+    ChatOutput,
+    JSONSchemaSpec,
+    ResponseFormat,
     Role,
 )
+from .horoscope_cache import (
+    NAME_PLACEHOLDER,
+    HoroscopeCache,
+    StreamingTemplateRenderer,
+    horoscope_cache_key,
+    horoscope_cache_ttl,
+    render_template,
+)
+from .json_stream import IncrementalJSONExtractor, extract_json_object
+from .prompts import (
+    BATCH_ITEM_LINE,
+    DAILY_HOROSCOPE,
+    DAILY_HOROSCOPE_BATCH,
+    FIELD_REPAIR,
+    NAME_HINT,
+    PromptTemplate,
+    SamplingParams,
+    sampling_params,
+)
+from .semantic_cache import SemanticCache, SemanticLookup
+
+REQUIRED_FIELDS = [
+    "headline",
+    "reading",
+    "lucky_color",
+    "lucky_number",
+    "mood",
+    "focus",
+    "do",
+    "dont",
+    "best_time_window",
+]
+
+generation_outcomes = metrics.counter(
+    "horoscope_generation_outcomes_total",
+    "How model output became a reading: ok, repaired, retried, fallback, failed.",
+)
+
+ZODIAC_SIGNS = [
+    "Aries",
+    "Taurus",
+    "Gemini",
+    "Cancer",
+    "Leo",
+    "Virgo",
+    "Libra",
+    "Scorpio",
+    "Sagittarius",
+    "Capricorn",
+    "Aquarius",
+    "Pisces",
+]
 
 
 class HoroscopeServiceError(Exception):
@@ -45,13 +102,6 @@ def clean_name(name: Optional[str]) -> str:
     return re.sub(r"[^A-Za-zÀ-ÿ' \-]", "", name)[:40] or "friend"
 
 
-def strip_code_fences(s: str) -> str:
-    """Remove markdown code fences like ```json ... ``` from model output."""
-    return re.sub(
-        r"^```(?:json)?\s*|\s*```$", "", s.strip(), flags=re.IGNORECASE | re.MULTILINE
-    )
-
-
 @dataclass
 class HoroscopeResult:
     headline: str
@@ -68,12 +118,71 @@ class HoroscopeResult:
     raw_text: Optional[str] = None
     finish_reason: Optional[str] = None
     usage: Dict[str, int] = None
+    prompt_version: Optional[str] = None
+
+
+# Constrains schema-capable providers to exactly the fields of a reading.
+HOROSCOPE_JSON_SCHEMA = JSONSchemaSpec(
+    name="horoscope",
+    schema=dataclass_json_schema(
+        HoroscopeResult,
+        exclude=("raw_text", "finish_reason", "usage", "prompt_version"),
+        overrides={
+            "mood": {"enum": ["calm", "confident", "curious", "playful", "focused"]}
+        },
+    ),
+)
+
+
+# Output budget per reading when several are requested in one completion.
+BATCH_TOKENS_PER_ITEM = 600
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    sign: str
+    on_date: date
+    tz: str
+    variation: int = 0
+
+
+@dataclass
+class BatchGeneration:
+    templates: Dict[BatchItem, Dict[str, Any]] = field(default_factory=dict)
+    cached: List[BatchItem] = field(default_factory=list)
+    failed: List[BatchItem] = field(default_factory=list)
+    usage: Dict[str, int] = field(default_factory=dict)
+    calls: int = 0
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    type: str  # "delta", "field" or "result"
+    data: Any
+
+
+# Shared by every service instance in the process so concurrent requests
+# for the same uncached key make a single provider call.
+generation_flights = SingleFlight()
 
 
 class HoroscopeAIService:
-    def __init__(self, provider: AIProvider, default_tz: str = "Europe/Amsterdam"):
+    prompt: PromptTemplate = DAILY_HOROSCOPE
+
+    def __init__(
+        self,
+        provider: AIProvider,
+        default_tz: str = "Europe/Amsterdam",
+        cache: Optional[HoroscopeCache] = None,
+        flights: Optional[SingleFlight] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+    ):
         self.provider = provider
         self.default_tz = default_tz
+        self.cache = cache
+        self.flights = flights or generation_flights
+        # Matches are served from `cache`, so this only applies alongside it.
+        self.semantic_cache = semantic_cache if cache is not None else None
 
     async def generate_horoscope(
         self,
@@ -91,134 +200,519 @@ class HoroscopeAIService:
         safe_name = clean_name(name)
         tz = tz or self.default_tz
         today = on_date or today_in_tz(tz)
-        sign = get_zodiac_sign(dob.month, dob.day)
-        mood = random.choice(
-            [
-                "Write with a calm, balanced tone that feels grounded and peaceful.",
-                "Write with a confident, encouraging tone that inspires self-belief.",
-                "Write with a curious tone that invites discovery and gentle reflection.",
-                "Write with a playful, lighthearted tone full of optimism.",
-                "Write with a focused, determined tone that promotes clarity and drive.",
-                "Write with an empathetic, anxious undertone that acknowledges uncertainty but stays hopeful.",
-                "Write with a restless, energetic tone that encourages movement and change.",
-                "Write with a compassionate, overwhelmed tone that guides toward regaining balance.",
-                "Write with a soft, tired tone that suggests rest, recovery, and patience.",
-                "Write with a distracted, wandering tone that still finds small moments of meaning.",
-                "Write with a pensive, introspective tone that encourages inner thought.",
-                "Write with an emotional, heartfelt tone that feels sincere and raw.",
-                "Write with an uncertain but honest tone that reassures and comforts.",
+        sign = get_zodiac_sign(dob)
+
+        if self.cache is None:
+            payload, out, _ = await self._generate_payload(
+                name=safe_name,
+                sign=sign,
+                today=today,
+                tz=tz,
+                variation=variation,
+                strict=strict,
+            )
+            return self._to_result(payload, out.get("text"), out.get("usage", {}))
+
+        template, out = await self._cached_template(
+            sign=sign, today=today, tz=tz, variation=variation, strict=strict
+        )
+        if out is None:
+            return self._to_result(render_template(template, safe_name), None, {})
+        return self._to_result(
+            render_template(template, safe_name),
+            render_template(out.get("text"), safe_name),
+            out.get("usage", {}),
+        )
+
+    async def warm_template(
+        self, *, sign: str, on_date: date, tz: str, variation: int = 0
+    ) -> Dict[str, int]:
+        """Make sure the cached template for this key exists.
+
+        Returns the token usage spent, which is empty when the template was
+        already cached. Raises HoroscopeServiceError if no valid reading
+        could be generated.
+        """
+        if self.cache is None:
+            raise HoroscopeServiceError("Warming requires a horoscope cache.")
+        _, out = await self._cached_template(
+            sign=sign, today=on_date, tz=tz, variation=variation, strict=True
+        )
+        return (out or {}).get("usage", {})
+
+    async def generate_batch(
+        self, items: Sequence[BatchItem], *, max_calls: int = 2
+    ) -> BatchGeneration:
+        """Generate name-free templates for several keys per completion.
+
+        Items are sent under short ids and come back as one JSON object
+        keyed by id, so each reading is validated on its own and a
+        truncated completion still yields the readings that closed. Only
+        the items that failed are requested again, for at most `max_calls`
+        provider calls in total.
+        """
+        outcome = BatchGeneration()
+        pending = {f"r{i}": item for i, item in enumerate(items, 1)}
+        while pending and outcome.calls < max_calls:
+            out = await self.provider.generate(self._batch_chat_input(pending))
+            outcome.calls += 1
+            outcome.usage = self._combine_outputs(ChatOutput(usage=outcome.usage), out)[
+                "usage"
             ]
+            for item_id, payload in self._parse_json(out.get("text", "")).items():
+                item = pending.get(item_id)
+                if item is not None and self._looks_ok(payload):
+                    outcome.templates[item] = payload
+                    del pending[item_id]
+        outcome.failed = list(pending.values())
+        return outcome
+
+    async def warm_batch(self, items: Sequence[BatchItem]) -> BatchGeneration:
+        """Batch counterpart of warm_template: generate and cache every item
+        that is not cached yet."""
+        if self.cache is None:
+            raise HoroscopeServiceError("Warming requires a horoscope cache.")
+        missing, cached = [], []
+        for item in items:
+            template = await self.get_cached_template(item)
+            (cached if template is not None else missing).append(item)
+
+        outcome = await self.generate_batch(missing) if missing else BatchGeneration()
+        outcome.cached = cached
+        for item, template in outcome.templates.items():
+            # Batch output is cached under its own prompt's namespace, so
+            # editing the batch prompt invalidates only what it produced.
+            await self.cache.set(
+                self._cache_key(item, DAILY_HOROSCOPE_BATCH),
+                {**template, "prompt_version": DAILY_HOROSCOPE_BATCH.prompt_id},
+                horoscope_cache_ttl(item.tz, item.on_date),
+            )
+        return outcome
+
+    def template_request(self, item: BatchItem) -> ChatInput:
+        """The chat request that generates the name-free template for `item`,
+        for callers that submit it themselves (e.g. through a bulk job)."""
+        sampling = sampling_params(item.sign, item.on_date, item.variation)
+        system_prompt, user_prompt = self._build_prompts(
+            name=NAME_PLACEHOLDER,
+            sign=item.sign,
+            today=item.on_date,
+            tz=item.tz,
+            variation=item.variation,
         )
+        return self._chat_input(system_prompt, user_prompt, sampling=sampling)
 
-        system_prompt = f"""
-You are a friendly astrologer.
-
-TASK
-Return EXACTLY ONE JSON object that matches the schema below. Do not include markdown, code fences, prose, or explanations. Output must be valid JSON.
-
-STYLE
-• {mood}
-• No medical, legal, or financial advice.
-
-SCHEMA (order keys exactly as listed)
-{{
-  "headline": string (≤140 chars),
-  "reading": string (120–180 words, plain text),
-  "lucky_color": string (single word or simple color name),
-  "lucky_number": integer (1–99),
-  "mood": one of ["calm","confident","curious","playful","focused"],
-  "focus": array of 2–3 short strings,
-  "do": array of exactly 3 short strings (imperative),
-  "dont": array of exactly 2 short strings (imperative, positive phrasing without “not” if possible),
-  "best_time_window": string "HH:MM–HH:MM" 24h format,
-  "compatibility_sign": optional string (one of the 12 zodiac signs) — OMIT this key if unknown
-}}
-
-RULES
-• Do not add extra keys.
-• Arrays must contain strings only (no emojis-only items).
-• Use the user’s name in "headline" or first sentence of "reading".
-• Mention the zodiac sign in the reading.
-• Keep claims general; avoid absolutes.
-"""
-
-        user_prompt = f"""
-Name: {safe_name}
-Zodiac sign: {sign}
-Date: {today.isoformat()}
-Timezone: {tz}
-Variation: {variation}
-
-Output: Return the JSON object ONLY, with keys in the specified order.
-"""
+    async def store_template(self, item: BatchItem, out: ChatOutput) -> bool:
+        """Validate a completion for `template_request(item)` and cache it.
 
-        out = await self.provider.generate(
-            ChatInput(
-                messages=[
-                    {"role": Role.SYSTEM, "content": system_prompt},
-                    {"role": Role.USER, "content": user_prompt},
-                ]
+        Returns False, caching nothing, when the output is unusable.
+        """
+        if self.cache is None:
+            raise HoroscopeServiceError("Warming requires a horoscope cache.")
+        payload = self._parse_json(out.get("text") or "")
+        if not self._looks_ok(payload):
+            return False
+        await self.cache.set(
+            self._cache_key(item), payload, horoscope_cache_ttl(item.tz, item.on_date)
+        )
+        return True
+
+    def _cache_key(
+        self, item: BatchItem, prompt: Optional[PromptTemplate] = None
+    ) -> str:
+        return horoscope_cache_key(
+            sign=item.sign,
+            on_date=item.on_date,
+            tz=item.tz,
+            variation=item.variation,
+            prompt_version=(prompt or self.prompt).prompt_id,
+        )
+
+    async def get_cached_template(self, item: BatchItem) -> Optional[Dict[str, Any]]:
+        """The cached template for `item`: one from the live prompt, else
+        one warmed by the batch prompt."""
+        template = await self.cache.get(self._cache_key(item))
+        if template is None:
+            template = await self.cache.get(
+                self._cache_key(item, DAILY_HOROSCOPE_BATCH)
+            )
+        return template
+
+    def _batch_chat_input(self, pending: Dict[str, BatchItem]) -> ChatInput:
+        lines = [
+            BATCH_ITEM_LINE.format(
+                id=item_id,
+                sign=item.sign,
+                date=item.on_date.isoformat(),
+                tz=item.tz,
+                variation=item.variation,
+                tone=sampling_params(item.sign, item.on_date, item.variation).tone,
+            )
+            for item_id, item in pending.items()
+        ]
+        user_prompt = DAILY_HOROSCOPE_BATCH.render_user(
+            name=NAME_PLACEHOLDER, name_hint=NAME_HINT, items="\n".join(lines)
+        )
+        chat = self._chat_input(
+            DAILY_HOROSCOPE_BATCH.system, user_prompt, full_schema=False
+        )
+        chat["max_tokens"] = BATCH_TOKENS_PER_ITEM * len(pending)
+        return chat
+
+    async def generate_horoscope_stream(
+        self,
+        *,
+        name: Optional[str],
+        dob: date,
+        tz: Optional[str] = None,
+        on_date: Optional[date] = None,
+        variation: int = 0,
+    ) -> AsyncIterator[StreamEvent]:
+        """Like generate_horoscope, but yields the model's text as it arrives.
+
+        Yields "delta" events carrying raw output text and a "field" event
+        with a (key, value) pair as each top-level field closes, and ends
+        with one "result" event carrying the validated HoroscopeResult. A cache hit
+        yields the result straight away. If the streamed output is invalid
+        the reading is retried without streaming, so the final result can
+        differ from the deltas that preceded it.
+        """
+        if not isinstance(dob, date):
+            raise HoroscopeServiceError("`dob` must be a datetime.date instance.")
+
+        safe_name = clean_name(name)
+        tz = tz or self.default_tz
+        today = on_date or today_in_tz(tz)
+        sign = get_zodiac_sign(dob)
+
+        key = None
+        lookup: Optional[SemanticLookup] = None
+        if self.cache is not None:
+            item = BatchItem(sign=sign, on_date=today, tz=tz, variation=variation)
+            key = self._cache_key(item)
+            template = await self.get_cached_template(item)
+            if template is None:
+                lookup = await self._semantic_lookup(
+                    key, sign=sign, today=today, tz=tz, variation=variation
+                )
+                template = lookup.template if lookup is not None else None
+            if template is not None:
+                result = self._to_result(render_template(template, safe_name), None, {})
+                yield StreamEvent("result", result)
+                return
+
+        prompt_name = safe_name if key is None else NAME_PLACEHOLDER
+        sampling = sampling_params(sign, today, variation)
+        system_prompt, user_prompt = self._build_prompts(
+            name=prompt_name, sign=sign, today=today, tz=tz, variation=variation
+        )
+        renderer = StreamingTemplateRenderer(safe_name)
+        extractor = IncrementalJSONExtractor()
+        parts: List[str] = []
+        out = ChatOutput(usage={})
+        async for chunk in self.provider.generate_stream(
+            self._chat_input(system_prompt, user_prompt, sampling=sampling)
+        ):
+            if chunk.get("delta"):
+                parts.append(chunk["delta"])
+                text = renderer.feed(chunk["delta"])
+                if text:
+                    yield StreamEvent("delta", text)
+                for field, value in extractor.feed(chunk["delta"]):
+                    yield StreamEvent(
+                        "field", (field, render_template(value, safe_name))
+                    )
+            if chunk.get("usage"):
+                out["usage"] = chunk["usage"]
+            if chunk.get("finish_reason"):
+                out["finish_reason"] = chunk["finish_reason"]
+        tail = renderer.flush()
+        if tail:
+            yield StreamEvent("delta", tail)
+        out["text"] = "".join(parts)
+
+        payload, out, is_fallback = await self._validate_or_retry(
+            out,
+            system_prompt,
+            user_prompt,
+            name=prompt_name,
+            sign=sign,
+            strict=False,
+            parsed=extractor.fields,
+            sampling=sampling,
+        )
+        if key is not None and not is_fallback:
+            await self.cache.set(key, payload, horoscope_cache_ttl(tz, today))
+            if lookup is not None:
+                await self.semantic_cache.remember(lookup, key)
+        result = self._to_result(
+            render_template(payload, safe_name),
+            render_template(out.get("text"), safe_name),
+            out.get("usage", {}),
+        )
+        yield StreamEvent("result", result)
+
+    async def _cached_template(
+        self, *, sign: str, today: date, tz: str, variation: int, strict: bool
+    ) -> Tuple[Dict[str, Any], Optional[ChatOutput]]:
+        """Return the name-free template for a key, generating it on a miss.
+
+        Concurrent misses for the same key share one provider call. The
+        provider output is returned only to the caller that made the call
+        and is None on a cache hit or a shared result.
+        """
+        item = BatchItem(sign=sign, on_date=today, tz=tz, variation=variation)
+        key = self._cache_key(item)
+        template = await self.get_cached_template(item)
+        if template is not None:
+            return template, None
+
+        async def generate() -> Tuple[Dict[str, Any], Optional[ChatOutput]]:
+            lookup = await self._semantic_lookup(
+                key, sign=sign, today=today, tz=tz, variation=variation
             )
+            if lookup is not None and lookup.hit:
+                return lookup.template, None
+            template, out, is_fallback = await self._generate_payload(
+                name=NAME_PLACEHOLDER,
+                sign=sign,
+                today=today,
+                tz=tz,
+                variation=variation,
+                strict=strict,
+            )
+            if not is_fallback:
+                await self.cache.set(key, template, horoscope_cache_ttl(tz, today))
+                if lookup is not None:
+                    await self.semantic_cache.remember(lookup, key)
+            return template, out
+
+        # Strict and lenient callers differ in how failures surface, so they
+        # do not share a flight.
+        (template, out), shared = await self.flights.do((key, strict), generate)
+        if shared:
+            return template, None
+        return template, out
+
+    async def _semantic_lookup(
+        self, key: str, *, sign: str, today: date, tz: str, variation: int
+    ) -> Optional[SemanticLookup]:
+        """Semantic cache lookup after an exact miss on `key`; a hit is also
+        cached under `key` so repeats of this request are exact hits."""
+        if self.semantic_cache is None:
+            return None
+        lookup = await self.semantic_cache.lookup(
+            self.cache, sign=sign, on_date=today, tz=tz, variation=variation
         )
-        parsed = self._parse_json(out.get("text", ""))
+        if lookup is not None and lookup.hit:
+            await self.cache.set(key, lookup.template, horoscope_cache_ttl(tz, today))
+        return lookup
 
-        if not self._looks_ok(parsed):
+    async def _generate_payload(
+        self,
+        *,
+        name: str,
+        sign: str,
+        today: date,
+        tz: str,
+        variation: int,
+        strict: bool,
+    ) -> Tuple[Dict[str, Any], ChatOutput, bool]:
+        """Ask the provider for one reading.
+
+        Returns the parsed payload, the provider output it came from and
+        whether the payload is the static fallback.
+        """
+        sampling = sampling_params(sign, today, variation)
+        system_prompt, user_prompt = self._build_prompts(
+            name=name, sign=sign, today=today, tz=tz, variation=variation
+        )
+        out = await self.provider.generate(
+            self._chat_input(system_prompt, user_prompt, sampling=sampling)
+        )
+        return await self._validate_or_retry(
+            out,
+            system_prompt,
+            user_prompt,
+            name=name,
+            sign=sign,
+            strict=strict,
+            sampling=sampling,
+        )
+
+    def _chat_input(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        full_schema: bool = True,
+        sampling: Optional[SamplingParams] = None,
+    ) -> ChatInput:
+        """Build a chat request using the strongest output format the provider
+        offers; `full_schema=False` is for requests that return only some of
+        the fields."""
+        chat = ChatInput(
+            messages=[
+                {"role": Role.SYSTEM, "content": system_prompt},
+                {"role": Role.USER, "content": user_prompt},
+            ]
+        )
+        capabilities = self.provider.capabilities
+        if full_schema and capabilities.json_schema:
+            chat["response_format"] = ResponseFormat.JSON_SCHEMA
+            chat["json_schema"] = HOROSCOPE_JSON_SCHEMA
+        elif capabilities.json_mode:
+            chat["response_format"] = ResponseFormat.JSON_OBJECT
+        if sampling is not None:
+            chat["seed"] = sampling.seed
+            chat["temperature"] = sampling.temperature
+        return chat
+
+    def _build_prompts(
+        self, *, name: str, sign: str, today: date, tz: str, variation: int
+    ) -> Tuple[str, str]:
+        user_prompt = self.prompt.render_user(
+            name=name,
+            sign=sign,
+            date=today.isoformat(),
+            tz=tz,
+            variation=variation,
+            tone=sampling_params(sign, today, variation).tone,
+            name_hint=NAME_HINT if name == NAME_PLACEHOLDER else "",
+        )
+        return self.prompt.system, user_prompt
+
+    async def _validate_or_retry(
+        self,
+        out: ChatOutput,
+        system_prompt: str,
+        user_prompt: str,
+        *,
+        name: str,
+        sign: str,
+        strict: bool,
+        parsed: Optional[Dict[str, Any]] = None,
+        sampling: Optional[SamplingParams] = None,
+    ) -> Tuple[Dict[str, Any], ChatOutput, bool]:
+        """Turn provider output into a complete payload.
+
+        Usable fields are kept and only the rest are asked for again with a
+        small repair prompt; a full regeneration is only made when nothing
+        usable came back. Neither is attempted when the provider enforced
+        the schema. Fields that are still bad after that take their
+        value from the fallback payload, or raise when `strict`.
+        """
+        if parsed is None:
+            parsed = self._parse_json(out.get("text", ""))
+        bad = self._invalid_fields(parsed)
+        if not bad:
+            generation_outcomes.inc(outcome="ok")
+            return parsed, out, False
+
+        if self._schema_guaranteed(parsed, out):
+            # Schema-constrained output cannot improve on another call; only
+            # the per-field fallback below can help with what is left.
+            payload, outcome, last_text = parsed, "ok", out.get("text", "")
+        elif len(bad) < len(REQUIRED_FIELDS):
+            payload = {k: v for k, v in parsed.items() if k not in bad}
+            repair_system, repair_user = self._build_repair_prompts(
+                name, sign, bad, payload
+            )
+            repair_out = await self.provider.generate(
+                self._chat_input(repair_system, repair_user, full_schema=False)
+            )
+            repaired = self._parse_json(repair_out.get("text", ""))
+            payload.update({k: repaired[k] for k in bad if k in repaired})
+            outcome, last_text = "repaired", repair_out.get("text", "")
+            out = self._combine_outputs(out, repair_out)
+        else:
             retry_user_prompt = (
                 user_prompt
                 + "\nYour previous output was invalid. Return ONE valid JSON object ONLY. No markdown or commentary."
             )
             out2 = await self.provider.generate(
-                ChatInput(
-                    messages=[
-                        {"role": Role.SYSTEM, "content": system_prompt},
-                        {"role": Role.USER, "content": retry_user_prompt},
-                    ]
-                )
+                self._chat_input(system_prompt, retry_user_prompt, sampling=sampling)
             )
-            parsed = self._parse_json(out2.get("text", ""))
-
-            if not self._looks_ok(parsed):
-                if strict:
-                    if not parsed:
-                        raise JSONParseError(out2.get("text", ""))
-                    raise InvalidPayloadError(parsed)
-                parsed = self._fallback_payload(safe_name, sign)
-                return self._to_result(parsed, out2.get("text"), out2.get("usage", {}))
+            payload = self._parse_json(out2.get("text", ""))
+            outcome, last_text = "retried", out2.get("text", "")
+            out = self._combine_outputs(out, out2, text=out2.get("text"))
+
+        bad = self._invalid_fields(payload)
+        if not bad:
+            generation_outcomes.inc(outcome=outcome)
+            return payload, out, False
+
+        if strict:
+            generation_outcomes.inc(outcome="failed")
+            if not payload:
+                raise JSONParseError(last_text)
+            raise InvalidPayloadError(payload)
+
+        generation_outcomes.inc(outcome="fallback")
+        fallback = self._fallback_payload(name, sign)
+        payload = {k: v for k, v in payload.items() if k not in bad}
+        payload.update({k: fallback[k] for k in bad})
+        return payload, out, True
+
+    def _schema_guaranteed(self, parsed: Dict[str, Any], out: ChatOutput) -> bool:
+        """Whether the provider enforced the reading schema on this output.
+
+        Truncated output and refusals are not covered by the guarantee.
+        """
+        return (
+            self.provider.capabilities.json_schema
+            and bool(parsed)
+            and out.get("finish_reason") != "length"
+        )
 
-            return self._to_result(parsed, out2.get("text"), out2.get("usage", {}))
+    def _build_repair_prompts(
+        self, name: str, sign: str, keys: List[str], valid: Dict[str, Any]
+    ) -> Tuple[str, str]:
+        user_prompt = FIELD_REPAIR.render_user(
+            name=name,
+            sign=sign,
+            name_hint=NAME_HINT if name == NAME_PLACEHOLDER else "",
+            keys=", ".join(keys),
+            context=json.dumps(valid, ensure_ascii=False)[:600],
+        )
+        return FIELD_REPAIR.system, user_prompt
+
+    def _combine_outputs(
+        self, first: ChatOutput, second: ChatOutput, text: Optional[str] = None
+    ) -> ChatOutput:
+        usage: Dict[str, int] = dict(first.get("usage") or {})
+        for k, v in (second.get("usage") or {}).items():
+            usage[k] = usage.get(k, 0) + v
+        return ChatOutput(
+            text=text if text is not None else first.get("text", ""),
+            usage=usage,
+            finish_reason=second.get("finish_reason") or first.get("finish_reason"),
+        )
 
-        return self._to_result(parsed, out.get("text"), out.get("usage", {}))
+    def _invalid_fields(self, p: Dict[str, Any]) -> List[str]:
+        """Required fields that are missing or have the wrong shape."""
+        if not isinstance(p, dict):
+            return list(REQUIRED_FIELDS)
+        bad = []
+        for k in REQUIRED_FIELDS:
+            v = p.get(k)
+            if k == "lucky_number":
+                ok = isinstance(v, int) and not isinstance(v, bool)
+            elif k in ("focus", "do", "dont"):
+                ok = isinstance(v, list) and bool(v)
+                ok = ok and all(isinstance(x, str) and x.strip() for x in v)
+            else:
+                ok = isinstance(v, str) and bool(v.strip())
+            if not ok:
+                bad.append(k)
+        return bad
 
     def _parse_json(self, text: str) -> Dict[str, Any]:
         if not text:
             return {}
-        body = strip_code_fences(text)
-        try:
-            return json.loads(body)
-        except json.JSONDecodeError:
-            m = re.search(r"\{.*\}", body, flags=re.DOTALL)
-            if not m:
-                return {}
-            try:
-                return json.loads(m.group(0))
-            except Exception:
-                return {}
+        return extract_json_object(text)
 
     def _looks_ok(self, p: Dict[str, Any]) -> bool:
-        if not isinstance(p, dict):
-            return False
-        required = [
-            "headline",
-            "reading",
-            "lucky_color",
-            "lucky_number",
-            "mood",
-            "focus",
-            "do",
-            "dont",
-            "best_time_window",
-        ]
-        return all(k in p for k in required)
+        return not self._invalid_fields(p)
 
     def _clamp_int(self, n: Any, lo: int, hi: int) -> int:
         try:
@@ -271,4 +765,6 @@ Output: Return the JSON object ONLY, with keys in the specified order.
             raw_text=raw_text,
             finish_reason=None,
             usage=meta or {},
+            # Templates warmed by another prompt record which one made them.
+            prompt_version=p.get("prompt_version") or self.prompt.prompt_id,
         )
@@ -0,0 +1,199 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+
+from ...core.config import settings
+from ...utils.common import seconds_until_end_of_day
+from ...utils.lru_cache import TTLLRUCache
+from .prompts import DAILY_HOROSCOPE
+
+# Readings are generated for this placeholder and cached name-free; the real
+# (cleaned) name is substituted when a cached template is served.
+NAME_PLACEHOLDER = "{{name}}"
+
+CACHE_KEY_VERSION = "v2"
+MIN_TTL_SECONDS = 60.0
+MAX_TTL_SECONDS = 7 * 24 * 3600.0
+
+
+def render_template(value: Any, name: str) -> Any:
+    """Replace NAME_PLACEHOLDER with `name` in strings and string lists."""
+    if isinstance(value, str):
+        return value.replace(NAME_PLACEHOLDER, name)
+    if isinstance(value, list):
+        return [render_template(v, name) for v in value]
+    if isinstance(value, dict):
+        return {k: render_template(v, name) for k, v in value.items()}
+    return value
+
+
+class StreamingTemplateRenderer:
+    """Fills NAME_PLACEHOLDER into text that arrives in arbitrary chunks.
+
+    A chunk ending in what could be the start of the placeholder is held
+    back until the next chunk shows whether it is one.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        text = (self._pending + chunk).replace(NAME_PLACEHOLDER, self.name)
+        hold = 0
+        for n in range(min(len(NAME_PLACEHOLDER) - 1, len(text)), 0, -1):
+            if NAME_PLACEHOLDER.startswith(text[-n:]):
+                hold = n
+                break
+        self._pending = text[len(text) - hold :]
+        return text[: len(text) - hold]
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return text
+
+
+def horoscope_cache_key(
+    *,
+    sign: str,
+    on_date: date,
+    tz: str,
+    variation: int,
+    prompt_version: str = DAILY_HOROSCOPE.prompt_id,
+) -> str:
+    return (
+        f"horoscope:{CACHE_KEY_VERSION}:{prompt_version}:{sign.lower()}"
+        f":{on_date.isoformat()}:{tz}:{variation}"
+    )
+
+
+def horoscope_cache_ttl(tz: str, on_date: date) -> float:
+    """Keep entries until the end of `on_date` in the requested timezone."""
+    ttl = seconds_until_end_of_day(tz, on_date)
+    return max(MIN_TTL_SECONDS, min(MAX_TTL_SECONDS, ttl))
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        return None
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int = 10000):
+        self._lru: TTLLRUCache[Dict[str, Any]] = TTLLRUCache(max_entries=max_entries)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._lru.get(key)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        self._lru.set(key, value, ttl_seconds)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend for any client exposing the async redis-py API subset
+    `get`, `set(..., ex=...)` and `aclose` (Redis, Valkey, KeyDB, fakes)."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "A shared horoscope cache requires the `redis` package."
+            ) from e
+        return cls(redis_asyncio.from_url(url))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8")
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        await self.client.set(
+            key, json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl_seconds))
+        )
+
+    async def aclose(self) -> None:
+        close = getattr(self.client, "aclose", None) or getattr(
+            self.client, "close", None
+        )
+        if close is not None:
+            await close()
+
+
+class HoroscopeCache:
+    """Two-tier cache of name-free horoscope payload templates.
+
+    Reads go to the in-process LRU first and then to the optional shared
+    backend; shared hits are copied into the local tier for their remaining
+    lifetime.
+    """
+
+    def __init__(
+        self,
+        local: Optional[CacheBackend] = None,
+        shared: Optional[CacheBackend] = None,
+    ):
+        self.local = local or InMemoryCacheBackend()
+        self.shared = shared
+
+    @classmethod
+    def from_settings(cls) -> "HoroscopeCache":
+        shared = None
+        if settings.horoscope_cache_redis_url:
+            shared = RedisCacheBackend.from_url(settings.horoscope_cache_redis_url)
+        return cls(
+            local=InMemoryCacheBackend(settings.horoscope_cache_max_entries),
+            shared=shared,
+        )
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        payload = await self.local.get(key)
+        if payload is not None:
+            return payload
+        if self.shared is None:
+            return None
+        item = await self.shared.get(key)
+        if not item:
+            return None
+        remaining = item.get("expires_at", 0) - time.time()
+        if remaining > 0:
+            await self.local.set(key, item["payload"], remaining)
+        return item["payload"]
+
+    async def set(self, key: str, payload: Dict[str, Any], ttl_seconds: float) -> None:
+        await self.local.set(key, payload, ttl_seconds)
+        if self.shared is not None:
+            await self.shared.set(
+                key,
+                {"expires_at": time.time() + ttl_seconds, "payload": payload},
+                ttl_seconds,
+            )
+
+    async def aclose(self) -> None:
+        await self.local.aclose()
+        if self.shared is not None:
+            await self.shared.aclose()
+
+
+def get_horoscope_cache(request: Request) -> Optional[HoroscopeCache]:
+    """FastAPI dependency returning the shared cache, if caching is enabled."""
+    return getattr(request.app.state, "horoscope_cache", None)
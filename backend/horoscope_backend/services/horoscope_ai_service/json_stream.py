@@ -0,0 +1,106 @@
+import json
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+class IncrementalJSONExtractor:
+    """Pulls the fields of the first JSON object out of streamed model text.
+
+    Text before the opening brace (prose, code fences) is skipped and
+    anything after the closing brace is ignored. Each top-level field is
+    decoded as soon as its value closes, so callers can act on fields
+    while the rest of the object is still being generated. Values that
+    fail to decode are recorded in `invalid` instead of aborting the parse.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.invalid: Set[str] = set()
+        self.started = False
+        self.done = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_value = False
+        self._key = None
+        self._buf: List[str] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the fields it completed, in order."""
+        completed: List[Tuple[str, Any]] = []
+        for c in chunk:
+            if self.done:
+                break
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._buf.append(c)
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+
+            if c == '"':
+                self._in_string = True
+            elif self._depth == 1 and c == ":" and not self._expect_value:
+                self._key = self._decode_key()
+                self._expect_value = True
+                continue
+            elif self._depth == 1 and c in ",}":
+                if self._expect_value:
+                    field = self._close_value()
+                    if field is not None:
+                        completed.append(field)
+                self._buf = []
+                if c == "}":
+                    self._depth = 0
+                    self.done = True
+                continue
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+            self._buf.append(c)
+        return completed
+
+    def missing(self, required: Iterable[str]) -> List[str]:
+        """Required keys without a successfully decoded value."""
+        return [k for k in required if k not in self.fields]
+
+    def _decode_key(self):
+        raw = "".join(self._buf).strip()
+        self._buf = []
+        try:
+            key = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return key if isinstance(key, str) else None
+
+    def _close_value(self):
+        key, raw = self._key, "".join(self._buf).strip()
+        self._key, self._expect_value = None, False
+        if key is None:
+            return None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            self.invalid.add(key)
+            self.fields.pop(key, None)
+            return None
+        self.invalid.discard(key)
+        self.fields[key] = value
+        return key, value
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """Decoded top-level fields of the first JSON object in `text`."""
+    extractor = IncrementalJSONExtractor()
+    extractor.feed(text)
+    return extractor.fields
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from zoneinfo import ZoneInfo
+
+from ..ai.ai_provider_base import AIProviderError, BulkJob, BulkRequest
+from .horoscope_ai_service import (
+    ZODIAC_SIGNS,
+    BatchItem,
+    HoroscopeAIService,
+    HoroscopeServiceError,
+)
+from .horoscope_cache import horoscope_cache_key
+
+
+def target_date(tz: str, now: datetime, lead_hours: float) -> date:
+    """Date to warm for `tz`: tomorrow once local midnight is within
+    `lead_hours`, otherwise today."""
+    try:
+        local = now.astimezone(ZoneInfo(tz))
+    except Exception:
+        local = now.astimezone(timezone.utc)
+    if local + timedelta(hours=lead_hours) >= datetime.combine(
+        local.date() + timedelta(days=1), datetime.min.time(), tzinfo=local.tzinfo
+    ):
+        return local.date() + timedelta(days=1)
+    return local.date()
+
+
+@dataclass(frozen=True)
+class PregenerationTask:
+    sign: str
+    on_date: date
+    tz: str
+    variation: int
+
+    @property
+    def key(self) -> str:
+        return horoscope_cache_key(
+            sign=self.sign, on_date=self.on_date, tz=self.tz, variation=self.variation
+        )
+
+    def as_batch_item(self) -> BatchItem:
+        return BatchItem(
+            sign=self.sign, on_date=self.on_date, tz=self.tz, variation=self.variation
+        )
+
+
+@dataclass
+class PregenerationReport:
+    total: int = 0
+    skipped: int = 0
+    generated: int = 0
+    failed: int = 0
+    tokens_used: int = 0
+    budget_exhausted: bool = False
+    failed_keys: List[str] = field(default_factory=list)
+
+
+def load_checkpoint(path: Optional[str]) -> Set[str]:
+    """Keys recorded as done in a checkpoint file."""
+    if not path or not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                done.add(json.loads(line)["key"])
+    return done
+
+
+def mark_done(path: Optional[str], task: PregenerationTask, tokens: int) -> None:
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"key": task.key, "tokens": tokens}) + "\n")
+
+
+def build_tasks(
+    timezones: Iterable[str],
+    variations: Iterable[int],
+    *,
+    lead_hours: float,
+    now: Optional[datetime] = None,
+) -> List[PregenerationTask]:
+    now = now or datetime.now(timezone.utc)
+    variations = list(variations)
+    return [
+        PregenerationTask(
+            sign=sign, on_date=target_date(tz, now, lead_hours), tz=tz, variation=v
+        )
+        for tz in timezones
+        for sign in ZODIAC_SIGNS
+        for v in variations
+    ]
+
+
+class PregenerationJob:
+    """Warms the horoscope cache for a set of (sign, date, tz, variation) keys.
+
+    Completed keys are appended to a checkpoint file so a crashed run can be
+    restarted without repeating work. No new generations are started once
+    `token_budget` is spent; calls already in flight are allowed to finish.
+    With `batch_size` > 1, keys are generated that many per provider call.
+    """
+
+    def __init__(
+        self,
+        service: HoroscopeAIService,
+        *,
+        concurrency: int = 4,
+        batch_size: int = 1,
+        token_budget: Optional[int] = None,
+        checkpoint_path: Optional[str] = None,
+        progress_every: int = 10,
+        progress: Callable[[str], None] = print,
+    ):
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.token_budget = token_budget
+        self.checkpoint_path = checkpoint_path
+        self.progress_every = max(1, progress_every)
+        self.progress = progress
+
+    def _load_checkpoint(self) -> Set[str]:
+        return load_checkpoint(self.checkpoint_path)
+
+    def _mark_done(self, task: PregenerationTask, tokens: int) -> None:
+        mark_done(self.checkpoint_path, task, tokens)
+
+    def _budget_left(self, report: PregenerationReport) -> bool:
+        return self.token_budget is None or report.tokens_used < self.token_budget
+
+    def _report_progress(self, report: PregenerationReport) -> None:
+        finished = report.skipped + report.generated + report.failed
+        if finished % self.progress_every == 0 or finished == report.total:
+            self.progress(
+                f"[pregenerate] {finished}/{report.total} "
+                f"(generated={report.generated} skipped={report.skipped} "
+                f"failed={report.failed} tokens={report.tokens_used})"
+            )
+
+    async def run(self, tasks: List[PregenerationTask]) -> PregenerationReport:
+        report = PregenerationReport(total=len(tasks))
+        done = self._load_checkpoint()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(task: PregenerationTask) -> None:
+            async with semaphore:
+                if task.key in done:
+                    report.skipped += 1
+                elif not self._budget_left(report):
+                    report.budget_exhausted = True
+                    return
+                else:
+                    try:
+                        usage = await self.service.warm_template(
+                            sign=task.sign,
+                            on_date=task.on_date,
+                            tz=task.tz,
+                            variation=task.variation,
+                        )
+                    except (HoroscopeServiceError, AIProviderError):
+                        report.failed += 1
+                        report.failed_keys.append(task.key)
+                    else:
+                        tokens = int(usage.get("total_tokens", 0))
+                        report.tokens_used += tokens
+                        if usage:
+                            report.generated += 1
+                        else:
+                            report.skipped += 1
+                        done.add(task.key)
+                        self._mark_done(task, tokens)
+                self._report_progress(report)
+
+        async def batch_worker(batch: List[PregenerationTask]) -> None:
+            async with semaphore:
+                if not self._budget_left(report):
+                    report.budget_exhausted = True
+                    return
+                try:
+                    outcome = await self.service.warm_batch(
+                        [t.as_batch_item() for t in batch]
+                    )
+                except (HoroscopeServiceError, AIProviderError):
+                    report.failed += len(batch)
+                    report.failed_keys.extend(t.key for t in batch)
+                    self._report_progress(report)
+                    return
+                tokens = int(outcome.usage.get("total_tokens", 0))
+                report.tokens_used += tokens
+                by_item = {t.as_batch_item(): t for t in batch}
+                for item in outcome.cached:
+                    report.skipped += 1
+                    done.add(by_item[item].key)
+                    self._mark_done(by_item[item], 0)
+                for item in outcome.templates:
+                    report.generated += 1
+                    done.add(by_item[item].key)
+                    self._mark_done(by_item[item], tokens // len(outcome.templates))
+                for item in outcome.failed:
+                    report.failed += 1
+                    report.failed_keys.append(by_item[item].key)
+                self._report_progress(report)
+
+        if self.batch_size == 1:
+            await asyncio.gather(*(worker(t) for t in tasks))
+        else:
+            pending = [t for t in tasks if t.key not in done]
+            report.skipped += len(tasks) - len(pending)
+            batches = [
+                pending[i : i + self.batch_size]
+                for i in range(0, len(pending), self.batch_size)
+            ]
+            await asyncio.gather(*(batch_worker(b) for b in batches))
+        if report.budget_exhausted:
+            self.progress(
+                f"[pregenerate] token budget of {self.token_budget} reached; "
+                "re-run to resume from the checkpoint"
+            )
+        return report
+
+
+class BulkPregenerationJob:
+    """Warms the cache through the provider's offline batch API.
+
+    All uncached keys go into one bulk job, which is cheaper per token than
+    live calls but may take hours. The submitted job is recorded in
+    `state_path`, so an interrupted run resumes polling the same job
+    instead of submitting a new one.
+    """
+
+    def __init__(
+        self,
+        service: HoroscopeAIService,
+        *,
+        state_path: str,
+        checkpoint_path: Optional[str] = None,
+        poll_interval: float = 60.0,
+        progress: Callable[[str], None] = print,
+    ):
+        self.service = service
+        self.state_path = state_path
+        self.checkpoint_path = checkpoint_path
+        self.poll_interval = poll_interval
+        self.progress = progress
+
+    def _load_state(self) -> Optional[dict]:
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, job: BulkJob, tasks: Dict[str, PregenerationTask]) -> None:
+        state = {
+            "job": {"id": job.id, "status": job.status},
+            "tasks": {
+                custom_id: {
+                    "sign": t.sign,
+                    "on_date": t.on_date.isoformat(),
+                    "tz": t.tz,
+                    "variation": t.variation,
+                }
+                for custom_id, t in tasks.items()
+            },
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    async def _submit(
+        self, tasks: List[PregenerationTask], report: PregenerationReport
+    ) -> Optional[Dict[str, PregenerationTask]]:
+        done = load_checkpoint(self.checkpoint_path)
+        pending: Dict[str, PregenerationTask] = {}
+        for task in tasks:
+            if (
+                task.key in done
+                or await self.service.get_cached_template(task.as_batch_item())
+                is not None
+            ):
+                report.skipped += 1
+            else:
+                pending[f"t{len(pending)}"] = task
+        if not pending:
+            return None
+        job = await self.service.provider.submit_bulk(
+            [
+                BulkRequest(custom_id, self.service.template_request(t.as_batch_item()))
+                for custom_id, t in pending.items()
+            ]
+        )
+        self._save_state(job, pending)
+        self.progress(f"[pregenerate] submitted bulk job {job.id} ({len(pending)})")
+        return pending
+
+    async def run(self, tasks: List[PregenerationTask]) -> PregenerationReport:
+        if self.service.cache is None:
+            raise HoroscopeServiceError("Warming requires a horoscope cache.")
+        report = PregenerationReport(total=len(tasks))
+        state = self._load_state()
+        if state is None:
+            if await self._submit(tasks, report) is None:
+                return report
+            state = self._load_state()
+        else:
+            self.progress(f"[pregenerate] resuming bulk job {state['job']['id']}")
+        pending = {
+            custom_id: PregenerationTask(
+                sign=t["sign"],
+                on_date=date.fromisoformat(t["on_date"]),
+                tz=t["tz"],
+                variation=t["variation"],
+            )
+            for custom_id, t in state["tasks"].items()
+        }
+        report.total = max(report.total, report.skipped + len(pending))
+
+        job = BulkJob(id=state["job"]["id"], status=state["job"]["status"])
+        while True:
+            job = await self.service.provider.poll_bulk(job)
+            if job.finished:
+                break
+            self.progress(f"[pregenerate] bulk job {job.id} is {job.status}")
+            await asyncio.sleep(self.poll_interval)
+
+        if job.status == "completed":
+            for result in await self.service.provider.fetch_bulk(job):
+                task = pending.pop(result.custom_id, None)
+                if task is None:
+                    continue
+                out = result.output or {}
+                tokens = int(out.get("usage", {}).get("total_tokens", 0))
+                report.tokens_used += tokens
+                if result.output and await self.service.store_template(
+                    task.as_batch_item(), result.output
+                ):
+                    report.generated += 1
+                    mark_done(self.checkpoint_path, task, tokens)
+                else:
+                    report.failed += 1
+                    report.failed_keys.append(task.key)
+        else:
+            self.progress(f"[pregenerate] bulk job {job.id} ended as {job.status}")
+        # Requests without a result line failed too.
+        report.failed += len(pending)
+        report.failed_keys.extend(t.key for t in pending.values())
+        os.remove(self.state_path)
+        self.progress(
+            f"[pregenerate] bulk job {job.id}: generated={report.generated} "
+            f"failed={report.failed} tokens={report.tokens_used}"
+        )
+        return report
@@ -0,0 +1,214 @@
+"""Versioned prompt templates.
+
+System prompts are fully static so every request starts with a
+byte-identical prefix, which lets provider-side prompt caching apply.
+Everything that varies per request goes into the user message. Change the
+version whenever a template's wording changes; it is stored with each
+entry and is part of the cache key.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional
+
+# Schema lines shared by the generation and repair prompts.
+FIELD_SPECS = {
+    "headline": "string (≤140 chars)",
+    "reading": "string (120–180 words, plain text)",
+    "lucky_color": "string (single word or simple color name)",
+    "lucky_number": "integer (1–99)",
+    "mood": 'one of ["calm","confident","curious","playful","focused"]',
+    "focus": "array of 2–3 short strings",
+    "do": "array of exactly 3 short strings (imperative)",
+    "dont": "array of exactly 2 short strings (imperative, positive phrasing without “not” if possible)",
+    "best_time_window": 'string "HH:MM–HH:MM" 24h format',
+}
+
+TONES = (
+    "Write with a calm, balanced tone that feels grounded and peaceful.",
+    "Write with a confident, encouraging tone that inspires self-belief.",
+    "Write with a curious tone that invites discovery and gentle reflection.",
+    "Write with a playful, lighthearted tone full of optimism.",
+    "Write with a focused, determined tone that promotes clarity and drive.",
+    "Write with an empathetic, anxious undertone that acknowledges uncertainty but stays hopeful.",
+    "Write with a restless, energetic tone that encourages movement and change.",
+    "Write with a compassionate, overwhelmed tone that guides toward regaining balance.",
+    "Write with a soft, tired tone that suggests rest, recovery, and patience.",
+    "Write with a distracted, wandering tone that still finds small moments of meaning.",
+    "Write with a pensive, introspective tone that encourages inner thought.",
+    "Write with an emotional, heartfelt tone that feels sincere and raw.",
+    "Write with an uncertain but honest tone that reassures and comforts.",
+)
+
+NAME_HINT = "Copy the name token exactly as written; it is filled in later.\n"
+
+
+MIN_TEMPERATURE = 0.6
+MAX_TEMPERATURE = 0.9
+
+
+@dataclass(frozen=True)
+class SamplingParams:
+    tone: str
+    seed: int
+    temperature: float
+
+
+def sampling_params(sign: str, on_date: date, variation: int) -> SamplingParams:
+    """Tone, seed and temperature for a reading, derived only from its key.
+
+    The same (sign, date, variation) always yields the same prompt and
+    sampling parameters, so identical requests are cacheable and outputs
+    can be reproduced where the provider honours seeds.
+    """
+    digest = hashlib.sha256(
+        f"{sign.lower()}|{on_date.isoformat()}|{variation}".encode("utf-8")
+    ).digest()
+    tone = TONES[int.from_bytes(digest[0:4], "big") % len(TONES)]
+    seed = int.from_bytes(digest[4:8], "big") & 0x7FFFFFFF
+    spread = int.from_bytes(digest[8:10], "big") / 0xFFFF
+    temperature = MIN_TEMPERATURE + (MAX_TEMPERATURE - MIN_TEMPERATURE) * spread
+    return SamplingParams(tone=tone, seed=seed, temperature=round(temperature, 2))
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    id: str
+    version: int
+    system: str
+    user: str  # str.format template
+
+    @property
+    def prompt_id(self) -> str:
+        return f"{self.id}@v{self.version}"
+
+    def render_user(self, **fields) -> str:
+        return self.user.format(**fields)
+
+
+class PromptRegistry:
+    def __init__(self):
+        self._templates: Dict[str, Dict[int, PromptTemplate]] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        versions = self._templates.setdefault(template.id, {})
+        if template.version in versions:
+            raise ValueError(f"Prompt {template.prompt_id} is already registered")
+        versions[template.version] = template
+        return template
+
+    def get(self, id: str, version: Optional[int] = None) -> PromptTemplate:
+        """The requested version of a template, or its latest one."""
+        versions = self._templates[id]
+        return versions[max(versions) if version is None else version]
+
+
+prompts = PromptRegistry()
+
+_SCHEMA = "\n".join(f'  "{k}": {v},' for k, v in FIELD_SPECS.items())
+
+_READING_SCHEMA = f"""{{
+{_SCHEMA}
+  "compatibility_sign": optional string (one of the 12 zodiac signs) — OMIT this key if unknown
+}}"""
+
+_RULES = """• Do not add extra keys.
+• Arrays must contain strings only (no emojis-only items).
+• Use the user’s name in "headline" or first sentence of "reading".
+• Mention the zodiac sign in the reading.
+• Keep claims general; avoid absolutes."""
+
+DAILY_HOROSCOPE = prompts.register(
+    PromptTemplate(
+        id="daily_horoscope",
+        version=2,
+        system=f"""
+You are a friendly astrologer.
+
+TASK
+Return EXACTLY ONE JSON object that matches the schema below. Do not include markdown, code fences, prose, or explanations. Output must be valid JSON.
+
+STYLE
+• Write in the tone given in the request.
+• No medical, legal, or financial advice.
+
+SCHEMA (order keys exactly as listed)
+{_READING_SCHEMA}
+
+RULES
+{_RULES}
+""",
+        user="""
+Name: {name}
+Zodiac sign: {sign}
+Date: {date}
+Timezone: {tz}
+Variation: {variation}
+Tone: {tone}
+{name_hint}
+Output: Return the JSON object ONLY, with keys in the specified order.
+""",
+    )
+)
+
+# Several readings per completion for cache warming. Each reading follows
+# the DAILY_HOROSCOPE schema and rules, but batch output is cached under this
+# template's own prompt id, so editing either prompt invalidates only what it
+# produced.
+DAILY_HOROSCOPE_BATCH = prompts.register(
+    PromptTemplate(
+        id="daily_horoscope_batch",
+        version=1,
+        system=f"""
+You are a friendly astrologer.
+
+TASK
+The request lists several readings to write, each with an id. Return EXACTLY ONE JSON object whose keys are those ids and whose values are reading objects matching the schema below. Do not include markdown, code fences, prose, or explanations. Output must be valid JSON.
+
+STYLE
+• Write each reading in the tone given for its id.
+• Make every reading distinct from the others.
+• No medical, legal, or financial advice.
+
+SCHEMA (one reading; order keys exactly as listed)
+{_READING_SCHEMA}
+
+RULES
+{_RULES}
+""",
+        user="""
+Name: {name}
+{name_hint}
+Readings:
+{items}
+
+Output: Return the JSON object ONLY, keyed by id.
+""",
+    )
+)
+
+BATCH_ITEM_LINE = (
+    "- id {id}: Zodiac sign: {sign}; Date: {date}; Timezone: {tz}; "
+    "Variation: {variation}; Tone: {tone}"
+)
+
+FIELD_REPAIR = prompts.register(
+    PromptTemplate(
+        id="field_repair",
+        version=1,
+        system=f"""
+You are a friendly astrologer completing a horoscope JSON object.
+Return EXACTLY ONE JSON object containing ONLY the keys the request asks for, with no markdown or commentary. Field formats:
+{{
+{_SCHEMA}
+}}
+""",
+        user="""
+Name: {name}
+Zodiac sign: {sign}
+{name_hint}Return only these keys: {keys}
+Keep it consistent with: {context}
+""",
+    )
+)
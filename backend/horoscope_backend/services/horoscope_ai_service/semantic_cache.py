@@ -0,0 +1,173 @@
+"""Reuse a cached reading for a request that is close enough to an earlier one.
+
+Requests are described by normalized features, embedded through the
+provider's embed() and matched against earlier requests with the same
+sign, date and variation. A match above `threshold` serves the earlier
+request's cached template instead of a new chat completion.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from fastapi import Request
+
+from ...core.config import settings
+from ...core.metrics import metrics
+from ..ai.ai_provider_base import AIProvider
+from .horoscope_cache import HoroscopeCache
+from .prompts import sampling_params
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+semantic_lookups = metrics.counter(
+    "horoscope_semantic_cache_lookups_total", "Semantic cache lookups by result."
+)
+
+
+class VectorIndex(ABC):
+    """Nearest-neighbour search over unit vectors, partitioned by group."""
+
+    # Indexes whose add() and search() do file I/O or scan large stores set
+    # this; the semantic cache then runs them in a worker thread.
+    blocking = False
+
+    @abstractmethod
+    def add(self, key: str, vector: Sequence[float], group: str) -> None:
+        ...
+
+    @abstractmethod
+    def search(
+        self, vector: Sequence[float], *, group: str, k: int = 1
+    ) -> List[Tuple[str, float]]:
+        """Up to `k` (key, cosine similarity) pairs, most similar first."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+def request_features(*, sign: str, on_date: date, tz: str, variation: int) -> str:
+    """Text embedded for a request; everything that shapes its reading."""
+    tone = sampling_params(sign, on_date, variation).tone
+    return (
+        f"Zodiac sign: {sign.lower()}. Date: {on_date.isoformat()} "
+        f"({on_date.strftime('%A')}). Timezone: {tz}. {tone}"
+    )
+
+
+def match_group(*, sign: str, on_date: date, variation: int) -> str:
+    """Index partition a request may match within. The date is part of it
+    because a reading's prompt bakes in its weekday and tone, so another
+    day's reading never answers this one however close the features are."""
+    return f"{sign.lower()}:{on_date.isoformat()}:{variation}"
+
+
+@dataclass
+class SemanticLookup:
+    vector: List[float]
+    group: str
+    key: Optional[str] = None  # matched request's cache key
+    score: float = 0.0
+    template: Optional[Dict[str, Any]] = None
+
+    @property
+    def hit(self) -> bool:
+        return self.template is not None
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        provider: AIProvider,
+        index: VectorIndex,
+        *,
+        threshold: float = 0.95,
+        k: int = 4,
+    ):
+        self.provider = provider
+        self.index = index
+        self.threshold = threshold
+        self.k = k
+
+    @classmethod
+    def from_settings(cls, provider: AIProvider) -> "SemanticCache":
+        try:
+            from .vector_index import MmapVectorStore, NumpyVectorIndex
+        except ImportError as e:
+            raise RuntimeError(
+                "The semantic cache requires the `numpy` package."
+            ) from e
+        if settings.horoscope_semantic_cache_path:
+            index: VectorIndex = MmapVectorStore(
+                settings.horoscope_semantic_cache_path,
+                dtype=settings.horoscope_semantic_cache_dtype,
+                max_rows=settings.horoscope_semantic_cache_max_entries,
+            )
+        else:
+            index = NumpyVectorIndex(settings.horoscope_semantic_cache_max_entries)
+        return cls(
+            provider,
+            index,
+            threshold=settings.horoscope_semantic_cache_threshold,
+        )
+
+    async def lookup(
+        self,
+        cache: HoroscopeCache,
+        *,
+        sign: str,
+        on_date: date,
+        tz: str,
+        variation: int,
+    ) -> Optional[SemanticLookup]:
+        """Find a cached template for a similar request.
+
+        Returns None if the request could not be embedded; a lookup without
+        a template is a miss that can be remembered once generated.
+        """
+        features = request_features(
+            sign=sign, on_date=on_date, tz=tz, variation=variation
+        )
+        try:
+            out = await self.provider.embed({"texts": [features]})
+        except Exception:
+            logger.warning("Semantic cache embedding failed", exc_info=True)
+            semantic_lookups.inc(result="error")
+            return None
+        lookup = SemanticLookup(
+            vector=out["vectors"][0],
+            group=match_group(sign=sign, on_date=on_date, variation=variation),
+        )
+        matches = await self._run(
+            self.index.search, lookup.vector, group=lookup.group, k=self.k
+        )
+        for key, score in matches:
+            if score < self.threshold:
+                break
+            # The matched entry may have expired from the template cache.
+            template = await cache.get(key)
+            if template is not None:
+                lookup.key, lookup.score, lookup.template = key, score, template
+                break
+        semantic_lookups.inc(result="hit" if lookup.hit else "miss")
+        return lookup
+
+    async def remember(self, lookup: SemanticLookup, key: str) -> None:
+        """Make the template cached under `key` findable by similar requests."""
+        await self._run(self.index.add, key, lookup.vector, lookup.group)
+
+    async def _run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.index.blocking:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+
+def get_semantic_cache(request: Request) -> Optional[SemanticCache]:
+    """FastAPI dependency returning the semantic cache, if it is enabled."""
+    return getattr(request.app.state, "semantic_cache", None)
@@ -0,0 +1,359 @@
+"""Vector indexes for the semantic cache (requires numpy)."""
+
+import fcntl
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .semantic_cache import VectorIndex
+
+
+def normalize(vector: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class NumpyVectorIndex(VectorIndex):
+    """Unit vectors in one float32 matrix; search is a single mat-vec.
+
+    Rows are allocated in doubling steps up to `max_entries`, after which
+    the oldest entries are overwritten. Groups are stored as small integer
+    codes so a search only scores rows in the requested group.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._vectors: Optional[np.ndarray] = None
+        self._groups = np.zeros(0, dtype=np.int32)
+        self._keys: List[str] = []
+        self._group_codes: Dict[str, int] = {}
+        self._size = 0
+        self._next = 0  # slot written next once full
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, dim: int) -> None:
+        if self._vectors is None:
+            self._vectors = np.zeros((min(1024, self.max_entries), dim), np.float32)
+            self._groups = np.full(len(self._vectors), -1, dtype=np.int32)
+        if self._vectors.shape[1] != dim:
+            raise ValueError(f"Expected {self._vectors.shape[1]}-d vectors, got {dim}")
+        capacity = len(self._vectors)
+        if self._size == capacity and capacity < self.max_entries:
+            grown = min(capacity * 2, self.max_entries)
+            self._vectors = np.resize(self._vectors, (grown, dim))
+            self._groups = np.concatenate(
+                [self._groups, np.full(grown - capacity, -1, dtype=np.int32)]
+            )
+
+    def add(self, key: str, vector: Sequence[float], group: str) -> None:
+        v = normalize(vector)
+        self._reserve(len(v))
+        code = self._group_codes.setdefault(group, len(self._group_codes))
+        if self._size < len(self._vectors):
+            slot = self._size
+            self._size += 1
+            self._keys.append(key)
+        else:
+            slot = self._next
+            self._next = (self._next + 1) % self._size
+            self._keys[slot] = key
+        self._vectors[slot] = v
+        self._groups[slot] = code
+
+    def search(
+        self, vector: Sequence[float], *, group: str, k: int = 1
+    ) -> List[Tuple[str, float]]:
+        code = self._group_codes.get(group)
+        if code is None or self._vectors is None:
+            return []
+        rows = np.flatnonzero(self._groups[: self._size] == code)
+        if not len(rows):
+            return []
+        scores = self._vectors[rows] @ normalize(vector)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._keys[rows[i]], float(scores[i])) for i in top]
+
+
+class MmapVectorStore(VectorIndex):
+    """Vector store in memory-mapped files under `directory`.
+
+    Rows are unit vectors stored as float32, or as int8 with a per-row
+    scale (`dtype="int8"`, a quarter of the size). Keys (e.g. entry UUIDs
+    or cache keys) and group codes are stored per row alongside them.
+    Searches scan the mapped rows in blocks of BLOCK_ROWS, so memory use
+    stays flat however large the store gets.
+
+    Any number of processes can open the same directory: reads share the
+    OS page cache instead of copying the index, appends are serialized
+    with an exclusive file lock, and rows become visible once the
+    committed row count is updated after their data is written.
+
+    Rows are appended to the current generation's subdirectory. An append
+    that would take it past `max_rows` starts the next, empty generation
+    and deletes the older ones, so the store starts over instead of growing
+    without bound; other processes switch on their next search and keep
+    any mapping they are still reading until then.
+    """
+
+    BLOCK_ROWS = 4096
+    blocking = True
+
+    def __init__(
+        self, directory: str, *, dtype: str = "float32", max_rows: int = 1_000_000
+    ):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dtype = dtype
+        self.max_rows = max(1, max_rows)
+        self._state_fd = os.open(
+            os.path.join(directory, "state"), os.O_RDWR | os.O_CREAT, 0o644
+        )
+        # Searches may run in worker threads; remapping happens under this.
+        self._map_lock = threading.RLock()
+        self._generation = 0
+        self._mapped = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._groups: Optional[np.ndarray] = None
+        self._key_ends: Optional[np.ndarray] = None
+        self._keys: Optional[np.ndarray] = None
+        self._group_codes: Dict[str, int] = {}
+
+    def _path(self, generation: int, name: str = "") -> str:
+        return os.path.join(self.directory, str(generation), name)
+
+    def close(self) -> None:
+        os.close(self._state_fd)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(os.path.join(self.directory, "lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _committed(self) -> Tuple[int, int]:
+        """The committed (row count, generation)."""
+        raw = os.pread(self._state_fd, 16, 0)
+        if len(raw) != 16:
+            return 0, 0
+        return int.from_bytes(raw[:8], "little"), int.from_bytes(raw[8:], "little")
+
+    def _commit(self, count: int, generation: int) -> None:
+        state = count.to_bytes(8, "little") + generation.to_bytes(8, "little")
+        os.pwrite(self._state_fd, state, 0)
+
+    def _read_json(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_json(self, path: str, value: Any) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _row_dtype(meta: Dict[str, Any]) -> np.dtype:
+        return np.dtype(np.int8 if meta["dtype"] == "int8" else np.float32)
+
+    def _refresh(self) -> None:
+        with self._map_lock:
+            while True:
+                count, generation = self._committed()
+                if (count, generation) == (self._mapped, self._generation):
+                    return
+                try:
+                    self._map(count, generation)
+                    return
+                except FileNotFoundError:
+                    if self._committed()[1] == generation:
+                        raise
+                    # Rotated away while we mapped it; map the new one.
+
+    def _map(self, count: int, generation: int) -> None:
+        meta = self._read_json(self._path(generation, "meta.json"))
+        if meta is None:
+            raise FileNotFoundError(self._path(generation, "meta.json"))
+        path = partial(self._path, generation)
+        dim = meta["dim"]
+        self._vectors = np.memmap(
+            path("vectors"), self._row_dtype(meta), "r", shape=(count, dim)
+        )
+        self._scales = None
+        if meta["dtype"] == "int8":
+            self._scales = np.memmap(path("scales"), np.float32, "r", shape=(count,))
+        self._groups = np.memmap(path("groups"), np.int32, "r", shape=(count,))
+        self._key_ends = np.memmap(path("key_ends"), np.uint64, "r", shape=(count,))
+        self._keys = np.memmap(
+            path("keys"), np.uint8, "r", shape=(int(self._key_ends[-1]),)
+        )
+        self._group_codes = self._read_json(path("groups.json")) or {}
+        self._mapped = count
+        self._generation = generation
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._mapped
+
+    @staticmethod
+    def _key(key_ends: np.ndarray, keys: np.ndarray, row: int) -> str:
+        start = int(key_ends[row - 1]) if row else 0
+        return bytes(keys[start : int(key_ends[row])]).decode("utf-8")
+
+    def _truncate(self, generation: int, meta: Dict[str, Any], count: int) -> int:
+        """Drop anything a crashed writer appended past the committed rows."""
+        key_end = 0
+        if count:
+            with open(self._path(generation, "key_ends"), "rb") as f:
+                f.seek((count - 1) * 8)
+                key_end = int.from_bytes(f.read(8), "little")
+        sizes = {
+            "vectors": count * meta["dim"] * self._row_dtype(meta).itemsize,
+            "scales": count * 4,
+            "groups": count * 4,
+            "key_ends": count * 8,
+            "keys": key_end,
+        }
+        for name, size in sizes.items():
+            path = self._path(generation, name)
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            elif os.path.getsize(path) > size:
+                os.truncate(path, size)
+        return key_end
+
+    def _drop_generations(self, keep: int) -> None:
+        # Unlinking is safe for readers: their mappings outlive the files.
+        for name in os.listdir(self.directory):
+            if name.isdigit() and int(name) != keep:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def add(self, key: str, vector: Sequence[float], group: str) -> None:
+        self.add_many([key], [vector], [group])
+
+    def add_many(
+        self,
+        keys: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+        groups: Sequence[str],
+    ) -> None:
+        if not keys:
+            return
+        rows = np.stack([normalize(v) for v in vectors])
+        with self._locked():
+            count, generation = self._committed()
+            rotated = count > 0 and count + len(keys) > self.max_rows
+            if rotated:
+                count, generation = 0, generation + 1
+            path = partial(self._path, generation)
+            os.makedirs(path(), exist_ok=True)
+            meta = None if rotated else self._read_json(path("meta.json"))
+            if meta is None:
+                meta = {"dim": int(rows.shape[1]), "dtype": self.dtype}
+                self._write_json(path("meta.json"), meta)
+            if rows.shape[1] != meta["dim"]:
+                raise ValueError(
+                    f"Expected {meta['dim']}-d vectors, got {rows.shape[1]}"
+                )
+            key_end = self._truncate(generation, meta, count)
+
+            codes = {} if rotated else self._read_json(path("groups.json")) or {}
+            for group in groups:
+                codes.setdefault(group, len(codes))
+            self._write_json(path("groups.json"), codes)
+
+            encoded = [str(k).encode("utf-8") for k in keys]
+            ends = key_end + np.cumsum([len(k) for k in encoded], dtype=np.uint64)
+            if meta["dtype"] == "int8":
+                scales = np.abs(rows).max(axis=1) / 127
+                scales[scales == 0] = 1
+                quantized = np.clip(np.round(rows / scales[:, None]), -127, 127)
+                self._append(path("vectors"), quantized.astype(np.int8).tobytes())
+                self._append(path("scales"), scales.astype(np.float32).tobytes())
+            else:
+                self._append(path("vectors"), rows.astype(np.float32).tobytes())
+            self._append(
+                path("groups"), np.array([codes[g] for g in groups], np.int32).tobytes()
+            )
+            self._append(path("keys"), b"".join(encoded))
+            self._append(path("key_ends"), ends.tobytes())
+            self._commit(count + len(keys), generation)
+            if rotated:
+                self._drop_generations(keep=generation)
+
+    def _append(self, path: str, data: bytes) -> None:
+        with open(path, "ab") as f:
+            f.write(data)
+
+    def search(
+        self, vector: Sequence[float], *, group: str, k: int = 1
+    ) -> List[Tuple[str, float]]:
+        return self.search_many([vector], group=group, k=k)[0]
+
+    def search_many(
+        self,
+        vectors: Sequence[Sequence[float]],
+        *,
+        group: Optional[str] = None,
+        k: int = 1,
+    ) -> List[List[Tuple[str, float]]]:
+        """Top-k (key, cosine similarity) pairs for each query vector,
+        optionally restricted to one group."""
+        with self._map_lock:
+            self._refresh()
+            mapped, stored, scales = self._mapped, self._vectors, self._scales
+            row_groups, key_ends, keys = self._groups, self._key_ends, self._keys
+            code = self._group_codes.get(group) if group is not None else None
+        empty: List[List[Tuple[str, float]]] = [[] for _ in vectors]
+        if not mapped or not len(vectors) or (group is not None and code is None):
+            return empty
+        queries = np.stack([normalize(v) for v in vectors])
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, mapped, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, mapped)
+            # A no-op for float32 rows, which are scored straight off the map.
+            block = stored[start:stop].astype(np.float32, copy=False)
+            scores = queries @ block.T
+            if scales is not None:
+                scores *= scales[start:stop]
+            if code is not None:
+                scores[:, row_groups[start:stop] != code] = -np.inf
+            block_rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            scores = np.hstack([best_scores, scores])
+            rows = np.hstack([best_rows, block_rows])
+            keep = min(k, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+
+        results = []
+        for scores, rows in zip(best_scores, best_rows):
+            order = np.argsort(-scores)
+            results.append(
+                [
+                    (self._key(key_ends, keys, int(rows[i])), float(scores[i]))
+                    for i in order
+                    if np.isfinite(scores[i])
+                ]
+            )
+        return results
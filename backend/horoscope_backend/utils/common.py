@@ -1,5 +1,5 @@
 import re
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta
 from typing import Optional
 
 from zoneinfo import ZoneInfo
@@ -23,3 +23,13 @@ def strip_code_fences(s: str) -> str:
     return re.sub(
         r"^```(?:json)?\s*|\s*```$", "", s.strip(), flags=re.IGNORECASE | re.MULTILINE
     )
+
+
+def seconds_until_end_of_day(tz: str, for_date: date) -> float:
+    """Seconds from now until midnight after `for_date` in timezone `tz`."""
+    try:
+        zone = ZoneInfo(tz)
+    except Exception:
+        zone = ZoneInfo("UTC")
+    end = datetime.combine(for_date + timedelta(days=1), time.min, tzinfo=zone)
+    return (end - datetime.now(zone)).total_seconds()
@@ -0,0 +1,46 @@
+import dataclasses
+import typing
+from typing import Any, Dict, Iterable, Optional
+
+_PRIMITIVES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def _type_schema(tp: Any) -> Dict[str, Any]:
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin is typing.Union and type(None) in args:
+        (inner,) = [a for a in args if a is not type(None)]
+        schema = _type_schema(inner)
+        return {**schema, "type": [schema["type"], "null"]}
+    if origin in (list, typing.List):
+        return {"type": "array", "items": _type_schema(args[0])}
+    if tp in _PRIMITIVES:
+        return {"type": _PRIMITIVES[tp]}
+    raise TypeError(f"No JSON schema mapping for {tp!r}")
+
+
+def dataclass_json_schema(
+    cls: type,
+    *,
+    exclude: Iterable[str] = (),
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """JSON schema for a flat dataclass, in the strict form structured-output
+    APIs expect: every property required, optional ones nullable, and no
+    additional properties."""
+    hints = typing.get_type_hints(cls)
+    overrides = overrides or {}
+    properties = {}
+    for field in dataclasses.fields(cls):
+        if field.name in exclude:
+            continue
+        properties[field.name] = {
+            **_type_schema(hints[field.name]),
+            **overrides.get(field.name, {}),
+        }
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
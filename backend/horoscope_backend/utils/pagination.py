@@ -0,0 +1,37 @@
+import base64
+import binascii
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+
+
+@dataclass(frozen=True)
+class EntryCursor:
+    """Position in a horoscope entry listing ordered by
+    (for_date, created_at, id) descending; the next page starts after it."""
+
+    for_date: date
+    created_at: datetime
+    id: uuid.UUID
+
+    @classmethod
+    def after(cls, row) -> "EntryCursor":
+        return cls(row.for_date, row.created_at, row.id)
+
+    def encode(self) -> str:
+        raw = f"{self.for_date.isoformat()}|{self.created_at.isoformat()}|{self.id}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "EntryCursor":
+        """Raises ValueError for anything encode() did not produce."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            for_date, created_at, entry_id = raw.decode("ascii").split("|")
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError("Malformed cursor") from e
+        return cls(
+            date.fromisoformat(for_date),
+            datetime.fromisoformat(created_at),
+            uuid.UUID(entry_id),
+        )
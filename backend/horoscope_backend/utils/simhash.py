@@ -0,0 +1,85 @@
+"""64-bit SimHash fingerprints for spotting near-duplicate readings.
+
+Texts that share most of their word shingles get fingerprints only a few
+bits apart, so comparing two readings costs an XOR and a popcount instead
+of an embedding call.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+FINGERPRINT_BITS = 64
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Reading fields that carry its wording; metadata and usage are left out.
+FINGERPRINT_FIELDS = ("headline", "reading", "focus", "do", "dont")
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """Fingerprint of `text` as a signed 64-bit integer (fits a BIGINT)."""
+    words = re.findall(r"\w+", text.lower())
+    features = {
+        " ".join(words[i : i + shingle])
+        for i in range(max(1, len(words) - shingle + 1))
+    }
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        h = int.from_bytes(digest, "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+    return value - (1 << FINGERPRINT_BITS) if value >> (FINGERPRINT_BITS - 1) else value
+
+
+def reading_fingerprint(payload: Dict[str, Any]) -> int:
+    parts = []
+    for name in FINGERPRINT_FIELDS:
+        value = payload.get(name)
+        parts.extend(value if isinstance(value, list) else [value or ""])
+    return simhash(" ".join(map(str, parts)))
+
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class FingerprintSet:
+    """Fingerprints indexed by band for near-duplicate checks.
+
+    The 64 bits are split into max_distance + 1 bands; two fingerprints
+    within max_distance bits of each other agree exactly on at least one
+    band, so a check only compares against fingerprints sharing a band
+    instead of scanning them all.
+    """
+
+    def __init__(self, fingerprints: Iterable[int] = (), *, max_distance: int = 3):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self._bands: List[Tuple[int, int]] = [
+            (i * width, width if i < bands - 1 else FINGERPRINT_BITS - i * width)
+            for i in range(bands)
+        ]
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        for fingerprint in fingerprints:
+            self.add(fingerprint)
+
+    def _keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        return [
+            (i, (fingerprint & _MASK) >> shift & ((1 << width) - 1))
+            for i, (shift, width) in enumerate(self._bands)
+        ]
+
+    def add(self, fingerprint: int) -> None:
+        for key in self._keys(fingerprint):
+            self._buckets.setdefault(key, []).append(fingerprint)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        """Whether a fingerprint within max_distance bits has been added."""
+        return any(
+            hamming(fingerprint, other) <= self.max_distance
+            for key in self._keys(fingerprint)
+            for other in self._buckets.get(key, ())
+        )
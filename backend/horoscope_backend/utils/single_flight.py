@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it
+    runs await the same task and get the same result or exception. The
+    entry is removed as soon as the task finishes, so the next call after
+    that starts fresh. A cancelled waiter does not cancel the shared task.
+
+    Not thread-safe; it is meant to be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run `fn` once per key at a time.
+
+        Returns the result and whether it was shared from another caller's
+        call.
+        """
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter went away.
+            task.exception()
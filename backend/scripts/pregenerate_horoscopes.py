@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+
+from backend.horoscope_backend.core.config import settings
+from backend.horoscope_backend.core.database import SessionLocal
+from backend.horoscope_backend.crud.horoscope_crud import list_active_timezones
+from backend.horoscope_backend.services.ai.factory import AIProviderFactory
+from backend.horoscope_backend.services.ai.local_bulk import LocalBulkProvider
+from backend.horoscope_backend.services.ai.openai_client import OpenAIProvider
+from backend.horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+)
+from backend.horoscope_backend.services.horoscope_ai_service.horoscope_cache import (
+    HoroscopeCache,
+)
+from backend.horoscope_backend.services.horoscope_ai_service.pregeneration import (
+    BulkPregenerationJob,
+    PregenerationJob,
+    build_tasks,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Warm the shared horoscope cache ahead of local midnight."
+    )
+    parser.add_argument("--variations", type=int, nargs="+", default=[0])
+    parser.add_argument(
+        "--lead-hours",
+        type=float,
+        default=2.0,
+        help="Warm the next day for timezones this close to local midnight.",
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=6,
+        help="Readings requested per completion; 1 sends one call per key.",
+    )
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--checkpoint", default="pregenerate.checkpoint.jsonl")
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Submit one offline batch job instead of live calls (cheaper, slower).",
+    )
+    parser.add_argument("--bulk-state", default="pregenerate.bulk.json")
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument(
+        "--bulk-local",
+        metavar="DIR",
+        default=None,
+        help="Run bulk jobs from JSONL files in DIR instead of the provider's "
+        "batch API.",
+    )
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    if not settings.horoscope_cache_redis_url:
+        raise SystemExit("HOROSCOPE_CACHE_REDIS_URL must point at the shared cache.")
+
+    db = SessionLocal()
+    try:
+        timezones = list_active_timezones(db)
+    finally:
+        db.close()
+
+    provider = AIProviderFactory.create_resilient_provider(
+        ("openai", OpenAIProvider()), settings.ai_fallback_targets
+    )
+    if args.bulk_local:
+        provider = LocalBulkProvider(provider, args.bulk_local)
+    cache = HoroscopeCache.from_settings()
+    service = HoroscopeAIService(provider=provider, cache=cache)
+    if args.bulk or args.bulk_local:
+        job = BulkPregenerationJob(
+            service,
+            state_path=args.bulk_state,
+            checkpoint_path=args.checkpoint,
+            poll_interval=args.poll_interval,
+        )
+    else:
+        job = PregenerationJob(
+            service,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            token_budget=args.token_budget,
+            checkpoint_path=args.checkpoint,
+        )
+    try:
+        tasks = build_tasks(timezones, args.variations, lead_hours=args.lead_hours)
+        report = await job.run(tasks)
+    finally:
+        await cache.aclose()
+        await provider.aclose()
+
+    print(
+        f"done: generated={report.generated} skipped={report.skipped} "
+        f"failed={report.failed} tokens={report.tokens_used}"
+    )
+    for key in report.failed_keys:
+        print(f"failed: {key}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
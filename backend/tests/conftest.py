@@ -0,0 +1,72 @@
+"""Database fixtures shared by the CRUD and endpoint tests.
+
+`sqlite_sessions` runs against a throwaway aiosqlite file (without the
+usage table). `pg_sessions` needs a disposable Postgres database in
+TEST_DATABASE_URL (it creates and empties the tables) and is skipped without
+one; use it for code that relies on Postgres-only SQL such as ON CONFLICT.
+
+Engines use NullPool because each test drives them from its own
+asyncio.run() loop.
+"""
+
+import asyncio
+import os
+
+import pytest
+from horoscope_backend import models  # noqa: F401  (registers every table)
+from horoscope_backend.core.database import Base, to_async_url
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def _sessions(url: str):
+    engine = create_async_engine(url, poolclass=NullPool)
+    return engine, async_sessionmaker(
+        bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
+@pytest.fixture
+def sqlite_sessions(tmp_path):
+    engine, sessions = _sessions(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    # usage_tracking's NOT DEFERRABLE constraints are not valid SQLite, and
+    # the credit code that uses it needs Postgres anyway.
+    tables = [t for t in Base.metadata.sorted_tables if t.name != "usage_tracking"]
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    asyncio.run(create())
+    yield sessions
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def pg_sessions():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine, sessions = _sessions(to_async_url(url))
+
+    async def reset():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            tables = ", ".join(f'"{t.name}"' for t in Base.metadata.sorted_tables)
+            await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+    try:
+        asyncio.run(reset())
+    except OSError as e:
+        pytest.skip(f"Postgres at TEST_DATABASE_URL is unavailable: {e}")
+    yield sessions
+    asyncio.run(engine.dispose())
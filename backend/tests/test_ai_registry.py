@@ -0,0 +1,24 @@
+"""Tests for the shared AI provider registry."""
+
+import asyncio
+
+from horoscope_backend.services.ai.factory import ProviderType
+from horoscope_backend.services.ai.openai_client import OpenAIProvider
+from horoscope_backend.services.ai.registry import AIProviderRegistry
+
+
+def test_registry_reuses_provider_instance():
+    """The same pooled provider is handed out on every lookup."""
+    registry = AIProviderRegistry(default_provider=ProviderType.OPENAI)
+    first = registry.get()
+    assert isinstance(first, OpenAIProvider)
+    assert registry.get() is first
+    asyncio.run(registry.aclose())
+
+
+def test_registry_closes_http_clients():
+    """Shutdown closes the underlying HTTP connection pool."""
+    registry = AIProviderRegistry(default_provider=ProviderType.OPENAI)
+    provider = registry.get()
+    asyncio.run(registry.aclose())
+    assert provider.http_client.is_closed
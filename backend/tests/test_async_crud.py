@@ -0,0 +1,105 @@
+"""Tests for the AsyncSession CRUD helpers, on aiosqlite."""
+
+import asyncio
+from datetime import date
+
+from horoscope_backend.crud.async_auth_crud import (
+    authenticate_user,
+    create_user,
+    get_user_by_email,
+    get_user_by_id,
+)
+from horoscope_backend.crud.async_horoscope_crud import (
+    create_horoscope_entry,
+    create_user_config,
+    get_horoscope_entry_by_id,
+    get_user_config_by_user_id,
+    list_horoscope_entries,
+    update_user_config,
+)
+from horoscope_backend.utils.pagination import EntryCursor
+
+
+def test_users_are_created_looked_up_and_authenticated(sqlite_sessions):
+    async def run():
+        async with sqlite_sessions() as db:
+            user = await create_user(db, "alice", "alice@example.com", "s3cret!")
+            return (
+                user,
+                await get_user_by_id(db, user.id),
+                await get_user_by_email(db, "alice@example.com"),
+                await authenticate_user(db, "alice", "s3cret!"),
+                await authenticate_user(db, "alice", "wrong"),
+                await authenticate_user(db, "bob", "s3cret!"),
+            )
+
+    user, by_id, by_email, good, wrong, unknown = asyncio.run(run())
+    assert user.is_active
+    assert user.hashed_password != "s3cret!"
+    assert by_id.username == by_email.username == good.username == "alice"
+    assert wrong is None and unknown is None
+
+
+def test_user_config_is_created_and_updated(sqlite_sessions):
+    async def run():
+        async with sqlite_sessions() as db:
+            user = await create_user(db, "alice", "alice@example.com", "s3cret!")
+            await create_user_config(
+                db, user_id=user.id, name="Alice", dob=date(1990, 8, 1)
+            )
+            updated = await update_user_config(
+                db, user_id=user.id, timezone="Asia/Tokyo"
+            )
+            missing = await update_user_config(db, user_id=user.id + 1, name="Bob")
+            return await get_user_config_by_user_id(db, user.id), updated, missing
+
+    cfg, updated, missing = asyncio.run(run())
+    assert (cfg.name, cfg.dob, cfg.timezone) == (
+        "Alice",
+        date(1990, 8, 1),
+        "Asia/Tokyo",
+    )
+    assert updated.timezone == "Asia/Tokyo"
+    assert missing is None
+
+
+def test_entries_are_created_fetched_and_listed_newest_first(sqlite_sessions):
+    async def run():
+        async with sqlite_sessions() as db:
+            user = await create_user(db, "alice", "alice@example.com", "s3cret!")
+            entries = [
+                await create_horoscope_entry(
+                    db,
+                    user_id=user.id,
+                    is_anonymous=False,
+                    name=None,
+                    dob=None,
+                    zodiac_sign="Leo",
+                    for_date=date(2030, 1, day),
+                    variation=0,
+                    payload_json={"headline": f"Day {day}"},
+                    prompt_version="daily_horoscope@1",
+                )
+                for day in (1, 2, 3)
+            ]
+            listing = {"user_id": user.id, "from_date": None, "to_date": None}
+            first_page = await list_horoscope_entries(db, **listing, limit=2)
+            next_page = await list_horoscope_entries(
+                db, **listing, limit=2, after=EntryCursor.after(first_page[-1])
+            )
+            ranged = await list_horoscope_entries(
+                db,
+                user_id=user.id,
+                from_date=date(2030, 1, 2),
+                to_date=date(2030, 1, 2),
+                limit=10,
+            )
+            fetched = await get_horoscope_entry_by_id(db, entries[0].id)
+            return entries, first_page, next_page, ranged, fetched
+
+    entries, first_page, next_page, ranged, fetched = asyncio.run(run())
+    assert fetched.payload_json == {"headline": "Day 1"}
+    assert fetched.reading_fingerprint is not None
+    assert [e.for_date.day for e in first_page] == [3, 2]
+    assert [e.for_date.day for e in next_page] == [1]
+    assert [e.id for e in ranged] == [entries[1].id]
@@ -0,0 +1,21 @@
+"""Tests for the verified-token and user snapshot cache."""
+
+import time
+
+from horoscope_backend.services.auth.auth_cache import AuthCache, UserSnapshot
+
+
+def test_claims_do_not_outlive_token_expiry():
+    cache = AuthCache(claims_ttl=60)
+    cache.set_claims("live", {"sub": "1", "exp": time.time() + 30})
+    cache.set_claims("expired", {"sub": "1", "exp": time.time() - 1})
+    assert cache.get_claims("live")["sub"] == "1"
+    assert cache.get_claims("expired") is None
+
+
+def test_invalidate_user_drops_snapshot():
+    cache = AuthCache()
+    cache.set_user(UserSnapshot(id=7, is_active=True))
+    assert cache.get_user(7).is_active
+    cache.invalidate_user(7)
+    assert cache.get_user(7) is None
@@ -0,0 +1,108 @@
+"""Tests for the adaptive concurrency limiter."""
+
+import asyncio
+
+import pytest
+from horoscope_backend.services.ai.ai_provider_base import (
+    AIProviderOverloadedError,
+    AIProviderRateLimitError,
+    Role,
+)
+from horoscope_backend.services.ai.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    ConcurrencyLimitConfig,
+    ConcurrencyLimitedProvider,
+)
+from horoscope_backend.services.ai.fake_provider import FakeProvider
+from horoscope_backend.services.ai.resilience import (
+    ResilienceConfig,
+    ResilientProvider,
+)
+
+INPUT = {"messages": [{"role": Role.USER, "content": "Name: Alice"}]}
+
+
+def _limiter(**overrides):
+    options = {"initial_limit": 4, "min_limit": 1, "max_limit": 8, "queue_size": 2}
+    config = ConcurrencyLimitConfig(**{**options, **overrides})
+    return AdaptiveConcurrencyLimiter(config)
+
+
+def test_limit_grows_when_saturated_and_backs_off_on_overload():
+    limiter = _limiter()
+
+    async def saturate(rounds):
+        for _ in range(rounds):
+            for _ in range(limiter.limit):
+                await limiter.acquire()
+            for _ in range(limiter.in_flight):
+                limiter.release(latency=0.1)
+
+    asyncio.run(saturate(4))
+    assert limiter.limit == 5
+
+    async def rate_limited():
+        await limiter.acquire()
+        limiter.release(error=AIProviderRateLimitError("429"))
+
+    asyncio.run(rate_limited())
+    assert limiter.limit == 2
+
+
+def test_slow_responses_shrink_the_limit():
+    limiter = _limiter()
+
+    async def run():
+        for latency in (0.1, 0.1, 0.5, 0.5):
+            await limiter.acquire()
+            limiter.release(latency=latency)
+
+    asyncio.run(run())
+    assert limiter.limit == 3  # 4 * 0.9 * 0.9
+
+
+def test_excess_callers_queue_then_get_shed():
+    limiter = _limiter(queue_timeout_seconds=0.05)
+
+    async def run():
+        for _ in range(4):
+            await limiter.acquire()
+        first = asyncio.ensure_future(limiter.acquire(timeout=1.0))
+        second = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AIProviderOverloadedError, match="queued"):
+            await limiter.acquire()
+        with pytest.raises(AIProviderOverloadedError, match="capacity"):
+            await second
+        limiter.release(latency=0.1)
+        await first  # handed the released slot
+        return limiter.in_flight
+
+    assert asyncio.run(run()) == 4
+
+
+def test_provider_releases_slots_after_each_call():
+    fake = FakeProvider(latencies=[0.01] * 8)
+    provider = ConcurrencyLimitedProvider(fake, _limiter(queue_size=8))
+
+    async def run():
+        await asyncio.gather(*(provider.generate(INPUT) for _ in range(8)))
+        chunks = [c async for c in provider.generate_stream(INPUT)]
+        return chunks
+
+    assert asyncio.run(run())
+    assert fake.calls == 9
+    assert provider.limiter.in_flight == 0
+
+
+def test_retried_rate_limits_still_shrink_the_limit():
+    fake = FakeProvider(failures=[AIProviderRateLimitError("429", 0.0)])
+    resilient = ResilientProvider(
+        [("fake", fake)], ResilienceConfig(max_attempts=2, backoff_seconds=0.0)
+    )
+    provider = ConcurrencyLimitedProvider(resilient, _limiter())
+
+    assert asyncio.run(provider.generate(INPUT))  # the retry succeeds
+    assert fake.calls == 2
+    assert provider.limiter.limit == 2
+    assert provider.limiter.in_flight == 0
@@ -0,0 +1,193 @@
+"""Tests for the name-free horoscope template cache."""
+
+import asyncio
+import json
+from datetime import date
+
+from horoscope_backend.services.ai.ai_provider_base import AIProvider
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+)
+from horoscope_backend.services.horoscope_ai_service.horoscope_cache import (
+    NAME_PLACEHOLDER,
+    HoroscopeCache,
+    RedisCacheBackend,
+    StreamingTemplateRenderer,
+    horoscope_cache_key,
+)
+
+READING = {
+    "headline": f"Hi {NAME_PLACEHOLDER}, a bright day ahead",
+    "reading": f"{NAME_PLACEHOLDER}, Taurus energy favours patience today.",
+    "lucky_color": "green",
+    "lucky_number": 4,
+    "mood": "calm",
+    "focus": ["home", "rest"],
+    "do": ["Walk", "Read", "Call a friend"],
+    "dont": ["Rush", "Overspend"],
+    "best_time_window": "09:00–11:00",
+}
+
+
+class CountingProvider(AIProvider):
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, input):
+        self.calls += 1
+        return {"text": json.dumps(READING), "usage": {"total_tokens": 10}}
+
+    async def embed(self, input):
+        raise NotImplementedError
+
+
+class DictRedis:
+    """Minimal stand-in for a Redis server shared between processes."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+
+
+def _generate(service, name):
+    return service.generate_horoscope(
+        name=name,
+        dob=date(1990, 5, 17),
+        tz="Europe/Amsterdam",
+        on_date=date(2030, 1, 1),
+    )
+
+
+def test_cached_template_is_filled_with_each_name():
+    provider = CountingProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+
+    first = asyncio.run(_generate(service, "Alice"))
+    second = asyncio.run(_generate(service, "Bob"))
+
+    assert provider.calls == 1
+    assert first.headline == "Hi Alice, a bright day ahead"
+    assert second.reading.startswith("Bob, Taurus")
+
+
+def test_shared_backend_serves_other_processes():
+    redis = DictRedis()
+    provider = CountingProvider()
+    writer = HoroscopeAIService(
+        provider=provider, cache=HoroscopeCache(shared=RedisCacheBackend(redis))
+    )
+    reader = HoroscopeAIService(
+        provider=provider, cache=HoroscopeCache(shared=RedisCacheBackend(redis))
+    )
+
+    asyncio.run(_generate(writer, "Alice"))
+    result = asyncio.run(_generate(reader, "Carol"))
+
+    assert provider.calls == 1
+    assert result.headline == "Hi Carol, a bright day ahead"
+
+
+def test_concurrent_misses_share_one_generation():
+    class SlowProvider(CountingProvider):
+        async def generate(self, input):
+            await asyncio.sleep(0.01)
+            return await super().generate(input)
+
+    provider = SlowProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+
+    async def burst():
+        return await asyncio.gather(
+            *(_generate(service, name) for name in ["Ann", "Ben", "Cid", "Dee"])
+        )
+
+    results = asyncio.run(burst())
+
+    assert provider.calls == 1
+    assert results[3].headline == "Hi Dee, a bright day ahead"
+
+
+def test_streaming_renderer_fills_placeholder_split_across_chunks():
+    renderer = StreamingTemplateRenderer("Alice")
+    text = f"Hi {NAME_PLACEHOLDER}, and {NAME_PLACEHOLDER}!"
+    chunks = [text[i : i + 3] for i in range(0, len(text), 3)]
+
+    out = "".join(renderer.feed(c) for c in chunks) + renderer.flush()
+
+    assert out == "Hi Alice, and Alice!"
+
+
+def test_stream_yields_deltas_then_cached_result():
+    provider = CountingProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+
+    async def collect(name):
+        return [
+            e
+            async for e in service.generate_horoscope_stream(
+                name=name, dob=date(1990, 5, 17), on_date=date(2030, 1, 1)
+            )
+        ]
+
+    first = asyncio.run(collect("Alice"))
+    second = asyncio.run(collect("Bob"))
+
+    fields = dict(e.data for e in first if e.type == "field")
+    assert [e.type for e in first][0] == "delta"
+    assert fields["headline"] == "Hi Alice, a bright day ahead"
+    assert first[-1].data.headline == "Hi Alice, a bright day ahead"
+    assert [e.type for e in second] == ["result"]
+    assert second[0].data.headline == "Hi Bob, a bright day ahead"
+    assert provider.calls == 1
+
+
+def test_system_prompt_is_static_and_version_is_recorded():
+    provider = CountingProvider()
+    service = HoroscopeAIService(provider=provider)
+    first = service._build_prompts(
+        name="Ann", sign="Aries", today=date(2030, 1, 1), tz="UTC", variation=0
+    )
+    second = service._build_prompts(
+        name="Ben", sign="Leo", today=date(2030, 1, 2), tz="UTC", variation=1
+    )
+
+    assert first[0] == second[0]
+    assert "Name: Ben" in second[1]
+
+    result = asyncio.run(_generate(service, "Alice"))
+    assert result.prompt_version == service.prompt.prompt_id
+    assert service.prompt.prompt_id in horoscope_cache_key(
+        sign="Taurus", on_date=date(2030, 1, 1), tz="UTC", variation=0
+    )
+
+
+def test_same_key_builds_the_same_request():
+    class RecordingProvider(CountingProvider):
+        def __init__(self):
+            super().__init__()
+            self.inputs = []
+
+        async def generate(self, input):
+            self.inputs.append(input)
+            return await super().generate(input)
+
+    provider = RecordingProvider()
+    service = HoroscopeAIService(provider=provider)
+
+    asyncio.run(_generate(service, "Alice"))
+    asyncio.run(_generate(service, "Alice"))
+    asyncio.run(
+        service.generate_horoscope(
+            name="Alice", dob=date(1990, 5, 17), on_date=date(2030, 1, 1), variation=1
+        )
+    )
+
+    first, second, other = provider.inputs
+    assert first == second
+    assert 0.6 <= first["temperature"] <= 0.9
+    assert first["seed"] != other["seed"]
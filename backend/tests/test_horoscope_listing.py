@@ -0,0 +1,78 @@
+"""Tests for GET /horoscopes listing modes (needs Postgres)."""
+
+import asyncio
+from datetime import date
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from horoscope_backend.api.v1.endpoints import horoscopes
+from horoscope_backend.core.database import get_async_db
+from horoscope_backend.crud.async_horoscope_crud import create_horoscope_entry
+from horoscope_backend.models.user import User
+from horoscope_backend.services.auth.auth_deps import (
+    AuthResult,
+    require_auth_separate_schemes,
+)
+
+
+def _client(sessions) -> TestClient:
+    app = FastAPI()
+    app.include_router(horoscopes.router)
+
+    async def db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = db
+    app.dependency_overrides[require_auth_separate_schemes] = lambda: AuthResult(
+        user_id=1
+    )
+    return TestClient(app)
+
+
+def _seed(sessions, days: int) -> None:
+    async def run():
+        async with sessions() as db:
+            db.add(User(id=1, username="alice", email="a@x.io", hashed_password="x"))
+            await db.commit()
+            for day in range(1, days + 1):
+                await create_horoscope_entry(
+                    db,
+                    user_id=1,
+                    is_anonymous=False,
+                    name=None,
+                    dob=None,
+                    zodiac_sign="Leo",
+                    for_date=date(2030, 1, day),
+                    variation=0,
+                    payload_json={"headline": f"Day {day}", "reading": "..." * 100},
+                )
+
+    asyncio.run(run())
+
+
+def test_summary_listing_pages_with_a_cursor(pg_sessions):
+    _seed(pg_sessions, days=3)
+    client = _client(pg_sessions)
+
+    first = client.get("/horoscopes", params={"fields": "summary", "limit": 2})
+    assert first.status_code == 200
+    rows = first.json()
+    assert [r["headline"] for r in rows] == ["Day 3", "Day 2"]
+    # Serialized as HoroscopeSummaryOut, not HoroscopeDataOut.
+    assert set(rows[0]) == {"id", "zodiac_sign", "for_date", "variation", "headline"}
+    assert rows[0]["for_date"] == "2030-01-03"
+
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get(
+        "/horoscopes", params={"fields": "summary", "limit": 2, "cursor": cursor}
+    )
+    assert [r["headline"] for r in rest.json()] == ["Day 1"]
+    assert "X-Next-Cursor" not in rest.headers
+
+
+def test_full_listing_still_returns_payloads(pg_sessions):
+    _seed(pg_sessions, days=1)
+    rows = _client(pg_sessions).get("/horoscopes").json()
+    assert rows[0]["payload_json"]["headline"] == "Day 1"
+    assert "headline" not in rows[0]
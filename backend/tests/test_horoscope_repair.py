@@ -0,0 +1,88 @@
+"""Tests for repairing incomplete model output."""
+
+import asyncio
+import json
+from datetime import date
+
+from horoscope_backend.services.ai.ai_provider_base import AIProvider
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+    generation_outcomes,
+)
+
+COMPLETE = {
+    "headline": "Hi Alice, a bright day ahead",
+    "reading": "Alice, Taurus energy favours patience today.",
+    "lucky_color": "green",
+    "lucky_number": 4,
+    "mood": "calm",
+    "focus": ["home", "rest"],
+    "do": ["Walk", "Read", "Call a friend"],
+    "dont": ["Rush", "Overspend"],
+    "best_time_window": "09:00–11:00",
+}
+
+
+class ScriptedProvider(AIProvider):
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.prompts = []
+
+    async def generate(self, input):
+        self.prompts.append(input["messages"])
+        return {"text": self.texts.pop(0), "usage": {"total_tokens": 10}}
+
+    async def embed(self, input):
+        raise NotImplementedError
+
+
+def _generate(provider):
+    service = HoroscopeAIService(provider=provider)
+    return asyncio.run(
+        service.generate_horoscope(
+            name="Alice", dob=date(1990, 5, 17), on_date=date(2030, 1, 1)
+        )
+    )
+
+
+def test_only_missing_fields_are_requested_again():
+    partial = {k: v for k, v in COMPLETE.items() if k not in ("do", "lucky_number")}
+    partial["lucky_number"] = "four"
+    provider = ScriptedProvider(
+        json.dumps(partial), json.dumps({"lucky_number": 8, "do": ["A", "B", "C"]})
+    )
+    before = generation_outcomes.value(outcome="repaired")
+
+    result = _generate(provider)
+
+    repair_user = provider.prompts[1][1]["content"]
+    assert "Return only these keys: lucky_number, do" in repair_user
+    assert result.lucky_number == 8
+    assert result.do == ["A", "B", "C"]
+    assert result.reading == COMPLETE["reading"]
+    assert result.usage == {"total_tokens": 20}
+    assert generation_outcomes.value(outcome="repaired") == before + 1
+
+
+def test_unrepaired_fields_fall_back_individually():
+    partial = {k: v for k, v in COMPLETE.items() if k != "best_time_window"}
+    provider = ScriptedProvider(json.dumps(partial), "sorry, I can't")
+    before = generation_outcomes.value(outcome="fallback")
+
+    result = _generate(provider)
+
+    assert result.headline == COMPLETE["headline"]
+    assert result.best_time_window == "10:00–12:00"
+    assert generation_outcomes.value(outcome="fallback") == before + 1
+
+
+def test_unusable_output_is_fully_regenerated():
+    provider = ScriptedProvider("no json here", json.dumps(COMPLETE))
+    before = generation_outcomes.value(outcome="retried")
+
+    result = _generate(provider)
+
+    assert len(provider.prompts) == 2
+    assert provider.prompts[1][0] == provider.prompts[0][0]
+    assert result.mood == "calm"
+    assert generation_outcomes.value(outcome="retried") == before + 1
@@ -0,0 +1,94 @@
+"""Tests for POST /horoscopes/stream credit handling (needs Postgres)."""
+
+import asyncio
+import json
+from datetime import date
+
+from horoscope_backend.api.v1.endpoints import horoscopes
+from horoscope_backend.models.horoscope_entry import HoroscopeEntry
+from horoscope_backend.models.usage import Usage
+from horoscope_backend.services.ai.ai_provider_base import AIProviderError
+from horoscope_backend.services.ai.fake_provider import FakeProvider
+from horoscope_backend.services.auth.auth_deps import AuthResult
+from sqlalchemy import select
+from starlette.requests import Request
+
+IP = "203.0.113.7"
+PAYLOAD = horoscopes.HoroscopeCreate(
+    name="Alice", dob=date(1990, 8, 1), timezone="Europe/Amsterdam"
+)
+
+
+def _request() -> Request:
+    return Request({"type": "http", "headers": [], "client": (IP, 1234)})
+
+
+async def _open_stream(sessions, provider):
+    async with sessions() as db:
+        response = await horoscopes.create_horoscope_stream(
+            _request(),
+            PAYLOAD,
+            AuthResult(),
+            db,
+            provider,
+            cache=None,
+            semantic_cache=None,
+        )
+    return response.body_iterator
+
+
+def _events(chunks):
+    return [
+        (chunk.split("\n")[0][len("event: ") :], json.loads(chunk.split("data: ")[1]))
+        for chunk in chunks
+    ]
+
+
+async def _state(sessions):
+    async with sessions() as db:
+        attempts = (await db.execute(select(Usage.attempts))).scalar_one()
+        entries = len((await db.execute(select(HoroscopeEntry.id))).all())
+    return attempts, entries
+
+
+def test_stream_success_keeps_credit_and_saves_entry(pg_sessions, monkeypatch):
+    monkeypatch.setattr(horoscopes, "AsyncSessionLocal", pg_sessions)
+
+    async def run():
+        body = await _open_stream(pg_sessions, FakeProvider())
+        events = _events([chunk async for chunk in body])
+        return events, await _state(pg_sessions)
+
+    events, state = asyncio.run(run())
+    assert events[0][0] == "delta"
+    assert events[-1][0] == "result"
+    assert events[-1][1]["status"] == "success"
+    assert state == (1, 1)
+
+
+def test_stream_provider_error_refunds_credit(pg_sessions, monkeypatch):
+    monkeypatch.setattr(horoscopes, "AsyncSessionLocal", pg_sessions)
+    failing = FakeProvider(failures=[AIProviderError("down")] * 4)
+
+    async def run():
+        body = await _open_stream(pg_sessions, failing)
+        events = _events([chunk async for chunk in body])
+        return events, await _state(pg_sessions)
+
+    events, state = asyncio.run(run())
+    assert events == [("result", {"horoscope_data": None, "status": "error"})]
+    assert state == (0, 0)
+
+
+def test_stream_disconnect_refunds_credit(pg_sessions, monkeypatch):
+    monkeypatch.setattr(horoscopes, "AsyncSessionLocal", pg_sessions)
+
+    async def run():
+        body = await _open_stream(pg_sessions, FakeProvider())
+        first = await body.__anext__()
+        await body.aclose()  # what the server does when the client goes away
+        return first, await _state(pg_sessions)
+
+    first, state = asyncio.run(run())
+    assert first.startswith("event: delta")
+    assert state == (0, 0)
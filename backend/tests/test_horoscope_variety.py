@@ -0,0 +1,114 @@
+"""Tests for resampling regenerations that repeat a recent reading (needs
+Postgres)."""
+
+import asyncio
+import json
+from datetime import date
+
+from horoscope_backend.api.v1.endpoints import horoscopes
+from horoscope_backend.crud.async_horoscope_crud import create_user_config
+from horoscope_backend.models.horoscope_entry import HoroscopeEntry
+from horoscope_backend.models.user import User
+from horoscope_backend.services.ai.fake_provider import FakeProvider
+from horoscope_backend.services.auth.auth_deps import AuthResult
+from sqlalchemy import select
+from starlette.requests import Request
+
+REWRITE = {
+    "headline": "Rest and reflect, Alice",
+    "reading": (
+        "Alice, today asks for patience. Let others take the lead while you "
+        "recharge, and save big decisions for later in the week."
+    ),
+    "lucky_color": "amber",
+    "lucky_number": 3,
+    "mood": "quiet",
+    "focus": ["patience"],
+    "do": ["Take a long walk"],
+    "dont": ["Start arguments"],
+    "best_time_window": "18:00–20:00",
+}
+
+
+class RepeatingProvider(FakeProvider):
+    """Gives the canned reading for the first `repeats` calls, then a
+    rewrite of it."""
+
+    def __init__(self, repeats: int):
+        super().__init__()
+        self.repeats = repeats
+
+    def _answer(self, input):
+        if self.calls <= self.repeats:
+            return super()._answer(input)
+        return json.dumps(REWRITE, ensure_ascii=False)
+
+
+async def _add_user(db):
+    db.add(User(id=1, username="alice", email="a@x.io", hashed_password="x"))
+    await db.commit()
+    await create_user_config(db, user_id=1, name="Alice", dob=date(1990, 8, 1))
+
+
+def _create(db, provider, variation, endpoint=horoscopes.create_horoscope):
+    return endpoint(
+        Request({"type": "http", "headers": [], "client": ("203.0.113.7", 1234)}),
+        horoscopes.HoroscopeCreate(for_date=date(2030, 1, 1), variation=variation),
+        AuthResult(user_id=1),
+        db,
+        provider,
+        cache=None,
+        semantic_cache=None,
+    )
+
+
+def test_regeneration_that_repeats_a_recent_reading_is_resampled(pg_sessions):
+    provider = RepeatingProvider(repeats=2)
+
+    async def run():
+        async with pg_sessions() as db:
+            await _add_user(db)
+            first = await _create(db, provider, variation=0)
+            calls_after_first = provider.calls
+            again = await _create(db, provider, variation=1)
+            variations = (
+                await db.execute(
+                    select(HoroscopeEntry.variation).order_by(HoroscopeEntry.created_at)
+                )
+            ).scalars()
+            return first, calls_after_first, again, list(variations)
+
+    first, calls_after_first, again, variations = asyncio.run(run())
+    assert first.status == "success"
+    assert calls_after_first == 1  # first readings are never resampled
+    # Variation 1 repeated the first reading, so variation 2 was generated.
+    assert again.status == "success"
+    assert provider.calls == 3
+    assert again.horoscope_data.variation == 2
+    assert again.horoscope_data.payload_json["headline"] == REWRITE["headline"]
+    assert variations == [0, 2]
+
+
+def test_streamed_regeneration_that_repeats_a_recent_reading_is_resampled(
+    pg_sessions, monkeypatch
+):
+    monkeypatch.setattr(horoscopes, "AsyncSessionLocal", pg_sessions)
+    provider = RepeatingProvider(repeats=2)
+
+    async def run():
+        async with pg_sessions() as db:
+            await _add_user(db)
+            await _create(db, provider, variation=0)
+            response = await _create(
+                db, provider, variation=1, endpoint=horoscopes.create_horoscope_stream
+            )
+        chunks = [chunk async for chunk in response.body_iterator]
+        return json.loads(chunks[-1].split("data: ")[1])
+
+    result = asyncio.run(run())
+    # The streamed variation 1 repeated the first reading, so variation 2
+    # was generated and saved in its place.
+    assert provider.calls == 3
+    assert result["status"] == "success"
+    assert result["horoscope_data"]["variation"] == 2
+    assert result["horoscope_data"]["payload_json"]["headline"] == REWRITE["headline"]
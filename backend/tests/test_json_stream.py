@@ -0,0 +1,38 @@
+"""Tests for the incremental JSON field extractor."""
+
+from horoscope_backend.services.horoscope_ai_service.json_stream import (
+    IncrementalJSONExtractor,
+    extract_json_object,
+)
+
+
+def test_fields_complete_as_soon_as_they_close():
+    extractor = IncrementalJSONExtractor()
+
+    assert extractor.feed('```json\n{"headline": "Hi, {friend}"') == []
+    assert extractor.feed(', "focus": ["a", "b, c"]') == [("headline", "Hi, {friend}")]
+    assert extractor.feed(', "lucky_number": 7}\n``` trailing') == [
+        ("focus", ["a", "b, c"]),
+        ("lucky_number", 7),
+    ]
+    assert extractor.done
+
+
+def test_reports_missing_and_invalid_fields():
+    extractor = IncrementalJSONExtractor()
+    extractor.feed('Sure! {"headline": "Hi", "lucky_number": seven, "mood": "ca')
+
+    assert extractor.fields == {"headline": "Hi"}
+    assert extractor.invalid == {"lucky_number"}
+    assert extractor.missing(["headline", "lucky_number", "mood"]) == [
+        "lucky_number",
+        "mood",
+    ]
+
+
+def test_escaped_quotes_and_nested_objects():
+    text = 'x {"reading": "She said \\"go\\" }", "meta": {"a": [1, {"b": 2}]}}'
+    assert extract_json_object(text) == {
+        "reading": 'She said "go" }',
+        "meta": {"a": [1, {"b": 2}]},
+    }
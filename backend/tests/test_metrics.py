@@ -0,0 +1,20 @@
+"""Tests for the in-process metrics registry."""
+
+from horoscope_backend.core.metrics import MetricsRegistry
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs.").inc(kind="a")
+    registry.gauge("in_use", "In use.").set_function(lambda: 3)
+    hist = registry.histogram("wait_seconds", "Wait.", buckets=(0.1, 1.0))
+    hist.observe(0.05)
+    hist.observe(0.5)
+
+    text = registry.render()
+
+    assert 'jobs_total{kind="a"} 1.0' in text
+    assert "in_use 3.0" in text
+    assert 'wait_seconds_bucket{le="0.1"} 1' in text
+    assert 'wait_seconds_bucket{le="+Inf"} 2' in text
+    assert "wait_seconds_count 2" in text
@@ -0,0 +1,20 @@
+"""Tests for horoscope listing cursors."""
+
+import uuid
+from datetime import date, datetime
+
+import pytest
+from horoscope_backend.utils.pagination import EntryCursor
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    cursor = EntryCursor(
+        date(2030, 1, 1), datetime(2029, 12, 31, 23, 59, 58, 123456), uuid.uuid4()
+    )
+    token = cursor.encode()
+    assert "=" not in token
+    assert EntryCursor.decode(token) == cursor
+
+    for bad in ("", "not a cursor", token[:-4], "fA"):
+        with pytest.raises(ValueError):
+            EntryCursor.decode(bad)
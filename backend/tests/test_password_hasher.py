@@ -0,0 +1,41 @@
+"""Tests for the off-loop argon2 password hasher."""
+
+import asyncio
+
+from horoscope_backend.services.auth.password_hasher import PasswordHasher
+from passlib.context import CryptContext
+
+
+def _context(time_cost: int) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=1024,
+        argon2__parallelism=1,
+    )
+
+
+def test_verify_rehashes_when_cost_changes():
+    async def scenario():
+        old = PasswordHasher(context=_context(1), max_workers=2)
+        stored = await old.hash("s3cret")
+        assert await old.verify_and_update("s3cret", stored) == (True, None)
+
+        new = PasswordHasher(context=_context(2), max_workers=2)
+        valid, upgraded = await new.verify_and_update("s3cret", stored)
+        assert valid and upgraded and "t=2" in upgraded
+        assert await new.verify_and_update("wrong", stored) == (False, None)
+        old.shutdown()
+        new.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_malformed_hash_is_logged_and_rejected(caplog):
+    hasher = PasswordHasher(context=_context(1), max_workers=1)
+    result = asyncio.run(hasher.verify_and_update("s3cret", "not-a-hash"))
+    hasher.shutdown()
+
+    assert result == (False, None)
+    assert "Password verification error" in caplog.text
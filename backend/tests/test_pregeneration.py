@@ -0,0 +1,219 @@
+"""Tests for the nightly pre-generation job."""
+
+import asyncio
+import json
+import re
+from datetime import date, datetime, timezone
+
+from horoscope_backend.services.ai.ai_provider_base import AIProvider, AIProviderError
+from horoscope_backend.services.ai.local_bulk import LocalBulkProvider
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+)
+from horoscope_backend.services.horoscope_ai_service.horoscope_cache import (
+    HoroscopeCache,
+)
+from horoscope_backend.services.horoscope_ai_service.pregeneration import (
+    BulkPregenerationJob,
+    PregenerationJob,
+    build_tasks,
+    target_date,
+)
+from horoscope_backend.services.horoscope_ai_service.prompts import (
+    DAILY_HOROSCOPE_BATCH,
+)
+
+READING = {
+    "headline": "A bright day ahead",
+    "reading": "Patience pays off today.",
+    "lucky_color": "green",
+    "lucky_number": 4,
+    "mood": "calm",
+    "focus": ["home", "rest"],
+    "do": ["Walk", "Read", "Call a friend"],
+    "dont": ["Rush", "Overspend"],
+    "best_time_window": "09:00–11:00",
+}
+
+
+class StubProvider(AIProvider):
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, input):
+        self.calls += 1
+        return {"text": json.dumps(READING), "usage": {"total_tokens": 100}}
+
+    async def embed(self, input):
+        raise NotImplementedError
+
+
+NOW = datetime(2030, 1, 1, 21, 30, tzinfo=timezone.utc)
+
+
+def test_target_date_switches_to_tomorrow_near_local_midnight():
+    # 22:30 in Amsterdam, 06:30 next day in Tokyo.
+    assert target_date("Europe/Amsterdam", NOW, lead_hours=2) == date(2030, 1, 2)
+    assert target_date("Asia/Tokyo", NOW, lead_hours=2) == date(2030, 1, 2)
+    assert target_date("America/New_York", NOW, lead_hours=2) == date(2030, 1, 1)
+
+
+def test_job_resumes_from_checkpoint_and_respects_budget(tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    tasks = build_tasks(["UTC"], [0], lead_hours=0, now=NOW)
+    assert len(tasks) == 12
+
+    provider = StubProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+    job = PregenerationJob(
+        service,
+        concurrency=1,
+        token_budget=500,
+        checkpoint_path=checkpoint,
+        progress=lambda _: None,
+    )
+    first = asyncio.run(job.run(tasks))
+    assert first.generated == 5
+    assert first.budget_exhausted
+
+    # A fresh process (empty in-memory cache) picks up where the last run left off.
+    resumed_service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+    resumed = PregenerationJob(
+        resumed_service, checkpoint_path=checkpoint, progress=lambda _: None
+    )
+    second = asyncio.run(resumed.run(tasks))
+    assert second.skipped == 5
+    assert second.generated == 7
+    assert provider.calls == 12
+
+
+class BatchProvider(AIProvider):
+    """Answers batch prompts, dropping `r2` from the first completion."""
+
+    def __init__(self):
+        self.requested = []
+
+    async def generate(self, input):
+        ids = re.findall(r"^- id (r\d+):", input["messages"][1]["content"], re.M)
+        self.requested.append(ids)
+        body = {i: READING for i in ids}
+        if len(self.requested) == 1:
+            body["r2"] = {"headline": "incomplete"}
+        return {"text": json.dumps(body), "usage": {"total_tokens": 300}}
+
+    async def embed(self, input):
+        raise NotImplementedError
+
+
+def test_batched_job_rerequests_only_failed_items():
+    tasks = build_tasks(["UTC"], [0], lead_hours=0, now=NOW)
+    provider = BatchProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+    job = PregenerationJob(
+        service, concurrency=1, batch_size=12, progress=lambda _: None
+    )
+
+    report = asyncio.run(job.run(tasks))
+
+    assert provider.requested[0] == [f"r{i}" for i in range(1, 13)]
+    assert provider.requested[1] == ["r2"]
+    assert report.generated == 12
+    assert report.failed == 0
+    assert report.tokens_used == 600
+
+    again = asyncio.run(job.run(tasks))
+    assert again.skipped == 12
+    assert len(provider.requested) == 2
+
+    # Live requests are served the warmed templates, credited to the batch
+    # prompt that wrote them.
+    task = tasks[0]
+    result = asyncio.run(
+        service.generate_horoscope(
+            name="Alice",
+            dob=date(1990, 4, 1),  # an Aries, like tasks[0]
+            tz=task.tz,
+            on_date=task.on_date,
+            variation=task.variation,
+        )
+    )
+    assert len(provider.requested) == 2
+    assert result.headline == READING["headline"]
+    assert result.prompt_version == DAILY_HOROSCOPE_BATCH.prompt_id
+
+
+class FailingFirstBatchProvider(BatchProvider):
+    async def generate(self, input):
+        out = await super().generate(input)
+        if len(self.requested) == 1:
+            raise AIProviderError("Provider down")
+        return out
+
+
+def test_failed_batch_does_not_stop_the_run():
+    tasks = build_tasks(["UTC"], [0], lead_hours=0, now=NOW)
+    provider = FailingFirstBatchProvider()
+    service = HoroscopeAIService(provider=provider, cache=HoroscopeCache())
+    job = PregenerationJob(
+        service, concurrency=1, batch_size=6, progress=lambda _: None
+    )
+
+    report = asyncio.run(job.run(tasks))
+
+    assert report.failed == 6
+    assert report.failed_keys == [t.key for t in tasks[:6]]
+    assert report.generated == 6
+
+
+class FlakyProvider(StubProvider):
+    async def generate(self, input):
+        out = await super().generate(input)
+        return {**out, "text": "no json"} if self.calls == 3 else out
+
+
+def test_bulk_job_round_trips_through_local_batch_files(tmp_path):
+    tasks = build_tasks(["UTC"], [0], lead_hours=0, now=NOW)
+    delegate = FlakyProvider()
+    provider = LocalBulkProvider(delegate, str(tmp_path / "batches"))
+    cache = HoroscopeCache()
+    service = HoroscopeAIService(provider=provider, cache=cache)
+    state_path = tmp_path / "bulk.json"
+    job = BulkPregenerationJob(
+        service, state_path=str(state_path), poll_interval=0, progress=lambda _: None
+    )
+
+    report = asyncio.run(job.run(tasks))
+
+    assert delegate.calls == 12
+    assert report.generated == 11
+    assert report.failed_keys == [tasks[2].key]
+    assert report.tokens_used == 1200
+    assert asyncio.run(cache.get(tasks[0].key))["headline"] == READING["headline"]
+    assert not state_path.exists()
+    (input_file,) = (tmp_path / "batches").glob("*.input.jsonl")
+    first = json.loads(input_file.read_text().splitlines()[0])
+    assert first["body"]["messages"][0]["role"] == "system"
+
+    again = asyncio.run(job.run(tasks))
+    assert again.skipped == 11
+    assert again.generated == 1
+    assert delegate.calls == 13
+
+
+def test_bulk_job_skips_templates_warmed_in_batches(tmp_path):
+    tasks = build_tasks(["UTC"], [0], lead_hours=0, now=NOW)
+    cache = HoroscopeCache()
+    batched = HoroscopeAIService(provider=BatchProvider(), cache=cache)
+    warmup = PregenerationJob(batched, batch_size=12, progress=lambda _: None)
+    assert asyncio.run(warmup.run(tasks)).generated == 12
+
+    delegate = StubProvider()
+    provider = LocalBulkProvider(delegate, str(tmp_path / "batches"))
+    service = HoroscopeAIService(provider=provider, cache=cache)
+    job = BulkPregenerationJob(
+        service, state_path=str(tmp_path / "bulk.json"), progress=lambda _: None
+    )
+
+    report = asyncio.run(job.run(tasks))
+    assert report.skipped == 12
+    assert delegate.calls == 0
@@ -0,0 +1,95 @@
+"""Tests for the token-bucket rate limiter."""
+
+import asyncio
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from horoscope_backend.core.rate_limit import (
+    InMemoryRateLimitBackend,
+    RateLimit,
+    RateLimitMiddleware,
+    default_identity,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+    limit = RateLimit(rate=1.0, burst=2)
+
+    async def take():
+        return await backend.acquire("k", limit)
+
+    assert asyncio.run(take()).allowed
+    assert asyncio.run(take()).allowed
+    denied = asyncio.run(take())
+    assert not denied.allowed
+    assert denied.retry_after == 1.0
+
+    clock.now = 1.0
+    assert asyncio.run(take()).allowed
+
+
+def test_middleware_returns_429_per_route_and_identity():
+    app = FastAPI()
+
+    @app.post("/limited")
+    def limited():
+        return {"ok": True}
+
+    @app.get("/open")
+    def open_route():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=InMemoryRateLimitBackend(clock=FakeClock()),
+        default_limit=RateLimit(rate=1.0, burst=100),
+        route_limits={("POST", "/limited"): RateLimit(rate=1.0, burst=1)},
+        identity=lambda scope: dict(scope["headers"]).get(b"x-client", b"").decode(),
+    )
+    client = TestClient(app)
+
+    first = client.post("/limited", headers={"X-Client": "a"})
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "1"
+
+    second = client.post("/limited", headers={"X-Client": "a"})
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "1"
+    assert second.headers["X-RateLimit-Remaining"] == "0"
+
+    assert client.post("/limited", headers={"X-Client": "b"}).status_code == 200
+    assert client.get("/open", headers={"X-Client": "a"}).status_code == 200
+
+
+def test_unverified_api_keys_share_the_ip_bucket():
+    app = FastAPI()
+
+    @app.post("/limited")
+    def limited():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        backend=InMemoryRateLimitBackend(clock=FakeClock()),
+        default_limit=RateLimit(rate=1.0, burst=100),
+        route_limits={("POST", "/limited"): RateLimit(rate=1.0, burst=2)},
+        identity=default_identity,
+    )
+    client = TestClient(app)
+
+    statuses = [
+        client.post("/limited", headers={"X-API-Key": uuid.uuid4().hex}).status_code
+        for _ in range(3)
+    ]
+    assert statuses == [200, 200, 429]
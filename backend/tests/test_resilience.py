@@ -0,0 +1,144 @@
+"""Tests for the resilient provider wrapper."""
+
+import asyncio
+import json
+import random
+import time
+
+import pytest
+from horoscope_backend.services.ai.ai_provider_base import (
+    AIProviderError,
+    AIProviderRetryableError,
+    AIProviderTimeoutError,
+    AIProviderUnavailableError,
+    Role,
+)
+from horoscope_backend.services.ai.factory import ProviderType
+from horoscope_backend.services.ai.fake_provider import FakeProvider
+from horoscope_backend.services.ai.registry import AIProviderRegistry
+from horoscope_backend.services.ai.resilience import (
+    CircuitBreaker,
+    ResilienceConfig,
+    ResilientProvider,
+)
+
+INPUT = {"messages": [{"role": Role.USER, "content": "Name: Alice\nZodiac sign: Leo"}]}
+
+CONFIG = ResilienceConfig(
+    deadline_seconds=1.0,
+    max_attempts=2,
+    backoff_seconds=0.0,
+    hedge_min_samples=5,
+    breaker_failure_threshold=2,
+    breaker_reset_seconds=10.0,
+)
+
+
+def _resilient(*providers, config=CONFIG, clock=time.monotonic):
+    return ResilientProvider(
+        [(f"fake:{i}", p) for i, p in enumerate(providers)],
+        config,
+        clock=clock,
+        rng=random.Random(0),
+    )
+
+
+def test_retryable_errors_fail_over_and_open_the_breaker():
+    flaky = FakeProvider(failures=[AIProviderRetryableError("boom")] * 3)
+    backup = FakeProvider()
+    provider = _resilient(flaky, backup)
+
+    for _ in range(2):
+        out = asyncio.run(provider.generate(INPUT))
+        assert json.loads(out["text"])["headline"].startswith("Alice")
+
+    assert provider.targets[0].breaker.state == CircuitBreaker.OPEN
+    asyncio.run(provider.generate(INPUT))
+    assert flaky.calls == 2  # skipped while open
+    assert backup.calls == 3
+
+
+def test_fatal_errors_are_not_retried():
+    primary = FakeProvider(failures=[AIProviderError("bad request")])
+    backup = FakeProvider()
+    provider = _resilient(primary, backup)
+
+    with pytest.raises(AIProviderError, match="bad request"):
+        asyncio.run(provider.generate(INPUT))
+    assert backup.calls == 0
+
+
+def test_breaker_half_opens_after_reset():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=5, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 5.0
+    assert breaker.allow()  # probe
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_every_breaker_open_fails_fast():
+    provider = _resilient(FakeProvider())
+    provider.targets[0].breaker.record_failure()
+    provider.targets[0].breaker.record_failure()
+
+    with pytest.raises(AIProviderUnavailableError):
+        asyncio.run(provider.generate(INPUT))
+
+
+def test_slow_calls_are_hedged_after_p95():
+    fake = FakeProvider(latencies=[0.5, 0.0])
+    provider = _resilient(fake)
+    for _ in range(5):
+        provider.targets[0].latencies.add(0.01)
+
+    start = time.monotonic()
+    asyncio.run(provider.generate(INPUT))
+
+    assert time.monotonic() - start < 0.3
+    assert fake.calls == 2
+
+
+def test_deadline_bounds_the_whole_call():
+    config = ResilienceConfig(deadline_seconds=0.1, max_attempts=3, backoff_seconds=0)
+    provider = _resilient(FakeProvider(latencies=[5.0] * 3), config=config)
+
+    start = time.monotonic()
+    with pytest.raises(AIProviderTimeoutError):
+        asyncio.run(provider.generate(INPUT))
+    assert time.monotonic() - start < 1.0
+
+
+def test_stream_fails_over_before_the_first_chunk():
+    provider = _resilient(
+        FakeProvider(failures=[AIProviderRetryableError("down")]),
+        FakeProvider(text='{"headline": "streamed from the backup"}'),
+    )
+
+    async def collect():
+        return [c.get("delta", "") async for c in provider.generate_stream(INPUT)]
+
+    assert "".join(asyncio.run(collect())) == '{"headline": "streamed from the backup"}'
+
+
+def test_registry_wraps_default_provider(monkeypatch):
+    from horoscope_backend.core.config import settings
+
+    monkeypatch.setattr(settings, "ai_fallback_targets", ["fake:backup-model"])
+    registry = AIProviderRegistry(default_provider=ProviderType.FAKE)
+
+    resilient = registry.resilient()
+
+    assert registry.resilient() is resilient
+    assert resilient.primary is registry.get()
+    assert [t.name for t in resilient.targets] == ["fake", "fake:backup-model"]
+    assert resilient.targets[1].provider.config.model == "backup-model"
+    asyncio.run(registry.aclose())
@@ -0,0 +1,189 @@
+"""Tests for the semantic response cache."""
+
+import asyncio
+import os
+import random
+import re
+import uuid
+from datetime import date
+
+import numpy as np
+from horoscope_backend.services.ai.fake_provider import FakeProvider
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HoroscopeAIService,
+)
+from horoscope_backend.services.horoscope_ai_service.horoscope_cache import (
+    HoroscopeCache,
+)
+from horoscope_backend.services.horoscope_ai_service.semantic_cache import (
+    SemanticCache,
+)
+from horoscope_backend.services.horoscope_ai_service.vector_index import (
+    MmapVectorStore,
+    NumpyVectorIndex,
+)
+
+
+class TimezoneBlindProvider(FakeProvider):
+    """Embeds request features as if the timezone did not matter."""
+
+    def __init__(self, fail_embeddings=False):
+        super().__init__()
+        self.fail_embeddings = fail_embeddings
+
+    async def embed(self, input):
+        if self.fail_embeddings:
+            raise RuntimeError("no embedding model")
+        vectors = []
+        for text in input["texts"]:
+            rng = random.Random(re.sub(r"Timezone: \S+", "", text))
+            vectors.append([rng.uniform(-1, 1) for _ in range(16)])
+        return {"vectors": vectors, "dim": 16}
+
+
+def test_index_returns_nearest_in_group_and_evicts_oldest():
+    index = NumpyVectorIndex(max_entries=3)
+    index.add("a", [1.0, 0.0], group="leo:0")
+    index.add("b", [0.8, 0.6], group="leo:0")
+    index.add("c", [1.0, 0.0], group="aries:0")
+
+    assert [k for k, _ in index.search([1.0, 0.1], group="leo:0", k=2)] == ["a", "b"]
+    assert index.search([1.0, 0.0], group="leo:1") == []
+
+    index.add("d", [0.0, 1.0], group="leo:0")  # overwrites "a"
+    assert len(index) == 3
+    key, score = index.search([1.0, 0.0], group="leo:0")[0]
+    assert key == "b"
+    assert round(score, 2) == 0.8
+
+
+def test_mmap_store_is_shared_between_instances(tmp_path):
+    writer = MmapVectorStore(str(tmp_path))
+    reader = MmapVectorStore(str(tmp_path))
+    entry_id = str(uuid.uuid4())
+    writer.add(entry_id, [1.0, 0.0], group="leo:0")
+    assert reader.search([1.0, 0.2], group="leo:0")[0][0] == entry_id
+
+    # A writer that died mid-append leaves bytes past the committed count.
+    with open(os.path.join(tmp_path, "0", "vectors"), "ab") as f:
+        f.write(b"\xff" * 5)
+    reader.add_many(["b", "c"], [[0.0, 1.0], [0.6, 0.8]], ["leo:0", "aries:0"])
+    assert len(writer) == 3
+    assert [k for k, _ in writer.search([0.1, 1.0], group="leo:0", k=3)] == [
+        "b",
+        entry_id,
+    ]
+    assert writer.search([1.0, 0.0], group="leo:1") == []
+
+
+def test_mmap_store_starts_over_when_full(tmp_path):
+    writer = MmapVectorStore(str(tmp_path), max_rows=3)
+    reader = MmapVectorStore(str(tmp_path), max_rows=3)
+    writer.add_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], ["leo:0", "leo:0"])
+    assert len(reader) == 2
+
+    writer.add_many(["c", "d"], [[1.0, 0.0], [0.6, 0.8]], ["leo:0", "aries:0"])
+    assert len(reader) == 2
+    assert [k for k, _ in reader.search([1.0, 0.0], group="leo:0", k=3)] == ["c"]
+    assert reader.search([0.0, 1.0], group="aries:0")[0][0] == "d"
+    assert not os.path.exists(os.path.join(tmp_path, "0"))
+
+
+def test_mmap_store_batched_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[:20] + rng.normal(scale=0.1, size=(20, 32))
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+
+    for dtype in ("float32", "int8"):
+        store = MmapVectorStore(str(tmp_path / dtype), dtype=dtype)
+        store.BLOCK_ROWS = 64
+        store.add_many([str(i) for i in range(500)], vectors, ["all"] * 500)
+        results = store.search_many(queries, k=5)
+        for want, got in zip(expected, results):
+            assert int(got[0][0]) == want[0]
+            overlap = len(set(want) & {int(k) for k, _ in got})
+            assert overlap >= (5 if dtype == "float32" else 4)
+
+
+def _service(provider, semantic):
+    return HoroscopeAIService(
+        provider=provider, cache=HoroscopeCache(), semantic_cache=semantic
+    )
+
+
+def _generate(service, tz, variation=0):
+    return asyncio.run(
+        service.generate_horoscope(
+            name="Alice",
+            dob=date(1990, 8, 1),
+            tz=tz,
+            on_date=date(2030, 1, 1),
+            variation=variation,
+        )
+    )
+
+
+def test_similar_request_reuses_cached_reading():
+    provider = TimezoneBlindProvider()
+    semantic = SemanticCache(provider, NumpyVectorIndex(), threshold=0.99)
+    service = _service(provider, semantic)
+
+    first = _generate(service, "Europe/Amsterdam")
+    second = _generate(service, "Europe/Berlin")
+    assert provider.calls == 1
+    assert second.headline == first.headline
+    assert second.usage == {}
+
+    _generate(service, "Europe/Berlin", variation=1)
+    assert provider.calls == 2
+
+
+def test_embedding_failures_fall_back_to_generation():
+    provider = TimezoneBlindProvider(fail_embeddings=True)
+    semantic = SemanticCache(provider, NumpyVectorIndex())
+    service = _service(provider, semantic)
+
+    _generate(service, "Europe/Amsterdam")
+    _generate(service, "Europe/Berlin")
+
+    assert provider.calls == 2
+    assert len(semantic.index) == 0
+
+
+def test_mmap_backed_cache_serves_similar_requests(tmp_path):
+    provider = TimezoneBlindProvider()
+    semantic = SemanticCache(provider, MmapVectorStore(str(tmp_path)), threshold=0.99)
+    service = _service(provider, semantic)
+
+    first = _generate(service, "Europe/Amsterdam")
+    second = _generate(service, "Europe/Berlin")
+    assert provider.calls == 1
+    assert second.headline == first.headline
+    assert len(semantic.index) == 1
+
+
+class SignOnlyProvider(FakeProvider):
+    """Embeds every request for a sign the same, whatever its date."""
+
+    async def embed(self, input):
+        vectors = []
+        for text in input["texts"]:
+            rng = random.Random(re.match(r"Zodiac sign: \w+", text).group())
+            vectors.append([rng.uniform(-1, 1) for _ in range(16)])
+        return {"vectors": vectors, "dim": 16}
+
+
+def test_readings_are_not_reused_across_dates():
+    provider = SignOnlyProvider()
+    semantic = SemanticCache(provider, NumpyVectorIndex(), threshold=0.99)
+    service = _service(provider, semantic)
+
+    for on_date in (date(2030, 1, 1), date(2030, 1, 2)):
+        asyncio.run(
+            service.generate_horoscope(
+                name="Alice", dob=date(1990, 8, 1), tz="UTC", on_date=on_date
+            )
+        )
+    assert provider.calls == 2
@@ -0,0 +1,56 @@
+"""Tests for near-duplicate reading fingerprints."""
+
+import random
+
+from horoscope_backend.utils.simhash import (
+    FingerprintSet,
+    hamming,
+    reading_fingerprint,
+    simhash,
+)
+
+READING = {
+    "headline": "A bright day for Alice",
+    "reading": (
+        "Alice, the morning brings a steady sense of purpose. Conversations at "
+        "work open doors you did not expect, and a small kindness from a friend "
+        "reminds you how far you have come. In the evening, slow down and let "
+        "the day settle before making plans for the weekend."
+    ),
+    "focus": ["work", "friendship"],
+    "do": ["say yes to a coffee invitation"],
+    "dont": ["rush the evening"],
+    "lucky_number": 7,
+    "usage": {"total_tokens": 321},
+}
+
+
+def test_small_edits_stay_close_and_rewrites_do_not():
+    edited = dict(READING, reading=READING["reading"].replace("steady", "calm"))
+    rewrite = dict(
+        READING,
+        headline="Rest and reflect, Alice",
+        reading=(
+            "Alice, today asks for patience. Let others take the lead while you "
+            "recharge, and save big decisions for later in the week."
+        ),
+        do=["take a long walk"],
+    )
+    original = reading_fingerprint(READING)
+    assert original == reading_fingerprint(dict(READING, usage={}))
+    assert -(2**63) <= original < 2**63
+    assert hamming(original, reading_fingerprint(edited)) <= 8
+    assert hamming(original, reading_fingerprint(rewrite)) > 16
+
+
+def test_fingerprint_set_finds_every_neighbour_within_distance():
+    rng = random.Random(1)
+    stored = [rng.getrandbits(64) - 2**63 for _ in range(200)]
+    seen = FingerprintSet(stored, max_distance=3)
+
+    for fingerprint in stored[:50]:
+        flipped = fingerprint
+        for bit in rng.sample(range(64), 3):
+            flipped ^= 1 << bit
+        assert flipped in seen
+    assert simhash("something else entirely") not in seen
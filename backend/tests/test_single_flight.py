@@ -0,0 +1,68 @@
+"""Tests for in-flight call coalescing."""
+
+import asyncio
+
+import pytest
+from horoscope_backend.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [r for r, _ in results] == ["done"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert len(flights) == 0
+
+
+def test_failure_reaches_every_waiter_and_is_forgotten():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *(flights.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(flights) == 0
+
+    async def succeed():
+        return "ok"
+
+    assert asyncio.run(flights.do("k", succeed)) == ("ok", False)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == ("done", True)
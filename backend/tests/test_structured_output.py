@@ -0,0 +1,95 @@
+"""Tests for schema-constrained provider output."""
+
+import asyncio
+import json
+from datetime import date
+
+from horoscope_backend.services.ai.ai_provider_base import (
+    AIProvider,
+    ProviderCapabilities,
+    ResponseFormat,
+)
+from horoscope_backend.services.ai.openai_client import (
+    OpenAICredentials,
+    OpenAIProvider,
+    OpenAIProviderConfig,
+)
+from horoscope_backend.services.horoscope_ai_service.horoscope_ai_service import (
+    HOROSCOPE_JSON_SCHEMA,
+    HoroscopeAIService,
+)
+
+
+class SchemaProvider(AIProvider):
+    def __init__(self, payload):
+        self.payload = payload
+        self.inputs = []
+
+    @property
+    def capabilities(self):
+        return ProviderCapabilities(json_mode=True, json_schema=True)
+
+    async def generate(self, input):
+        self.inputs.append(input)
+        return {"text": json.dumps(self.payload), "finish_reason": "stop"}
+
+    async def embed(self, input):
+        raise NotImplementedError
+
+
+def test_schema_is_generated_from_result_dataclass():
+    schema = HOROSCOPE_JSON_SCHEMA["schema"]
+
+    assert schema["additionalProperties"] is False
+    assert set(schema["required"]) == set(schema["properties"])
+    assert "usage" not in schema["properties"]
+    assert schema["properties"]["focus"] == {
+        "type": "array",
+        "items": {"type": "string"},
+    }
+    assert schema["properties"]["compatibility_sign"]["type"] == ["string", "null"]
+
+
+def test_schema_guaranteed_output_skips_repair_calls():
+    payload = {
+        "headline": "Hi Alice",
+        "reading": "",
+        "lucky_color": "red",
+        "lucky_number": 3,
+        "mood": "calm",
+        "focus": ["a"],
+        "do": ["x"],
+        "dont": ["y"],
+        "best_time_window": "10:00–12:00",
+        "compatibility_sign": None,
+    }
+    provider = SchemaProvider(payload)
+    service = HoroscopeAIService(provider=provider)
+
+    result = asyncio.run(
+        service.generate_horoscope(name="Alice", dob=date(1990, 5, 17))
+    )
+
+    assert len(provider.inputs) == 1
+    assert provider.inputs[0]["response_format"] == ResponseFormat.JSON_SCHEMA
+    assert result.headline == "Hi Alice"
+    assert result.reading  # empty field filled from the fallback
+
+
+def test_openai_request_degrades_to_supported_format():
+    def options(supported):
+        provider = OpenAIProvider(
+            credentials=OpenAICredentials(api_key="x", base_url="http://localhost"),
+            config=OpenAIProviderConfig(response_format=supported),
+        )
+        return provider._request_options(
+            {
+                "messages": [],
+                "response_format": ResponseFormat.JSON_SCHEMA,
+                "json_schema": HOROSCOPE_JSON_SCHEMA,
+            }
+        )
+
+    assert options("json_schema")["response_format"]["json_schema"]["strict"]
+    assert options("json_object")["response_format"] == {"type": "json_object"}
+    assert "response_format" not in options(None)
@@ -0,0 +1,67 @@
+"""Tests for credit reservation in async_usage_crud (needs Postgres)."""
+
+import asyncio
+from datetime import date
+
+from horoscope_backend.core.config import settings
+from horoscope_backend.crud.async_usage_crud import (
+    get_usage_for_date,
+    refund_credit,
+    reserve_credit,
+)
+
+TODAY = date(2030, 1, 1)
+
+
+def test_reserve_until_exhausted_then_refund(pg_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "registered_user_init_credits", 2)
+
+    async def run():
+        async with pg_sessions() as db:
+            first = await reserve_credit(db, for_date=TODAY, user_id=7)
+            second = await reserve_credit(db, for_date=TODAY, user_id=7)
+            exhausted = await reserve_credit(db, for_date=TODAY, user_id=7)
+            await refund_credit(db, second)
+            again = await reserve_credit(db, for_date=TODAY, user_id=7)
+            # Registered users have a lifetime budget: a new day adds nothing.
+            tomorrow = await reserve_credit(db, for_date=date(2030, 1, 2), user_id=7)
+            usage = await get_usage_for_date(
+                db, ip="", for_date=date(2030, 1, 2), user_id=7
+            )
+        return first, second, exhausted, again, tomorrow, usage
+
+    first, second, exhausted, again, tomorrow, usage = asyncio.run(run())
+    assert (first.attempts, second.attempts) == (1, 2)
+    assert first.usage_id == second.usage_id
+    assert exhausted is None
+    assert again.attempts == 2
+    assert tomorrow is None
+    assert (usage.attempts, usage.credits_remaining) == (2, 2)
+
+
+def test_anonymous_credits_are_per_ip_and_day(pg_sessions):
+    async def run():
+        async with pg_sessions() as db:
+            return [
+                await reserve_credit(db, for_date=TODAY, ip="203.0.113.7"),
+                await reserve_credit(db, for_date=TODAY, ip="203.0.113.7"),
+                await reserve_credit(db, for_date=TODAY, ip="203.0.113.8"),
+                await reserve_credit(db, for_date=date(2030, 1, 2), ip="203.0.113.7"),
+            ]
+
+    reservations = asyncio.run(run())
+    assert [r is not None for r in reservations] == [True, False, True, True]
+
+
+def test_concurrent_reservations_never_overspend(pg_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "registered_user_init_credits", 5)
+
+    async def reserve():
+        async with pg_sessions() as db:
+            return await reserve_credit(db, for_date=TODAY, user_id=7)
+
+    async def run():
+        return await asyncio.gather(*(reserve() for _ in range(12)))
+
+    reservations = [r for r in asyncio.run(run()) if r is not None]
+    assert sorted(r.attempts for r in reservations) == [1, 2, 3, 4, 5]